@@ -14,8 +14,9 @@ import time
 import json
 import tempfile
 import uuid
+import hmac
 import logging
-import numpy as np
+import threading
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -24,10 +25,9 @@ logger = logging.getLogger(__name__)
 # Add the src directory to the path
 sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
 
-# Import the necessary modules
-from model.predict import AdverseEventPredictor
-from extraction.medicine_extractor import MedicineExtractor
-from extraction.symptom_extractor import SymptomExtractor
+# Heavy dependencies (PyTorch, transformers, Whisper, pydub) are imported by
+# the components that use them on first use, so text-only deployments never
+# load the audio stack and the server starts quickly
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -35,19 +35,120 @@ CORS(app)  # Enable CORS for all routes
 # Initialize the predictor (lazy loading)
 predictor = None
 
+# Whisper models loaded by this process, by name
+whisper_models = {}
+
+# Background FAERS data reload: one at a time, with the outcome of the last one
+reload_lock = threading.Lock()
+reload_status = {'state': 'idle', 'started': None, 'finished': None, 'error': None}
+data_watch_thread = None
+
 def get_predictor():
     """Get or initialize the adverse event predictor."""
     global predictor
     if predictor is None:
         try:
             logger.info("Initializing AdverseEventPredictor...")
+            from model.predicty import AdverseEventPredictor
             predictor = AdverseEventPredictor()
             logger.info("AdverseEventPredictor initialized successfully")
+            start_data_watch()
         except Exception as e:
             logger.error(f"Error initializing predictor: {e}")
             return None
     return predictor
 
+def reload_predictor():
+    """Build a predictor over the current FAERS data and swap it in.
+    
+    The new predictor is built completely (sharing the loaded NER models)
+    before the global reference is replaced in a single assignment, so
+    requests that already hold the old predictor finish on the old data and
+    later requests use the new data. Runs in a background thread started by
+    start_reload, which holds reload_lock.
+    """
+    global predictor
+    try:
+        current = predictor
+        if current is None:
+            new_predictor = get_predictor()
+            if new_predictor is None:
+                raise RuntimeError("Failed to initialize predictor")
+        else:
+            new_predictor = current.reloaded()
+            predictor = new_predictor
+        logger.info(f"FAERS data reloaded, now serving data version {new_predictor.data_version}")
+        reload_status.update(state='idle', finished=time.time(), error=None)
+    except Exception as e:
+        logger.error(f"Error reloading FAERS data: {e}")
+        reload_status.update(state='failed', finished=time.time(), error=str(e))
+    finally:
+        reload_lock.release()
+
+def start_reload():
+    """Start a background FAERS data reload.
+    
+    Returns:
+        True if a reload was started, False if one is already running
+    """
+    if not reload_lock.acquire(blocking=False):
+        return False
+    reload_status.update(state='running', started=time.time(), finished=None, error=None)
+    threading.Thread(target=reload_predictor, name="faers-reload", daemon=True).start()
+    return True
+
+def watch_data_files(interval):
+    """Reload the FAERS data whenever the processed data files change.
+    
+    A change is only acted on once the files have stopped changing for one
+    interval, so a reload never starts while preprocessing is still writing.
+    
+    Args:
+        interval: Seconds between checks
+    """
+    from model.predicty import data_fingerprint
+    
+    loaded = data_fingerprint()
+    previous = loaded
+    while True:
+        time.sleep(interval)
+        current = data_fingerprint()
+        if current != loaded and current == previous:
+            logger.info("Processed FAERS data changed, reloading in the background")
+            if start_reload():
+                loaded = current
+        previous = current
+
+def start_data_watch():
+    """Start watching the data files if FAERS_RELOAD_INTERVAL is set (seconds, 0 disables)."""
+    global data_watch_thread
+    interval = float(os.environ.get("FAERS_RELOAD_INTERVAL", 0))
+    if interval > 0 and data_watch_thread is None:
+        data_watch_thread = threading.Thread(
+            target=watch_data_files, args=(interval,), name="faers-data-watch", daemon=True
+        )
+        data_watch_thread.start()
+        logger.info(f"Watching the processed FAERS data for changes every {interval:g}s")
+
+def is_admin_request():
+    """Check whether a request may use the admin endpoints.
+    
+    With ADMIN_TOKEN set the request must send it in the X-Admin-Token header;
+    without it only local requests are allowed.
+    """
+    token = os.environ.get("ADMIN_TOKEN")
+    if token:
+        return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+def get_whisper_model(name):
+    """Get or load a Whisper model (memory-mapped from MODEL_CACHE_DIR when installed)."""
+    if name not in whisper_models:
+        from extraction.model_store import load_whisper_model
+        logger.info(f"Loading Whisper model: {name}")
+        whisper_models[name] = load_whisper_model(name)
+    return whisper_models[name]
+
 @app.route('/api/analyze-text', methods=['POST'])
 def analyze_text():
     """Analyze a text conversation for adverse drug events."""
@@ -78,11 +179,6 @@ def analyze_text():
         logger.error(f"Error analyzing conversation: {e}")
         return jsonify({'error': str(e)}), 500
 
-# Add these imports at the top of your file
-import whisper
-import torch
-from pydub import AudioSegment
-
 @app.route('/api/analyze-audio', methods=['POST'])
 def analyze_audio():
     """Analyze an audio recording for adverse drug events."""
@@ -102,6 +198,7 @@ def analyze_audio():
     try:
         # Transcribe audio using Whisper
         logger.info(f"Transcribing audio with Whisper model: {whisper_model}")
+        from pydub import AudioSegment
         
         # Convert audio to proper format if needed
         try:
@@ -115,9 +212,8 @@ def analyze_audio():
         except Exception as e:
             logger.warning(f"Audio conversion warning: {e}")
         
-        # Load Whisper model
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        model = whisper.load_model(whisper_model, device=device)
+        # Load Whisper model (kept loaded for later requests)
+        model = get_whisper_model(whisper_model)
         
         # Transcribe
         result = model.transcribe(audio_path)
@@ -165,6 +261,24 @@ def analyze_audio():
         logger.error(f"Error analyzing audio: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/admin/reload', methods=['GET', 'POST'])
+def admin_reload():
+    """Reload the FAERS data in the background (POST) or report the reload status (GET)."""
+    if not is_admin_request():
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    status_code = 200
+    if request.method == 'POST':
+        if not start_reload():
+            return jsonify({**reload_status, 'error': 'A reload is already running'}), 409
+        status_code = 202
+    
+    current = predictor
+    return jsonify({
+        **reload_status,
+        'data_version': current.data_version if current is not None else None
+    }), status_code
+
 @app.route('/api/models', methods=['GET'])
 def get_models():
     """Get available Whisper models and their characteristics."""
@@ -206,4 +320,10 @@ def get_models():
     return jsonify(models)
 
 if __name__ == '__main__':
+    # With an NER worker pool, load the models before serving so the workers
+    # are forked from a process that is not yet handling requests. The debug
+    # reloader serves from a child process (WERKZEUG_RUN_MAIN is set there),
+    # so the parent that only watches files skips the preload
+    if int(os.environ.get("NER_POOL_WORKERS", 0)) > 0 and os.environ.get("WERKZEUG_RUN_MAIN"):
+        get_predictor()
     app.run(debug=True, port=5000)
\ No newline at end of file
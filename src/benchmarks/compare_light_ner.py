@@ -0,0 +1,137 @@
+"""Throughput and agreement of the light NER backend against the transformer.
+
+This script runs BiomedicalNER with the transformer backend and with the light
+perceptron backend over the same synthetic sentences and reports sentences/sec
+for each, the speedup, entity-level agreement of the light backend with the
+transformer, and the recall of both on the drugs and symptoms the generator
+mentioned. Without --model it uses the tiny stub model, whose entities are
+random, so pass the real model to measure agreement.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path to import from other modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import SyntheticConversationGenerator
+from benchmarks.stub_model import create_stub_model
+
+def generate_sentences(count, seed=0):
+    """Generate sentences together with the drug or symptom they mention.
+
+    Args:
+        count: Number of sentences
+        seed: Random seed
+
+    Returns:
+        Tuple of (generator, list of (sentence, mention or None, negated))
+    """
+    generator = SyntheticConversationGenerator(seed=seed)
+    sentences = []
+    for _ in range(count):
+        text, drug, symptom, negated = generator.sentence(drug_density=0.4, symptom_density=0.4)
+        sentences.append((text, drug or symptom, negated))
+    return generator, sentences
+
+def run_backend(ner, sentences, repeats=1):
+    """Run a BiomedicalNER over the sentences and time it.
+
+    Args:
+        ner: Initialized BiomedicalNER
+        sentences: List of sentence texts
+        repeats: Number of timed passes
+
+    Returns:
+        Tuple of (entities per sentence, sentences per second)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        entities = [ner.extract_entities(sentence) for sentence in sentences]
+
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            for sentence in sentences:
+                ner.extract_entities(sentence)
+        elapsed = time.perf_counter() - start_time
+
+    throughput = len(sentences) * repeats / elapsed if elapsed > 0 else float('inf')
+    return entities, throughput
+
+def mention_recall(entities, sentences):
+    """Fraction of non-negated mentions found among a sentence's entities."""
+    found = 0
+    total = 0
+    for sentence_entities, (_, mention, negated) in zip(entities, sentences):
+        if mention is None or negated:
+            continue
+        total += 1
+        texts = [entity['text'].lower() for entity in sentence_entities]
+        if any(mention in text or text in mention for text in texts if text):
+            found += 1
+    return found / total if total else 1.0
+
+def main():
+    """Compare the light and transformer NER backends."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=None,
+                        help="Transformer model name or directory (default: the tiny stub model)")
+    parser.add_argument("--light-model", default=None,
+                        help="Trained light model (default: the model store, or a quickly trained one)")
+    parser.add_argument("--sentences", type=int, default=300, help="Number of synthetic sentences")
+    parser.add_argument("--repeats", type=int, default=1, help="Timed passes over the sentences")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generator")
+    args = parser.parse_args()
+
+    # Every sentence must reach the model for the timings to be comparable
+    os.environ["NER_CACHE_SIZE"] = "0"
+
+    from extraction.biomedical_ner import BiomedicalNER
+    from extraction.compare_quantization import entity_agreement
+    from extraction.light_ner import default_model_path, train_light_model
+
+    generator, sentences = generate_sentences(args.sentences, seed=args.seed)
+    texts = [text for text, _, _ in sentences]
+    print(f"Generated {len(texts)} sentences (seed {args.seed})")
+
+    with tempfile.TemporaryDirectory(prefix="aed-light-") as work_dir:
+        model_name = args.model
+        if model_name is None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                model_name = str(create_stub_model(Path(work_dir) / "stub_model", words=generator.vocabulary()))
+            print("Using the tiny stub model as the transformer reference")
+
+        light_model = args.light_model
+        if light_model is None and default_model_path().exists():
+            light_model = str(default_model_path())
+        if light_model is None:
+            print("No trained light model found, training one from the available vocabularies")
+            with contextlib.redirect_stdout(io.StringIO()):
+                light_model = str(train_light_model(Path(work_dir) / "light_ner.pkl", sentences=5000, epochs=3))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            transformer_ner = BiomedicalNER(model_name=model_name, backend="transformers")
+            light_ner = BiomedicalNER(model_name=light_model, backend="light")
+
+        transformer_entities, transformer_throughput = run_backend(transformer_ner, texts, args.repeats)
+        light_entities, light_throughput = run_backend(light_ner, texts, args.repeats)
+
+    agreement = entity_agreement(transformer_entities, light_entities)
+
+    print(f"\n{'backend':<14} {'sentences/sec':>14} {'mention recall':>15}")
+    print(f"{'transformers':<14} {transformer_throughput:>14.1f} {mention_recall(transformer_entities, sentences):>15.3f}")
+    print(f"{'light':<14} {light_throughput:>14.1f} {mention_recall(light_entities, sentences):>15.3f}")
+    print(f"\nSpeedup: {light_throughput / transformer_throughput:.1f}x")
+    print("Entity agreement (light vs transformer reference):")
+    print(f"  Precision: {agreement['precision']:.3f}")
+    print(f"  Recall:    {agreement['recall']:.3f}")
+    print(f"  F1:        {agreement['f1']:.3f}")
+    print(f"  Identical sentences: {agreement['sentence_agreement']:.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Import-time benchmark for the detector's modules.
+
+This script imports each module in a fresh interpreter with ``python -X importtime``
+and reports its cumulative import cost, the heaviest dependencies it pulled in
+and whether any heavy framework (PyTorch, transformers, Whisper, ...) was
+loaded. Text-only workers and batch scripts should start without importing
+any of them.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+BACKEND_DIR = PROJECT_ROOT / "backend"
+
+# Modules measured by default (the backend app is imported as "app")
+DEFAULT_MODULES = [
+    "extraction.text_normalizer",
+    "extraction.gazetteer",
+    "extraction.cascade",
+    "extraction.biomedical_ner",
+    "extraction.medicine_extractor",
+    "extraction.symptom_extractor",
+    "matching.faers_matcher",
+    "model.predicty",
+    "app"
+]
+
+# Frameworks that must only be imported when the component using them runs
+HEAVY_MODULES = ["torch", "transformers", "whisper", "pydub", "onnxruntime", "sklearn", "pandas"]
+
+def measure_import(module, python=sys.executable):
+    """Import a module in a fresh interpreter and collect its import times.
+
+    Args:
+        module: Dotted module name (an empty string measures interpreter startup)
+        python: Python executable to use
+
+    Returns:
+        Dictionary with the module name, cumulative time in seconds, a dict of
+        direct dependency -> cumulative seconds, the set of all top-level
+        packages imported, and an error message if the import failed
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(SRC_DIR), str(BACKEND_DIR)] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    process = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}" if module else "pass"],
+        cwd=str(PROJECT_ROOT), env=env, capture_output=True, text=True
+    )
+
+    total = None
+    packages = {}
+    loaded = set()
+    errors = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            errors.append(line)
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # Header line
+        cumulative = int(fields[1]) / 1e6
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+
+        loaded.add(name.split(".")[0])
+        if name == module:
+            total = cumulative
+        if depth <= 1:
+            top_level = name.split(".")[0]
+            packages[top_level] = max(packages.get(top_level, 0.0), cumulative)
+
+    return {
+        'module': module,
+        'seconds': total,
+        'packages': packages,
+        'loaded': loaded,
+        'error': errors[-1] if process.returncode != 0 and errors else None
+    }
+
+def main():
+    """Measure and report the import cost of the detector's modules."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES,
+                        help="Modules to measure (default: the main extraction, matching and backend modules)")
+    parser.add_argument("--top", type=int, default=5,
+                        help="Number of heaviest dependencies to list per module")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="Import time budget in seconds; modules above it are flagged")
+    args = parser.parse_args()
+
+    # Packages every interpreter imports at startup are not attributed to modules
+    startup_packages = set(measure_import("")['packages'])
+
+    print(f"{'module':<32} {'import (s)':>10}  heavy frameworks")
+    over_budget = []
+    for module in args.modules:
+        result = measure_import(module)
+        if result['seconds'] is None:
+            print(f"{module:<32} {'failed':>10}  {result['error'] or ''}")
+            continue
+
+        heavy = [name for name in HEAVY_MODULES if name in result['loaded']]
+        flag = " *" if result['seconds'] > args.budget else ""
+        print(f"{module:<32} {result['seconds']:>10.3f}  {', '.join(heavy) or '-'}{flag}")
+        if flag:
+            over_budget.append(module)
+
+        heaviest = sorted(
+            ((name, seconds) for name, seconds in result['packages'].items()
+             if name != module.split(".")[0] and name not in startup_packages),
+            key=lambda item: item[1], reverse=True
+        )[:args.top]
+        for name, seconds in heaviest:
+            print(f"    {name:<28} {seconds:>10.3f}")
+
+    if over_budget:
+        print(f"\n* over the {args.budget:.1f}s budget: {', '.join(over_budget)}")
+
+if __name__ == "__main__":
+    main()
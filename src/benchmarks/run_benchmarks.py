@@ -0,0 +1,213 @@
+"""Offline throughput benchmarks for the extraction and matching components.
+
+This script generates deterministic synthetic conversations and times each
+component on them individually:
+
+    ner        BiomedicalNER.extract_entities_from_conversation
+    medicine   MedicineExtractor.extract_medicines_from_conversation
+    symptom    SymptomExtractor.extract_symptoms_from_conversation
+    matcher    FAERSMatcher.detect_adverse_events (on the mentioned drugs and symptoms)
+    predictor  AdverseEventPredictor.analyze_conversation
+
+It reports conversations/sec, sentences/sec, the peak Python memory allocated
+during a run and the process's maximum resident set size. By default it uses
+a tiny random stub model and a synthetic drug-reaction mapping, so it runs
+offline; pass --model and --mapping to benchmark the real ones.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add parent directory to path to import from other modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import SyntheticConversationGenerator, synthetic_merged_data
+from benchmarks.stub_model import create_stub_model
+
+COMPONENTS = ["ner", "medicine", "symptom", "matcher", "predictor"]
+
+def max_rss_mb():
+    """Maximum resident set size of this process so far, in MB."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return usage / 1024 / 1024 if sys.platform == "darwin" else usage / 1024
+
+def time_component(run, conversations, repeats=1, measure_memory=True):
+    """Time a component over the conversations.
+
+    Args:
+        run: Function taking a conversation dictionary
+        conversations: List of conversations from SyntheticConversationGenerator
+        repeats: Number of timed passes over the conversations
+        measure_memory: Also run a pass under tracemalloc to measure peak memory
+
+    Returns:
+        Dictionary with seconds, conversations/sec, sentences/sec, peak Python
+        memory in MB (None if not measured) and max RSS in MB
+    """
+    sentences = sum(conversation['sentences'] for conversation in conversations)
+
+    # Silence the per-call logging so it does not distort the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Warm-up (lazy initialization, first-call allocations)
+        run(conversations[0])
+
+        gc.collect()
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            for conversation in conversations:
+                run(conversation)
+        elapsed = time.perf_counter() - start_time
+
+        peak_mb = None
+        if measure_memory:
+            # Separate pass, since tracing allocations slows everything down
+            tracemalloc.start()
+            for conversation in conversations:
+                run(conversation)
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            tracemalloc.stop()
+
+    return {
+        'seconds': elapsed,
+        'conversations_per_sec': len(conversations) * repeats / elapsed if elapsed > 0 else float('inf'),
+        'sentences_per_sec': sentences * repeats / elapsed if elapsed > 0 else float('inf'),
+        'peak_python_mb': peak_mb,
+        'max_rss_mb': max_rss_mb()
+    }
+
+def build_components(names, model_name, mapping_file):
+    """Create the components to benchmark, sharing instances where possible.
+
+    Args:
+        names: Component names to create
+        model_name: NER model name or local directory
+        mapping_file: Path to the drug-reaction mapping CSV
+
+    Returns:
+        Dictionary of component name -> function taking a conversation
+    """
+    from extraction.biomedical_ner import BiomedicalNER
+    from extraction.medicine_extractor import MedicineExtractor
+    from extraction.symptom_extractor import SymptomExtractor
+    from matching.faers_matcher import FAERSMatcher
+    from model.predicty import AdverseEventPredictor
+
+    runners = {}
+    needs_medicine = "medicine" in names or "predictor" in names
+    needs_symptom = "symptom" in names or "predictor" in names
+    needs_matcher = "matcher" in names or "predictor" in names
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ner = BiomedicalNER(model_name=model_name) if "ner" in names else None
+        medicine_extractor = MedicineExtractor(model_name=model_name) if needs_medicine else None
+        symptom_extractor = SymptomExtractor(model_name=model_name) if needs_symptom else None
+        matcher = FAERSMatcher(mapping_file) if needs_matcher else None
+        predictor = None
+        if "predictor" in names:
+            predictor = AdverseEventPredictor(
+                medicine_extractor=medicine_extractor,
+                symptom_extractor=symptom_extractor,
+                faers_matcher=matcher
+            )
+
+    if ner is not None:
+        runners["ner"] = lambda conversation: ner.extract_entities_from_conversation(conversation['text'])
+    if "medicine" in names:
+        runners["medicine"] = lambda conversation: \
+            medicine_extractor.extract_medicines_from_conversation(conversation['text'])
+    if "symptom" in names:
+        runners["symptom"] = lambda conversation: \
+            symptom_extractor.extract_symptoms_from_conversation(conversation['text'])
+    if "matcher" in names:
+        runners["matcher"] = lambda conversation: \
+            matcher.detect_adverse_events(conversation['drugs'], conversation['symptoms'])
+    if predictor is not None:
+        runners["predictor"] = lambda conversation: predictor.analyze_conversation(conversation['text'])
+
+    return runners
+
+def main():
+    """Run the benchmarks and print a summary table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--components", nargs="*", default=COMPONENTS, choices=COMPONENTS,
+                        help="Components to benchmark (default: all)")
+    parser.add_argument("--conversations", type=int, default=20, help="Number of conversations")
+    parser.add_argument("--turns", type=int, default=12, help="Speaker turns per conversation")
+    parser.add_argument("--drug-density", type=float, default=0.3,
+                        help="Probability that a sentence mentions a drug")
+    parser.add_argument("--symptom-density", type=float, default=0.3,
+                        help="Probability that a sentence mentions a symptom")
+    parser.add_argument("--negation-rate", type=float, default=0.2,
+                        help="Probability that a symptom mention is negated")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generator")
+    parser.add_argument("--repeats", type=int, default=1, help="Timed passes over the conversations")
+    parser.add_argument("--model", default=None,
+                        help="NER model name or directory (default: a tiny local stub model)")
+    parser.add_argument("--mapping", default=None,
+                        help="drug_reaction_mapping.csv to match against (default: a synthetic mapping)")
+    parser.add_argument("--cache", action="store_true",
+                        help="Keep the NER sentence cache enabled (disabled by default so every "
+                             "sentence reaches the model)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory pass")
+    args = parser.parse_args()
+
+    if not args.cache:
+        os.environ["NER_CACHE_SIZE"] = "0"
+
+    generator = SyntheticConversationGenerator(seed=args.seed)
+    conversations = generator.conversations(
+        args.conversations,
+        turns=args.turns,
+        drug_density=args.drug_density,
+        symptom_density=args.symptom_density,
+        negation_rate=args.negation_rate
+    )
+    sentences = sum(conversation['sentences'] for conversation in conversations)
+    print(f"Generated {len(conversations)} conversations with {sentences} sentences (seed {args.seed})")
+
+    with tempfile.TemporaryDirectory(prefix="aed-benchmark-") as work_dir:
+        model_name = args.model
+        if model_name is None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                model_name = str(create_stub_model(Path(work_dir) / "stub_model", words=generator.vocabulary()))
+            print("Using the tiny stub NER model")
+
+        mapping_file = args.mapping
+        if mapping_file is None:
+            from data_processing.preprocess import create_drug_reaction_mapping, compute_disproportionality
+            from matching.mapping_store import write_columnar_mapping
+            with contextlib.redirect_stdout(io.StringIO()):
+                merged_data = synthetic_merged_data(seed=args.seed)
+                mapping = create_drug_reaction_mapping(merged_data)
+                signals = compute_disproportionality(merged_data)
+            mapping_file = Path(work_dir) / "drug_reaction_mapping.csv"
+            mapping.to_csv(mapping_file, index=False)
+            write_columnar_mapping(mapping, Path(work_dir) / "drug_reaction_mapping", signals=signals)
+            print(f"Using a synthetic drug-reaction mapping with {len(mapping)} drugs")
+
+        runners = build_components(args.components, model_name, mapping_file)
+
+        print(f"\n{'component':<10} {'conv/sec':>10} {'sent/sec':>10} {'peak py MB':>11} {'max RSS MB':>11}")
+        for name in args.components:
+            try:
+                result = time_component(runners[name], conversations, repeats=args.repeats,
+                                        measure_memory=not args.no_memory)
+            except Exception as e:
+                print(f"{name:<10} failed: {e}")
+                continue
+            peak = f"{result['peak_python_mb']:.1f}" if result['peak_python_mb'] is not None else "-"
+            print(f"{name:<10} {result['conversations_per_sec']:>10.2f} {result['sentences_per_sec']:>10.1f} "
+                  f"{peak:>11} {result['max_rss_mb']:>11.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Stub NER Model Module.
+
+This module creates a tiny, randomly initialized BERT token classification
+model with the same label set as the biomedical NER model. Its predictions are
+meaningless, but it exercises the full tokenization, inference and
+post-processing path, so the benchmarks run offline and quickly without
+downloading BioBERT.
+"""
+
+import string
+from pathlib import Path
+
+STUB_LABELS = ["O", "B-DRUG", "I-DRUG", "B-SYMPTOM", "I-SYMPTOM", "B-DISEASE", "I-DISEASE"]
+
+def create_stub_model(output_dir, words=(), hidden_size=32, num_layers=2, seed=0):
+    """Create and save a tiny random BERT NER model.
+
+    Args:
+        output_dir: Directory to save the model and tokenizer to
+        words: Whole words to add to the WordPiece vocabulary (other words are
+               split into characters)
+        hidden_size: Hidden size of the model
+        num_layers: Number of transformer layers
+        seed: Random seed for the weights
+
+    Returns:
+        Path of the saved model directory
+    """
+    import torch
+    from transformers import BertConfig, BertForTokenClassification, BertTokenizerFast
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    vocab += list(string.ascii_lowercase) + ["##" + char for char in string.ascii_lowercase]
+    vocab += list(string.digits) + ["##" + digit for digit in string.digits] + list(string.punctuation)
+    vocab += [word.lower() for word in words]
+    vocab_path = output_dir / "vocab.txt"
+    vocab_path.write_text("\n".join(dict.fromkeys(vocab)))
+
+    tokenizer = BertTokenizerFast(str(vocab_path), do_lower_case=True)
+    config = BertConfig(
+        vocab_size=len(tokenizer),
+        hidden_size=hidden_size,
+        num_hidden_layers=num_layers,
+        num_attention_heads=2,
+        intermediate_size=hidden_size * 2,
+        max_position_embeddings=512,
+        num_labels=len(STUB_LABELS),
+        id2label=dict(enumerate(STUB_LABELS)),
+        label2id={label: index for index, label in enumerate(STUB_LABELS)}
+    )
+
+    torch.manual_seed(seed)
+    model = BertForTokenClassification(config)
+    model.save_pretrained(str(output_dir))
+    tokenizer.save_pretrained(str(output_dir))
+    return output_dir
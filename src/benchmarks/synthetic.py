@@ -0,0 +1,205 @@
+"""Synthetic Conversation Generator Module.
+
+This module generates deterministic patient-doctor conversations for
+benchmarking. Conversation length, how often drugs and symptoms are mentioned
+and how often symptoms are negated are configurable, and the same seed always
+produces the same conversations. A matching synthetic drug-reaction mapping
+can be generated so FAERSMatcher runs without the FAERS data.
+"""
+
+import random
+
+DRUGS = [
+    "lisinopril", "metformin", "atorvastatin", "losartan", "amlodipine",
+    "metoprolol", "omeprazole", "albuterol", "gabapentin", "hydrochlorothiazide",
+    "levothyroxine", "simvastatin", "montelukast", "sertraline", "fluoxetine",
+    "aspirin", "ibuprofen", "prednisone", "warfarin", "furosemide"
+]
+
+SYMPTOMS = [
+    "headache", "dizziness", "nausea", "fatigue", "dry cough", "fever", "rash",
+    "vomiting", "diarrhea", "shortness of breath", "chest pain", "swelling",
+    "insomnia", "anxiety", "muscle pain", "itching", "constipation", "palpitations"
+]
+
+DRUG_TEMPLATES = [
+    "I've been taking {drug} {dose} mg {frequency} for a few weeks now.",
+    "The doctor started me on {drug} last month.",
+    "I'm also on {drug} {dose}mg {frequency}.",
+    "We could switch you to {drug} instead.",
+    "Are you still taking the {drug}?",
+    "I stopped the {drug} two days ago."
+]
+
+SYMPTOM_TEMPLATES = [
+    "I've had {symptom} since I started it.",
+    "I'm experiencing some {symptom}, especially in the morning.",
+    "The {symptom} gets worse at night.",
+    "I noticed {symptom} after the last dose.",
+    "Do you have any {symptom}?"
+]
+
+NEGATED_SYMPTOM_TEMPLATES = [
+    "I don't have any {symptom}.",
+    "No {symptom} so far.",
+    "He denies {symptom}.",
+    "There is no sign of {symptom}."
+]
+
+FILLER_SENTENCES = [
+    "How have you been feeling since our last visit?",
+    "Thank you for coming in today.",
+    "Let's go over your medications.",
+    "I'll check your blood pressure now.",
+    "That sounds good to me.",
+    "We'll follow up in two weeks.",
+    "Okay, I understand.",
+    "Can you tell me more about that?",
+    "It has been a busy month at work.",
+    "I've been sleeping about six hours a night."
+]
+
+FREQUENCIES = ["once daily", "twice daily", "every morning", "at bedtime", "as needed"]
+DOSES = ["5", "10", "20", "25", "50", "100", "250", "500"]
+SEVERITIES = ["Critical", "Near-Critical", "Needs Attention", "Unknown"]
+
+class SyntheticConversationGenerator:
+    """Deterministic generator of patient-doctor conversations."""
+
+    def __init__(self, seed=0, drugs=DRUGS, symptoms=SYMPTOMS):
+        """Initialize the generator.
+
+        Args:
+            seed: Random seed (the same seed always yields the same conversations)
+            drugs: Drug names to mention
+            symptoms: Symptoms to mention
+        """
+        self.seed = seed
+        self.drugs = list(drugs)
+        self.symptoms = list(symptoms)
+        self.random = random.Random(seed)
+
+    def sentence(self, drug_density=0.3, symptom_density=0.3, negation_rate=0.2):
+        """Generate one sentence.
+
+        Args:
+            drug_density: Probability that the sentence mentions a drug
+            symptom_density: Probability that the sentence mentions a symptom
+            negation_rate: Probability that a symptom mention is negated
+
+        Returns:
+            Tuple of (sentence, drug or None, symptom or None, negated)
+        """
+        roll = self.random.random()
+        if roll < drug_density:
+            drug = self.random.choice(self.drugs)
+            template = self.random.choice(DRUG_TEMPLATES)
+            text = template.format(
+                drug=drug.capitalize() if self.random.random() < 0.5 else drug,
+                dose=self.random.choice(DOSES),
+                frequency=self.random.choice(FREQUENCIES)
+            )
+            return text, drug, None, False
+
+        if roll < drug_density + symptom_density:
+            symptom = self.random.choice(self.symptoms)
+            negated = self.random.random() < negation_rate
+            template = self.random.choice(NEGATED_SYMPTOM_TEMPLATES if negated else SYMPTOM_TEMPLATES)
+            return template.format(symptom=symptom), None, symptom, negated
+
+        return self.random.choice(FILLER_SENTENCES), None, None, False
+
+    def conversation(self, turns=10, sentences_per_turn=(1, 3), drug_density=0.3, symptom_density=0.3,
+                     negation_rate=0.2):
+        """Generate one conversation.
+
+        Args:
+            turns: Number of speaker turns (alternating Doctor and Patient)
+            sentences_per_turn: (min, max) number of sentences per turn
+            drug_density: Probability that a sentence mentions a drug
+            symptom_density: Probability that a sentence mentions a symptom
+            negation_rate: Probability that a symptom mention is negated
+
+        Returns:
+            Dictionary with the conversation 'text', the number of 'sentences'
+            and the mentioned 'drugs', 'symptoms' and 'negated_symptoms'
+        """
+        lines = []
+        sentence_count = 0
+        drugs, symptoms, negated_symptoms = [], [], []
+
+        for turn in range(turns):
+            speaker = "Doctor" if turn % 2 == 0 else "Patient"
+            sentences = []
+            for _ in range(self.random.randint(*sentences_per_turn)):
+                text, drug, symptom, negated = self.sentence(drug_density, symptom_density, negation_rate)
+                sentences.append(text)
+                if drug:
+                    drugs.append(drug)
+                if symptom:
+                    (negated_symptoms if negated else symptoms).append(symptom)
+            sentence_count += len(sentences)
+            lines.append(f"{speaker}: {' '.join(sentences)}")
+
+        return {
+            'text': "\n".join(lines),
+            'sentences': sentence_count,
+            'drugs': sorted(set(drugs)),
+            'symptoms': sorted(set(symptoms)),
+            'negated_symptoms': sorted(set(negated_symptoms))
+        }
+
+    def conversations(self, count, **options):
+        """Generate several conversations.
+
+        Args:
+            count: Number of conversations
+            **options: Options passed to conversation()
+
+        Returns:
+            List of conversation dictionaries
+        """
+        return [self.conversation(**options) for _ in range(count)]
+
+    def vocabulary(self):
+        """Return every word the generated conversations can contain."""
+        texts = (DRUG_TEMPLATES + SYMPTOM_TEMPLATES + NEGATED_SYMPTOM_TEMPLATES + FILLER_SENTENCES
+                 + FREQUENCIES + self.drugs + self.symptoms + ["Doctor", "Patient"])
+        words = set()
+        for text in texts:
+            for word in text.replace("{", " ").replace("}", " ").split():
+                words.add(word.strip(".,?!:").lower())
+        return sorted(word for word in words if word)
+
+def synthetic_merged_data(drugs=DRUGS, symptoms=SYMPTOMS, reactions_per_drug=8, max_reports=5, seed=0):
+    """Generate FAERS-style merged records linking the drugs to symptoms.
+
+    Each drug-reaction pair is reported in between 1 and max_reports reports,
+    so disproportionality statistics can be computed from the records.
+
+    Args:
+        drugs: Drug names
+        symptoms: Reaction terms
+        reactions_per_drug: Number of reactions reported for each drug
+        max_reports: Maximum number of reports per drug-reaction pair
+        seed: Random seed
+
+    Returns:
+        pandas DataFrame with primaryid, caseid, drugname, pt and severity columns
+    """
+    import pandas as pd
+
+    generator = random.Random(seed)
+    records = []
+    for drug in drugs:
+        for reaction in generator.sample(list(symptoms), min(reactions_per_drug, len(symptoms))):
+            for _ in range(generator.randint(1, max_reports)):
+                report_id = len(records) + 1
+                records.append({
+                    'primaryid': report_id,
+                    'caseid': report_id,
+                    'drugname': drug,
+                    'pt': reaction,
+                    'severity': generator.choice(SEVERITIES)
+                })
+    return pd.DataFrame(records)
@@ -8,6 +8,14 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import re
+import sys
+
+# Add parent directory to path to import from other modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from matching.mapping_store import ColumnarDrugMapping, write_columnar_mapping, SIGNALS_FILE_NAME
+from matching.sqlite_store import write_sqlite_mapping
+from matching.drug_synonyms import ingredient_key, load_drug_synonyms
 
 # Define paths
 PROCESSED_DATA_DIR = Path("data/processed")
@@ -19,6 +27,12 @@ SEVERITY_CATEGORIES = {
     'Needs Attention': ['OT']  # Other Serious Events
 }
 
+# Severity categories from least to most severe, used to pick the highest
+SEVERITY_RANKING = ['Unknown', 'Needs Attention', 'Near-Critical', 'Critical']
+
+# z value of the 95% confidence intervals of PRR and ROR
+CONFIDENCE_Z = 1.96
+
 def load_extracted_data():
     """Load the extracted FAERS data.
     
@@ -96,6 +110,32 @@ def clean_reaction_terms(reaction_data):
     print(f"Cleaned {len(cleaned_data)} reaction records")
     return cleaned_data
 
+def canonicalize_drug_names(merged_data, synonyms):
+    """Replace drug names with their ingredient keys.
+    
+    Brand names, dose strengths and dosage forms are collapsed so every
+    variant of an ingredient maps to one drug (see matching.drug_synonyms).
+    
+    Args:
+        merged_data: DataFrame with cleaned drug names
+        synonyms: Dictionary of synonym -> ingredient key from load_drug_synonyms
+        
+    Returns:
+        DataFrame with canonical drug names
+    """
+    print("Canonicalizing drug names to ingredient keys...")
+    
+    # Make a copy to avoid modifying the original
+    canonical_data = merged_data.copy()
+    
+    # Each distinct name is canonicalized once
+    names = canonical_data['drugname'].dropna().unique()
+    keys = {name: ingredient_key(str(name), synonyms) for name in names}
+    canonical_data['drugname'] = canonical_data['drugname'].map(keys)
+    
+    print(f"Collapsed {len(names)} drug names into {len(set(keys.values()))} ingredient keys")
+    return canonical_data
+
 def categorize_severity(outcome_data):
     """Categorize outcomes by severity level.
     
@@ -164,6 +204,24 @@ def merge_datasets(drug_data, reaction_data, outcome_data):
     print(f"Created merged dataset with {len(merged_data)} records")
     return merged_data
 
+def get_highest_severity(severities):
+    """Get the most severe category among a collection of severities.
+    
+    Args:
+        severities: Collection of severity categories
+        
+    Returns:
+        Highest severity category, or 'Unknown'
+    """
+    if 'Critical' in severities:
+        return 'Critical'
+    elif 'Near-Critical' in severities:
+        return 'Near-Critical'
+    elif 'Needs Attention' in severities:
+        return 'Needs Attention'
+    else:
+        return 'Unknown'
+
 def create_drug_reaction_mapping(merged_data):
     """Create a mapping of drugs to their associated reactions and severities.
     
@@ -188,21 +246,79 @@ def create_drug_reaction_mapping(merged_data):
     }, inplace=True)
     
     # Add highest severity column
-    def get_highest_severity(severities):
-        if 'Critical' in severities:
-            return 'Critical'
-        elif 'Near-Critical' in severities:
-            return 'Near-Critical'
-        elif 'Needs Attention' in severities:
-            return 'Needs Attention'
-        else:
-            return 'Unknown'
-    
     drug_mapping['highest_severity'] = drug_mapping['severities'].apply(get_highest_severity)
     
     print(f"Created drug-reaction mapping with {len(drug_mapping)} unique drugs")
     return drug_mapping
 
+def compute_disproportionality(merged_data):
+    """Compute report counts and disproportionality statistics per drug-reaction pair.
+    
+    The reports of each pair are compared with all other reports in a 2x2 table:
+    
+                        reaction    other reactions
+        drug               a              b
+        other drugs        c              d
+    
+    PRR = (a / (a + b)) / (c / (c + d)) and ROR = (a * d) / (b * c), with 95%
+    confidence intervals from the standard errors of their logarithms. A report
+    is a distinct primaryid (each merged record when there is no primaryid).
+    When a cell is zero, 0.5 is added to all four cells (Haldane correction) so
+    the statistics stay finite.
+    
+    Args:
+        merged_data: DataFrame with merged drug, reaction, and outcome data
+        
+    Returns:
+        DataFrame with drugname, pt, reports, prr, prr_lower, prr_upper, ror,
+        ror_lower, ror_upper and highest_severity per drug-reaction pair
+    """
+    print("Computing disproportionality statistics...")
+    
+    reports = pd.DataFrame({
+        'drugname': merged_data['drugname'],
+        'pt': merged_data['pt'],
+        'report': merged_data['primaryid'] if 'primaryid' in merged_data.columns else np.arange(len(merged_data)),
+        'severity_rank': merged_data['severity'].map(
+            {category: rank for rank, category in enumerate(SEVERITY_RANKING)}
+        ).fillna(0) if 'severity' in merged_data.columns else 0
+    }).dropna(subset=['drugname', 'pt', 'report'])
+    
+    # Report counts of every pair, drug and reaction, and of the whole dataset
+    total_reports = reports['report'].nunique()
+    signals = reports.groupby(['drugname', 'pt']).agg(
+        reports=('report', 'nunique'),
+        severity_rank=('severity_rank', 'max')
+    ).reset_index()
+    drug_reports = reports.groupby('drugname')['report'].nunique()
+    reaction_reports = reports.groupby('pt')['report'].nunique()
+    
+    a = signals['reports'].to_numpy(dtype=np.float64)
+    b = signals['drugname'].map(drug_reports).to_numpy(dtype=np.float64) - a
+    c = signals['pt'].map(reaction_reports).to_numpy(dtype=np.float64) - a
+    d = total_reports - a - b - c
+    
+    # Haldane correction for tables with an empty cell
+    correction = np.where((a == 0) | (b == 0) | (c == 0) | (d == 0), 0.5, 0.0)
+    a, b, c, d = a + correction, b + correction, c + correction, d + correction
+    
+    prr = (a / (a + b)) / (c / (c + d))
+    prr_se = np.sqrt(np.maximum(1 / a - 1 / (a + b) + 1 / c - 1 / (c + d), 0))
+    ror = (a * d) / (b * c)
+    ror_se = np.sqrt(1 / a + 1 / b + 1 / c + 1 / d)
+    
+    signals['prr'] = prr
+    signals['prr_lower'] = np.exp(np.log(prr) - CONFIDENCE_Z * prr_se)
+    signals['prr_upper'] = np.exp(np.log(prr) + CONFIDENCE_Z * prr_se)
+    signals['ror'] = ror
+    signals['ror_lower'] = np.exp(np.log(ror) - CONFIDENCE_Z * ror_se)
+    signals['ror_upper'] = np.exp(np.log(ror) + CONFIDENCE_Z * ror_se)
+    signals['highest_severity'] = np.asarray(SEVERITY_RANKING)[signals['severity_rank'].to_numpy(dtype=np.int64)]
+    signals = signals.drop(columns=['severity_rank'])
+    
+    print(f"Computed statistics for {len(signals)} drug-reaction pairs from {total_reports} reports")
+    return signals
+
 def main():
     """Main function to preprocess FAERS data."""
     # Load extracted data
@@ -221,16 +337,30 @@ def main():
     # Merge datasets
     merged_data = merge_datasets(cleaned_drug_data, cleaned_reaction_data, categorized_outcome_data)
     
+    # Collapse drug name variants into ingredients for matching
+    canonical_data = canonicalize_drug_names(merged_data, load_drug_synonyms())
+    
     # Create drug-reaction mapping
-    drug_reaction_mapping = create_drug_reaction_mapping(merged_data)
+    drug_reaction_mapping = create_drug_reaction_mapping(canonical_data)
+    
+    # Compute signal strength per drug-reaction pair
+    drug_reaction_signals = compute_disproportionality(canonical_data)
     
     # Save preprocessed data
     merged_data.to_csv(PROCESSED_DATA_DIR / "merged_data.csv", index=False)
     drug_reaction_mapping.to_csv(PROCESSED_DATA_DIR / "drug_reaction_mapping.csv", index=False)
+    drug_reaction_signals.to_csv(PROCESSED_DATA_DIR / SIGNALS_FILE_NAME, index=False)
+    write_columnar_mapping(drug_reaction_mapping, PROCESSED_DATA_DIR / "drug_reaction_mapping",
+                           signals=drug_reaction_signals)
+    write_sqlite_mapping(ColumnarDrugMapping.load(PROCESSED_DATA_DIR / "drug_reaction_mapping"),
+                         PROCESSED_DATA_DIR / "drug_reaction_mapping.db")
     
     print("Data preprocessing completed.")
     print(f"Saved merged data to {PROCESSED_DATA_DIR / 'merged_data.csv'}")
     print(f"Saved drug-reaction mapping to {PROCESSED_DATA_DIR / 'drug_reaction_mapping.csv'}")
+    print(f"Saved disproportionality statistics to {PROCESSED_DATA_DIR / SIGNALS_FILE_NAME}")
+    print(f"Saved columnar drug-reaction mapping to {PROCESSED_DATA_DIR / 'drug_reaction_mapping'}")
+    print(f"Saved SQLite drug-reaction store to {PROCESSED_DATA_DIR / 'drug_reaction_mapping.db'}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,40 +5,101 @@ specialized pre-trained models. It supports extraction of medical entities
 such as drugs, diseases, and symptoms with higher accuracy.
 """
 
-import torch
-from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
 import re
-import numpy as np
+import sys
+from pathlib import Path
+
+try:
+    from .ner_backends import create_backend, backend_env_default, quantize_env_default
+    from .text_normalizer import CLINICAL_NORMALIZER
+    from .negation import NegationDetector
+    from .ner_cache import NERCache
+    from .ner_pool import shared_pool, pool_env_default
+    from .segmenter import TokenBudgetSegmenter, reconcile_overlaps, DEFAULT_MAX_TOKENS
+except ImportError:
+    # Run as a script (python src/extraction/biomedical_ner.py)
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+    from extraction.ner_backends import create_backend, backend_env_default, quantize_env_default
+    from extraction.text_normalizer import CLINICAL_NORMALIZER
+    from extraction.negation import NegationDetector
+    from extraction.ner_cache import NERCache
+    from extraction.ner_pool import shared_pool, pool_env_default
+    from extraction.segmenter import TokenBudgetSegmenter, reconcile_overlaps, DEFAULT_MAX_TOKENS
 
 class BiomedicalNER:
     """Class for biomedical named entity recognition using specialized models."""
     
-    def __init__(self, model_name="alvaroalon2/biobert_genetic_ner"):
+    def __init__(self, model_name="alvaroalon2/biobert_genetic_ner", quantize=None, backend=None,
+                 cache=None, max_segment_tokens=DEFAULT_MAX_TOKENS, pool_workers=None, **backend_options):
         """Initialize the biomedical NER with a specialized biomedical language model.
         
         Args:
             model_name: The name of the pre-trained model to use
                        Default is BioBERT which is fine-tuned for biomedical NER
+            quantize: Run dynamic int8 quantization of the linear layers for
+                      faster CPU inference. Default is None, which reads the
+                      NER_QUANTIZE environment variable
+            backend: Inference backend, "transformers", "onnx" (expects
+                     model_name to be a local model directory with an exported
+                     model.onnx) or "light" (the perceptron tagger from
+                     light_ner.py). Default is None, which reads the
+                     NER_BACKEND environment variable
+            cache: NERCache for sentence-level results, or False to disable
+                   caching. Default is None, which configures the cache from
+                   the NER_CACHE_* environment variables
+            max_segment_tokens: Token budget per model input when processing
+                                conversations (short sentences are packed up
+                                to it, longer ones split into overlapping windows)
+            pool_workers: Number of forked worker processes that run model
+                          inference with micro-batching (0 runs it in this
+                          process). Default is None, which reads the
+                          NER_POOL_WORKERS environment variable
+            **backend_options: Extra options passed to the backend
+                              (e.g. intra_op_threads for onnx)
         """
-        print(f"Initializing BiomedicalNER with model: {model_name}")
+        if quantize is None:
+            quantize = quantize_env_default()
+        if backend is None:
+            backend = backend_env_default()
+        if pool_workers is None:
+            pool_workers = pool_env_default()
+        self.model_name = model_name
+        self.quantized = bool(quantize)
+        
+        # Compiled single-pass normalizer (keeps offsets back to the input text)
+        self.normalizer = CLINICAL_NORMALIZER
+        
+        # NegEx-style negation detector with triggers compiled once
+        self.negation_detector = NegationDetector()
+        
+        print(f"Initializing BiomedicalNER with model: {model_name} (backend: {backend}"
+              + (", int8 quantized)" if self.quantized else ")"))
         try:
-            # Load tokenizer and model
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForTokenClassification.from_pretrained(model_name)
+            # Create the inference backend; it returns pipeline-style aggregated entities
+            self.ner_pipeline = create_backend(backend, model_name, quantize=self.quantized, **backend_options)
+            self.backend = self.ner_pipeline.name
+            self.quantized = self.ner_pipeline.quantized
             
-            # Set device
-            self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-            self.model.to(self.device)
-            print(f"Device set to use {self.device}")
+            # Expose the underlying components for callers that use them directly
+            self.tokenizer = self.ner_pipeline.tokenizer
+            self.model = getattr(self.ner_pipeline, 'model', None)
+            self.device = self.ner_pipeline.device
             
-            # Create NER pipeline with the biomedical model
-            self.ner_pipeline = pipeline(
-                "ner",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=0 if torch.cuda.is_available() else -1,
-                aggregation_strategy="simple"  # Merge tokens with same entity
-            )
+            # Sentence-level result cache keyed by model identity and normalized text
+            self.model_identity = self.ner_pipeline.identity
+            self.cache = NERCache.from_env() if cache is None else (cache or None)
+            
+            # Conversations are split into sentences (long ones into windows) that
+            # are cached individually; sentences missing from the cache are
+            # packed to fill, but never exceed, the model's input size
+            self.max_segment_tokens = max_segment_tokens
+            self.segmenter = TokenBudgetSegmenter(self.count_tokens, max_tokens=max_segment_tokens,
+                                                  pack_sentences=False)
+            
+            # Optional worker pool sharing this model (forked once the model is loaded)
+            self.pool = None
+            if pool_workers > 0:
+                self.pool = shared_pool(self, pool_workers)
             
             # Define common drug names and symptoms for better recognition
             self.common_drugs = [
@@ -66,42 +127,8 @@ class BiomedicalNER:
         Returns:
             Preprocessed text
         """
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Replace common medical abbreviations
-        medical_abbreviations = {
-            'mg': ' milligrams ',
-            'ml': ' milliliters ',
-            'g': ' grams ',
-            'mcg': ' micrograms ',
-            'tabs': ' tablets ',
-            'tab': ' tablet ',
-            'caps': ' capsules ',
-            'cap': ' capsule ',
-            'inj': ' injection ',
-            'soln': ' solution ',
-            'susp': ' suspension ',
-            'sr': ' sustained release ',
-            'xr': ' extended release ',
-            'prn': ' as needed ',
-            'bid': ' twice daily ',
-            'tid': ' three times daily ',
-            'qid': ' four times daily ',
-            'qd': ' once daily ',
-            'po': ' by mouth ',
-            'iv': ' intravenous ',
-            'im': ' intramuscular ',
-            'sc': ' subcutaneous '
-        }
-        
-        for abbr, full in medical_abbreviations.items():
-            text = re.sub(r'\b' + abbr + r'\b', full, text)
-        
-        return text
+        # Lowercase, collapse whitespace and expand medical abbreviations in one pass
+        return self.normalizer(text)
     
     def extract_entities(self, text, entity_type=None):
         """Extract biomedical entities from the given text.
@@ -112,67 +139,252 @@ class BiomedicalNER:
                         (e.g., 'DRUG', 'SYMPTOM', 'DISEASE')
             
         Returns:
-            List of extracted entities with their types
+            List of extracted entities with their types, scores and
+            character spans ('start', 'end') in the input text
+        """
+        entities = self.extract_entities_batch([text], entity_type)[0]
+        print(f"Extracted {len(entities)} biomedical entities from text")
+        return entities
+    
+    def extract_entities_batch(self, texts, entity_type=None, pack=False):
+        """Extract biomedical entities from several texts in one model call.
+        
+        Args:
+            texts: List of input texts
+            entity_type: Optional filter for specific entity types
+            pack: Pack the texts missing from the cache into model inputs of up
+                  to max_segment_tokens (for sentences of a conversation).
+                  Results are still cached per text. Default is False
+            
+        Returns:
+            List with the entities of each text, as returned by extract_entities
         """
         try:
-            # Preprocess the text
-            preprocessed_text = self.preprocess_text(text)
+            # Preprocess the texts, keeping the offset maps back to the inputs
+            normalized_texts = [self.normalizer.normalize(text) for text in texts]
+            results = [None] * len(texts)
             
-            # Extract entities using the NER pipeline
-            entities = self.ner_pipeline(preprocessed_text)
+            # Repeated sentences are served from the cache without running the model
+            if self.cache is not None:
+                for index, normalized in enumerate(normalized_texts):
+                    results[index] = self.cache.get(self.model_identity, normalized.text)
             
-            # Process and filter entities
-            processed_entities = []
-            for entity in entities:
-                # The pipeline output format might vary, so handle different possible structures
-                if 'entity_group' in entity:
-                    entity_label = entity['entity_group'].split('-')[-1] if '-' in entity['entity_group'] else entity['entity_group']
-                    entity_text = entity['word']
-                    entity_score = entity['score']
-                elif 'entity' in entity:
-                    entity_label = entity['entity'].split('-')[-1] if '-' in entity['entity'] else entity['entity']
-                    entity_text = entity['word']
-                    entity_score = entity['score']
-                else:
-                    # Skip entities with unexpected format
-                    continue
+            # Run the remaining texts through the model as a single batch
+            # (each distinct text once)
+            pending = [index for index, entities in enumerate(results) if entities is None]
+            if pending:
+                pending_texts = list(dict.fromkeys(normalized_texts[index].text for index in pending))
+                batch_entities = self._run_packed(pending_texts) if pack else self._run_model_batch(pending_texts)
+                entities_of = dict(zip(pending_texts, batch_entities))
+                if self.cache is not None:
+                    for text, entities in entities_of.items():
+                        self.cache.put(self.model_identity, text, entities)
+                for index in pending:
+                    # Copies, since spans are mapped per input text below
+                    results[index] = [dict(entity) for entity in entities_of[normalized_texts[index].text]]
+            
+            for index, normalized in enumerate(normalized_texts):
+                entities = results[index]
                 
                 # Filter by entity type if specified
-                if entity_type and entity_label != entity_type:
-                    continue
+                if entity_type:
+                    entities = [entity for entity in entities if entity['type'] == entity_type]
+                
+                # Map spans from the normalized text back to the input text
+                for entity in entities:
+                    if entity['start'] is not None and entity['end'] is not None:
+                        entity['start'], entity['end'] = normalized.to_original_span(entity['start'], entity['end'])
                 
-                processed_entities.append({
-                    'text': entity_text,
-                    'type': entity_label,
-                    'score': entity_score
-                })
+                results[index] = entities
             
-            # Group adjacent entities of the same type
-            grouped_entities = []
-            current_entity = None
+            return results
+        
+        except Exception as e:
+            print(f"Error extracting biomedical entities: {e}")
+            return [[] for _ in texts]
+    
+    def _run_model_batch(self, preprocessed_texts):
+        """Run the model on preprocessed texts, in the worker pool if there is one."""
+        if self.pool is not None:
+            try:
+                return self.pool.run_model(preprocessed_texts)
+            except RuntimeError:
+                if not self.pool.closed:
+                    raise
+                # The pool lost a worker: run inference in this process from now on
+                print("NER worker pool is closed, running the model in-process")
+                self.pool = None
+        return self._run_model(preprocessed_texts)
+    
+    def _run_packed(self, preprocessed_texts):
+        """Run the model on preprocessed texts packed into inputs of up to max_segment_tokens.
+        
+        Consecutive texts are joined with a space while they fit the budget,
+        and the entities of each input are split back to the texts they were
+        found in, with spans relative to those texts. A text is only appended
+        after one ending in sentence punctuation, so entities of neighbouring
+        texts are never merged and negation scopes end between them.
+        
+        Args:
+            preprocessed_texts: List of texts produced by the normalizer
             
-            for entity in processed_entities:
-                if current_entity is None:
-                    current_entity = entity.copy()
-                elif (entity['type'] == current_entity['type'] and 
-                      preprocessed_text.find(entity['text']) == 
-                      preprocessed_text.find(current_entity['text']) + len(current_entity['text']) + 1):
-                    # Merge adjacent entities of the same type
-                    current_entity['text'] += " " + entity['text']
-                    current_entity['score'] = (current_entity['score'] + entity['score']) / 2  # Average score
+        Returns:
+            List with the entities of each text, as returned by _run_model
+        """
+        # Each pack is a list of (text index, offset in the pack)
+        packs = []
+        pack_tokens = 0
+        for index, text in enumerate(preprocessed_texts):
+            tokens = self.ner_pipeline.count_tokens(text)
+            last_index, last_offset = packs[-1][-1] if packs else (None, 0)
+            if (packs and pack_tokens + tokens <= self.max_segment_tokens
+                    and preprocessed_texts[last_index].rstrip()[-1:] in (".", "!", "?")):
+                packs[-1].append((index, last_offset + len(preprocessed_texts[last_index]) + 1))
+                pack_tokens += tokens
+            else:
+                packs.append([(index, 0)])
+                pack_tokens = tokens
+        
+        pack_texts = [" ".join(preprocessed_texts[index] for index, _ in pack) for pack in packs]
+        results = [[] for _ in preprocessed_texts]
+        for pack, pack_entities in zip(packs, self._run_model_batch(pack_texts)):
+            for entity in pack_entities:
+                # Attribute the entity to the text it starts in
+                if entity['start'] is not None:
+                    index, offset = next(
+                        (index, offset) for index, offset in reversed(pack) if offset <= entity['start']
+                    )
+                    entity['start'] -= offset
+                    entity['end'] = min(entity['end'] - offset, len(preprocessed_texts[index]))
                 else:
-                    grouped_entities.append(current_entity)
-                    current_entity = entity.copy()
+                    index = next(
+                        (index for index, _ in pack if entity['text'].lower() in preprocessed_texts[index]),
+                        pack[0][0]
+                    )
+                results[index].append(entity)
+        return results
+    
+    def _run_model(self, preprocessed_texts):
+        """Run the NER model on preprocessed texts and group their entities.
+        
+        Args:
+            preprocessed_texts: List of texts produced by the normalizer
+            
+        Returns:
+            List with the entities of all types found in each text, with
+            spans in the preprocessed text
+        """
+        # Extract entities for the whole batch using the NER pipeline
+        batch_entities = self.ner_pipeline(list(preprocessed_texts))
+        return [
+            self._group_entities(preprocessed_text, entities)
+            for preprocessed_text, entities in zip(preprocessed_texts, batch_entities)
+        ]
+    
+    def _group_entities(self, preprocessed_text, entities):
+        """Convert pipeline entities to our format and merge adjacent ones.
+        
+        Args:
+            preprocessed_text: The text the pipeline was run on
+            entities: Pipeline output for that text
             
-            if current_entity:
+        Returns:
+            List of entities of all types, with spans in the preprocessed text
+        """
+        # Process entities
+        processed_entities = []
+        for entity in entities:
+            # The pipeline output format might vary, so handle different possible structures
+            if 'entity_group' in entity:
+                entity_label = entity['entity_group'].split('-')[-1] if '-' in entity['entity_group'] else entity['entity_group']
+                entity_text = entity['word']
+                entity_score = entity['score']
+            elif 'entity' in entity:
+                entity_label = entity['entity'].split('-')[-1] if '-' in entity['entity'] else entity['entity']
+                entity_text = entity['word']
+                entity_score = entity['score']
+            else:
+                # Skip entities with unexpected format
+                continue
+            
+            processed_entities.append({
+                'text': entity_text,
+                'type': entity_label,
+                'score': float(entity_score),
+                'start': entity.get('start'),
+                'end': entity.get('end')
+            })
+        
+        # Group adjacent entities of the same type in a single pass over the
+        # pipeline offsets (entities are returned in text order). Entities of
+        # another type in between are never whitespace, so grouping before
+        # filtering by type gives the same result as filtering first.
+        grouped_entities = []
+        current_entity = None
+        
+        for entity in processed_entities:
+            if current_entity is None:
+                current_entity = entity.copy()
+            elif (entity['type'] == current_entity['type'] and
+                  self._are_adjacent(preprocessed_text, current_entity, entity)):
+                # Merge adjacent entities of the same type
+                current_entity['text'] += " " + entity['text']
+                current_entity['score'] = (current_entity['score'] + entity['score']) / 2  # Average score
+                current_entity['end'] = entity['end']
+            else:
                 grouped_entities.append(current_entity)
+                current_entity = entity.copy()
+        
+        if current_entity:
+            grouped_entities.append(current_entity)
+        
+        return grouped_entities
+    
+    @staticmethod
+    def _are_adjacent(text, previous, entity):
+        """Check whether two entities are separated only by whitespace.
+        
+        Args:
+            text: The text the entity offsets refer to
+            previous: The earlier entity
+            entity: The later entity
             
-            print(f"Extracted {len(grouped_entities)} biomedical entities from text")
-            return grouped_entities
+        Returns:
+            True if the gap between the entities is non-empty whitespace
+        """
+        if previous['end'] is None or entity['start'] is None:
+            # Offsets are unavailable (e.g. slow tokenizers), so never merge
+            return False
+        gap = text[previous['end']:entity['start']]
+        return bool(gap) and gap.isspace()
+    
+    @staticmethod
+    def _entity_span(text, entity):
+        """Get the character span of an entity, locating it in the text if needed."""
+        if entity.get('start') is not None and entity.get('end') is not None:
+            return entity['start'], entity['end']
+        start = max(text.lower().find(entity['text'].lower()), 0)
+        return start, start + len(entity['text'])
+    
+    def count_tokens(self, text):
+        """Count the model tokens of a text after preprocessing.
         
-        except Exception as e:
-            print(f"Error extracting biomedical entities: {e}")
-            return []
+        Args:
+            text: The input text
+            
+        Returns:
+            Number of tokens, excluding special tokens
+        """
+        return self.ner_pipeline.count_tokens(self.preprocess_text(text))
+    
+    def cache_stats(self):
+        """Return the sentence cache metrics.
+        
+        Returns:
+            Dictionary with hits, misses, hit rate and memory use,
+            or None if caching is disabled
+        """
+        return self.cache.stats() if self.cache is not None else None
     
     def extract_drugs(self, text, confidence_threshold=0.7):
         """Extract drug names from the given text.
@@ -222,6 +434,10 @@ class BiomedicalNER:
     def extract_entities_from_conversation(self, conversation_text, entity_type=None):
         """Extract biomedical entities from a conversation transcript.
         
+        The transcript is split into segments that fill the model's token
+        budget: short sentences are packed together and sentences longer
+        than the budget are split into overlapping windows.
+        
         Args:
             conversation_text: The conversation transcript text
             entity_type: Optional filter for specific entity types
@@ -229,43 +445,90 @@ class BiomedicalNER:
         Returns:
             List of extracted entities
         """
-        # Split conversation into sentences for better processing
-        sentences = re.split(r'[.!?]\s+', conversation_text)
+        entities, negated_entities = self._extract_from_texts([conversation_text], entity_type)
+        return self._merge_conversation_entities(entities, negated_entities)
+    
+    def split_sentences(self, conversation_text):
+        """Split a conversation transcript into sentences.
+        
+        Args:
+            conversation_text: The conversation transcript text
+            
+        Returns:
+            List of sentences
+        """
+        return re.split(r'[.!?]\s+', conversation_text)
+    
+    def extract_entities_from_sentences(self, sentences, entity_type=None):
+        """Extract biomedical entities from the sentences of a conversation.
+        
+        Sentences longer than the token budget are split into overlapping
+        windows. Entities negated in any sentence are excluded, and repeated
+        entities are reported once with their highest confidence score.
+        
+        Args:
+            sentences: List of sentences
+            entity_type: Optional filter for specific entity types
+            
+        Returns:
+            List of extracted entities
+        """
+        entities, negated_entities = self._extract_from_texts(sentences, entity_type)
+        return self._merge_conversation_entities(entities, negated_entities)
+    
+    def _extract_from_texts(self, texts, entity_type=None):
+        """Split texts into sentences, run the model on all of them and resolve negation.
+        
+        Args:
+            texts: List of independent texts (a conversation or its sentences)
+            entity_type: Optional filter for specific entity types
+            
+        Returns:
+            Tuple of (non-negated entities, set of negated (text, type) keys)
+        """
+        segmented = [(text, self.segmenter.segment(text)) for text in texts if text.strip()]
+        segments = [segment for _, text_segments in segmented for segment in text_segments]
+        
+        # Sentences are looked up in the cache one by one, and the rest are
+        # packed into one batched model call
+        segment_entities = iter(self.extract_entities_batch([segment.text for segment in segments], entity_type,
+                                                            pack=True))
         
         all_entities = []
         negated_entities = set()  # Track negated entities
         
-        for sentence in sentences:
-            if sentence.strip():
-                # Check for negation patterns before extracting entities
-                sentence_lower = sentence.lower().strip()
+        for text, text_segments in segmented:
+            text_entities = []
+            for segment in text_segments:
+                entities = next(segment_entities)
                 
-                # Extract entities from the sentence
-                entities = self.extract_entities(sentence, entity_type)
+                # Resolve negation for all entities of the segment in one pass
+                spans = [self._entity_span(segment.text, entity) for entity in entities]
+                negation_flags = self.negation_detector.detect(segment.text, spans)
                 
-                # Check for negation patterns
-                for entity in entities:
-                    entity_text = entity['text'].lower()
-                    
-                    # Common negation patterns
-                    negation_patterns = [
-                        r'no\s+' + re.escape(entity_text),
-                        r'not\s+' + re.escape(entity_text),
-                        r'without\s+' + re.escape(entity_text),
-                        r'deny\s+' + re.escape(entity_text),
-                        r'denies\s+' + re.escape(entity_text),
-                        r'negative\s+for\s+' + re.escape(entity_text),
-                        r'free\s+of\s+' + re.escape(entity_text)
-                    ]
-                    
-                    # Check if entity is negated in this sentence
-                    is_negated = any(re.search(pattern, sentence_lower) for pattern in negation_patterns)
-                    
+                for entity, (start, end), is_negated in zip(entities, spans, negation_flags):
                     if is_negated:
-                        negated_entities.add((entity_text, entity['type']))
+                        negated_entities.add((entity['text'].lower(), entity['type']))
                     else:
-                        all_entities.append(entity)
-                
+                        # Shift spans from the segment to the text it came from
+                        entity['start'], entity['end'] = segment.start + start, segment.start + end
+                        text_entities.append(entity)
+            
+            # The same mention seen in two overlapping windows is kept once
+            all_entities.extend(reconcile_overlaps(text_entities))
+        
+        return all_entities, negated_entities
+    
+    def _merge_conversation_entities(self, all_entities, negated_entities):
+        """Group entities by text and type, dropping negated ones.
+        
+        Args:
+            all_entities: Non-negated entities from all segments
+            negated_entities: Set of (lowercase text, type) keys negated anywhere
+            
+        Returns:
+            List of unique entities sorted by type and text
+        """
         # Group by entity text and type, taking the highest confidence score
         # but exclude negated entities
         grouped_entities = {}
@@ -0,0 +1,196 @@
+"""Extraction Cascade Module.
+
+This module implements a tiered extraction mode: a fast gazetteer and pattern
+pass runs over every sentence first, and only sentences that still contain
+unexplained candidate tokens are routed to the transformer-based
+BiomedicalNER. Sentences fully explained by the dictionary pass skip model
+inference entirely.
+
+A sentence is routed to the model when it contains any of:
+    - an unknown capitalized word (a likely drug or brand name that is not
+      in the vocabulary)
+    - a dosage pattern ("10 mg", "500mg", "2 tablets")
+    - a cue word ("taking", "prescribed", "feeling", "experiencing") that is
+      not immediately followed by a vocabulary term
+"""
+
+import os
+import re
+
+DOSAGE_PATTERN = re.compile(
+    r"\b\d+(?:\.\d+)?\s*(?:mg|mcg|g|ml|iu|units?|milligrams?|micrograms?|grams?|"
+    r"milliliters?|tablets?|tabs?|capsules?|caps?|puffs?|drops?)\b",
+    re.IGNORECASE
+)
+
+MEDICINE_CUE_PATTERN = re.compile(
+    r"\b(?:taking|take|takes|took|prescribed|started on|medication|medicine|"
+    r"drug|pills?|dose|dosage|refill|switch(?:ing|ed)? to|try)\b",
+    re.IGNORECASE
+)
+
+SYMPTOM_CUE_PATTERN = re.compile(
+    r"\b(?:feel|feeling|felt|experiencing|experienced|suffering|having|had|"
+    r"hurts?|hurting|aches?|aching|sore|swollen|itchy|dizzy|nauseous|tired|"
+    r"developed|noticed|getting|symptoms?|side effects?)\b",
+    re.IGNORECASE
+)
+
+CAPITALIZED_WORD_PATTERN = re.compile(r"\b[A-Z][A-Za-z\-]{2,}\b")
+
+# Capitalized words that are never medical entities on their own
+COMMON_CAPITALIZED_WORDS = {
+    "patient", "doctor", "nurse", "okay", "yes", "yeah", "well", "thank",
+    "thanks", "hello", "good", "great", "sure", "also", "the", "and", "but",
+    "that", "this", "what", "when", "how", "have", "has", "any", "are", "can",
+    "could", "would", "should", "let", "lets", "let's", "got", "it's", "i'm",
+    "i've", "i'll", "you", "your", "we", "we'll", "mr", "mrs", "ms", "dr",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday",
+    "sunday", "january", "february", "march", "april", "may", "june", "july",
+    "august", "september", "october", "november", "december"
+}
+
+def cascade_env_default():
+    """Read the deployment-wide cascade setting from the environment.
+
+    Returns:
+        True if EXTRACTION_CASCADE is set to a truthy value ("1", "true", "yes", "on")
+    """
+    return os.environ.get("EXTRACTION_CASCADE", "").strip().lower() in ("1", "true", "yes", "on")
+
+class ExtractionCascade:
+    """Gazetteer-first extraction that only runs the NER model where needed."""
+
+    def __init__(self, ner, gazetteer, entity_types, cue_patterns=(), route_capitalized=True,
+                 route_dosage=False):
+        """Initialize the cascade.
+
+        Args:
+            ner: BiomedicalNER instance used for routed sentences
+            gazetteer: Gazetteer with the known vocabulary for this entity kind
+            entity_types: Model entity types to keep (e.g. {"DRUG"})
+            cue_patterns: Compiled patterns whose matches make a sentence a
+                          candidate for the model
+            route_capitalized: Route sentences with unknown capitalized words
+            route_dosage: Route sentences with a dosage but no known vocabulary term
+        """
+        self.ner = ner
+        self.gazetteer = gazetteer
+        self.entity_types = set(entity_types)
+        self.cue_patterns = list(cue_patterns)
+        self.route_capitalized = route_capitalized
+        self.route_dosage = route_dosage
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the sentence routing counters."""
+        self.sentences_total = 0
+        self.sentences_routed = 0
+
+    @property
+    def model_fraction(self):
+        """Fraction of sentences that were sent to the NER model."""
+        if not self.sentences_total:
+            return 0.0
+        return self.sentences_routed / self.sentences_total
+
+    def stats(self):
+        """Return the sentence routing counters.
+
+        Returns:
+            Dictionary with total sentences, sentences routed to the model and
+            the routed fraction
+        """
+        return {
+            'sentences': self.sentences_total,
+            'model_sentences': self.sentences_routed,
+            'model_fraction': self.model_fraction
+        }
+
+    def needs_model(self, sentence, matched_spans):
+        """Decide whether a sentence contains candidates the gazetteer cannot explain.
+
+        Args:
+            sentence: The sentence text
+            matched_spans: (start, end) spans of gazetteer matches in the sentence
+
+        Returns:
+            True if the sentence should be routed to the NER model
+        """
+        match_starts = {start for start, _ in matched_spans}
+
+        def explained(start, end):
+            return any(start < match_end and end > match_start for match_start, match_end in matched_spans)
+
+        if self.route_capitalized:
+            for match in CAPITALIZED_WORD_PATTERN.finditer(sentence):
+                word = match.group(0).lower()
+                # Sentence-initial words and speaker labels are capitalized anyway
+                prefix = sentence[:match.start()].rstrip()
+                if not prefix or prefix.endswith(':'):
+                    continue
+                if word in COMMON_CAPITALIZED_WORDS or explained(*match.span()):
+                    continue
+                return True
+
+        if self.route_dosage and not matched_spans and DOSAGE_PATTERN.search(sentence):
+            # A dose without any known drug name in the sentence
+            return True
+
+        for pattern in self.cue_patterns:
+            for match in pattern.finditer(sentence):
+                # A cue is explained when a vocabulary term follows it directly
+                rest = sentence[match.end():]
+                next_word = len(sentence) - len(rest.lstrip())
+                if next_word not in match_starts:
+                    return True
+
+        return False
+
+    def extract(self, conversation_text, confidence_threshold=0.7):
+        """Extract entities from a conversation, running the model only where needed.
+
+        Args:
+            conversation_text: The conversation transcript text
+            confidence_threshold: Minimum model confidence to include an entity
+
+        Returns:
+            List of extracted entity texts (lowercase, unique)
+        """
+        found = []
+        negated = set()
+        routed_sentences = []
+
+        for sentence in self.ner.split_sentences(conversation_text):
+            if not sentence.strip():
+                continue
+            self.sentences_total += 1
+
+            # Dictionary pass with negation resolved for all matches at once
+            matches = self.gazetteer.find_all(sentence)
+            spans = [(start, end) for start, end, _ in matches]
+            negation_flags = self.ner.negation_detector.detect(sentence, spans)
+            for (_, _, term), is_negated in zip(matches, negation_flags):
+                if is_negated:
+                    negated.add(term)
+                else:
+                    found.append(term)
+
+            if self.needs_model(sentence, spans):
+                routed_sentences.append(sentence)
+
+        self.sentences_routed += len(routed_sentences)
+
+        if routed_sentences:
+            # The NER applies its own negation handling to routed sentences
+            entities = self.ner.extract_entities_from_sentences(routed_sentences)
+            found.extend(
+                entity['text'].lower() for entity in entities
+                if entity['type'] in self.entity_types and entity['score'] >= confidence_threshold
+            )
+
+        results = [term for term in dict.fromkeys(found) if term not in negated]
+
+        print(f"Cascade routed {len(routed_sentences)} sentences to the NER model "
+              f"({self.model_fraction:.0%} of {self.sentences_total} sentences so far)")
+        return results
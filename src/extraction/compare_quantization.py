@@ -0,0 +1,166 @@
+"""Accuracy-vs-latency comparison for quantized BiomedicalNER inference.
+
+This script runs the full-precision and the dynamic int8 quantized variants of
+the biomedical NER model over a fixed corpus and reports entity-level agreement,
+throughput and model memory, so a deployment can decide whether to enable
+NER_QUANTIZE.
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import torch
+
+# Add parent directory to path to import from other modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from extraction.biomedical_ner import BiomedicalNER
+
+# Fixed evaluation corpus so results are comparable between runs
+CORPUS = [
+    "I've been taking Lisinopril for my blood pressure for about a month now.",
+    "I've developed this persistent dry cough that won't go away.",
+    "I'm also feeling a bit dizzy sometimes, especially when I stand up quickly.",
+    "No swelling, but I have been having some headaches too.",
+    "I'm on Metformin 500mg twice daily for diabetes.",
+    "I occasionally take Tylenol for headaches.",
+    "Perhaps we could try Losartan instead.",
+    "I've been taking Amlodipine 5mg and my ankles are swollen.",
+    "Ibuprofen can sometimes affect kidney function.",
+    "She was started on atorvastatin 20 mg and now complains of muscle pain.",
+    "He denies chest pain or shortness of breath.",
+    "Patient reports nausea and vomiting after starting gabapentin 300 mg tid.",
+    "Sertraline was increased last week and the insomnia is worse.",
+    "Any rash, itching or fever since the omeprazole was added?",
+    "Levothyroxine 50 mcg po qd, no palpitations.",
+    "The albuterol inhaler helps but my hands get shaky.",
+]
+
+def model_memory_bytes(model):
+    """Measure the size of a model's weights as serialized by torch.
+
+    Args:
+        model: The PyTorch model to measure
+
+    Returns:
+        Size of the serialized state dict in bytes
+    """
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes
+
+def run_corpus(ner, corpus, repeats=3):
+    """Run the NER over the corpus and time it.
+
+    Args:
+        ner: An initialized BiomedicalNER instance
+        corpus: List of sentences
+        repeats: Number of timed passes over the corpus
+
+    Returns:
+        Tuple of (entities per sentence, sentences per second)
+    """
+    # Silence the per-call logging so it does not distort the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Warm-up pass (also provides the entities used for agreement)
+        entities = [ner.extract_entities(sentence) for sentence in corpus]
+
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            for sentence in corpus:
+                ner.extract_entities(sentence)
+        elapsed = time.perf_counter() - start_time
+
+    throughput = (len(corpus) * repeats) / elapsed if elapsed > 0 else float('inf')
+    return entities, throughput
+
+def entity_agreement(reference, candidate):
+    """Compute entity-level agreement between two runs over the same corpus.
+
+    Args:
+        reference: Entities per sentence from the full-precision model
+        candidate: Entities per sentence from the quantized model
+
+    Returns:
+        Dictionary with precision, recall, F1 and the fraction of sentences
+        where both variants produced exactly the same entities
+    """
+    true_positives = 0
+    reference_total = 0
+    candidate_total = 0
+    identical_sentences = 0
+
+    for ref_entities, cand_entities in zip(reference, candidate):
+        ref_set = {(entity['text'].lower(), entity['type']) for entity in ref_entities}
+        cand_set = {(entity['text'].lower(), entity['type']) for entity in cand_entities}
+
+        true_positives += len(ref_set & cand_set)
+        reference_total += len(ref_set)
+        candidate_total += len(cand_set)
+        if ref_set == cand_set:
+            identical_sentences += 1
+
+    precision = true_positives / candidate_total if candidate_total else 1.0
+    recall = true_positives / reference_total if reference_total else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if (precision + recall) else 0.0
+
+    return {
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'sentence_agreement': identical_sentences / len(reference) if reference else 1.0
+    }
+
+def main():
+    """Compare full-precision and quantized BiomedicalNER on a fixed corpus."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="alvaroalon2/biobert_genetic_ner",
+                        help="Model name or local model directory")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="Number of timed passes over the corpus")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Number of CPU threads for torch (default: torch default)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    print(f"Comparing full-precision and int8 quantized NER on {len(CORPUS)} sentences\n")
+
+    try:
+        results = {}
+        for label, quantize in (("fp32", False), ("int8", True)):
+            ner = BiomedicalNER(model_name=args.model, quantize=quantize)
+            entities, throughput = run_corpus(ner, CORPUS, repeats=args.repeats)
+            results[label] = {
+                'entities': entities,
+                'throughput': throughput,
+                'memory': model_memory_bytes(ner.model)
+            }
+            del ner
+
+        agreement = entity_agreement(results['fp32']['entities'], results['int8']['entities'])
+
+        print("\nResults:")
+        print(f"{'variant':<8} {'sentences/sec':>14} {'model MB':>10}")
+        for label, result in results.items():
+            print(f"{label:<8} {result['throughput']:>14.2f} {result['memory'] / 1e6:>10.1f}")
+
+        speedup = results['int8']['throughput'] / results['fp32']['throughput']
+        size_ratio = results['int8']['memory'] / results['fp32']['memory']
+        print(f"\nSpeedup: {speedup:.2f}x, model size: {size_ratio:.0%} of fp32")
+        print("Entity agreement (int8 vs fp32 reference):")
+        print(f"  Precision: {agreement['precision']:.3f}")
+        print(f"  Recall:    {agreement['recall']:.3f}")
+        print(f"  F1:        {agreement['f1']:.3f}")
+        print(f"  Identical sentences: {agreement['sentence_agreement']:.0%}")
+
+    except Exception as e:
+        print(f"Error in comparison: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Gazetteer Module.
+
+This module provides dictionary-based entity matching with an Aho-Corasick
+automaton. The automaton runs over word tokens rather than characters, so a
+single linear pass over the text finds every whole-word occurrence of every
+term (including overlapping ones such as "pain" inside "chest pain"),
+independent of the vocabulary size.
+
+Automata built from the FAERS vocabularies are cached on disk and reused at
+startup until the source data changes.
+"""
+
+import re
+import pickle
+from collections import deque
+from pathlib import Path
+
+# Define paths
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+MERGED_DATA_PATH = PROJECT_ROOT / "data" / "processed" / "merged_data.csv"
+GAZETTEER_DIR = PROJECT_ROOT / "data" / "processed" / "gazetteers"
+
+# Bump when the serialized layout changes so stale caches are rebuilt
+CACHE_FORMAT_VERSION = 1
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+class Gazetteer:
+    """Word-level Aho-Corasick automaton over a fixed vocabulary."""
+
+    def __init__(self, terms=()):
+        """Build the automaton.
+
+        Args:
+            terms: Iterable of terms (matched case-insensitively on whole words)
+        """
+        self.terms = []
+        self.words = {}      # word -> word id
+        self.goto = {}       # (node, word id) -> child node
+        self.fail = [0]      # node -> failure node
+        self.output = [-1]   # node -> index of the term ending at this node, or -1
+        self.dict_link = [0] # node -> nearest proper suffix node with an output (0 if none)
+        self.depth = [0]     # node -> number of words from the root
+
+        seen = set()
+        for term in terms:
+            if not isinstance(term, str):
+                continue
+            term = term.lower().strip()
+            if term and term not in seen:
+                seen.add(term)
+                self._insert(term)
+
+        self._build_links()
+
+    def _insert(self, term):
+        """Add a term to the trie."""
+        words = TOKEN_PATTERN.findall(term)
+        if not words:
+            return
+
+        node = 0
+        for word in words:
+            word_id = self.words.setdefault(word, len(self.words))
+            child = self.goto.get((node, word_id))
+            if child is None:
+                child = len(self.fail)
+                self.goto[(node, word_id)] = child
+                self.fail.append(0)
+                self.output.append(-1)
+                self.dict_link.append(0)
+                self.depth.append(self.depth[node] + 1)
+            node = child
+
+        if self.output[node] == -1:
+            self.output[node] = len(self.terms)
+            self.terms.append(term)
+
+    def _build_links(self):
+        """Compute failure and dictionary-suffix links breadth-first."""
+        children = {}
+        for (node, word_id), child in self.goto.items():
+            children.setdefault(node, []).append((word_id, child))
+
+        queue = deque()
+        for _, child in children.get(0, []):
+            self.fail[child] = 0
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for word_id, child in children.get(node, []):
+                fallback = self.fail[node]
+                while fallback and (fallback, word_id) not in self.goto:
+                    fallback = self.fail[fallback]
+                target = self.goto.get((fallback, word_id), 0)
+                self.fail[child] = target if target != child else 0
+
+                suffix = self.fail[child]
+                self.dict_link[child] = suffix if self.output[suffix] != -1 else self.dict_link[suffix]
+                queue.append(child)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def find_all(self, text):
+        """Find all whole-word occurrences of vocabulary terms in the text.
+
+        Args:
+            text: The text to search
+
+        Returns:
+            List of (start, end, term) tuples ordered by end position
+        """
+        tokens = [(match.group(0), match.start(), match.end())
+                  for match in TOKEN_PATTERN.finditer(text.lower())]
+
+        matches = []
+        node = 0
+        for index, (word, _, end) in enumerate(tokens):
+            word_id = self.words.get(word)
+            if word_id is None:
+                # Unknown word: no term can span it
+                node = 0
+                continue
+
+            while node and (node, word_id) not in self.goto:
+                node = self.fail[node]
+            node = self.goto.get((node, word_id), 0)
+
+            # Emit the term ending here and every term that is a suffix of it
+            match_node = node if self.output[node] != -1 else self.dict_link[node]
+            while match_node:
+                start = tokens[index - self.depth[match_node] + 1][1]
+                matches.append((start, end, self.terms[self.output[match_node]]))
+                match_node = self.dict_link[match_node]
+
+        return matches
+
+    def terms_in(self, text):
+        """Return the distinct vocabulary terms found in the text.
+
+        Args:
+            text: The text to search
+
+        Returns:
+            List of terms in order of first occurrence
+        """
+        return list(dict.fromkeys(term for _, _, term in self.find_all(text)))
+
+    def save(self, path, source_fingerprint=None):
+        """Serialize the automaton to disk.
+
+        Args:
+            path: Destination file
+            source_fingerprint: Optional fingerprint of the data it was built from
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            'version': CACHE_FORMAT_VERSION,
+            'source': source_fingerprint,
+            'terms': self.terms,
+            'words': self.words,
+            'goto': self.goto,
+            'fail': self.fail,
+            'output': self.output,
+            'dict_link': self.dict_link,
+            'depth': self.depth
+        }
+        # Write to a temporary file first so readers never see a partial cache
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path, source_fingerprint=None):
+        """Load a serialized automaton.
+
+        Args:
+            path: File written by save()
+            source_fingerprint: If given, the cache is only accepted when it was
+                                built from data with the same fingerprint
+
+        Returns:
+            Gazetteer instance, or None if the cache is missing or stale
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+
+        if state.get('version') != CACHE_FORMAT_VERSION:
+            return None
+        if source_fingerprint is not None and state.get('source') != source_fingerprint:
+            return None
+
+        gazetteer = cls.__new__(cls)
+        for key in ('terms', 'words', 'goto', 'fail', 'output', 'dict_link', 'depth'):
+            setattr(gazetteer, key, state[key])
+        return gazetteer
+
+def file_fingerprint(path):
+    """Identify a file version by its size and modification time."""
+    stat = Path(path).stat()
+    return (stat.st_size, stat.st_mtime_ns)
+
+def load_faers_gazetteer(column, fallback_terms=(), data_path=None, cache_dir=None):
+    """Load the gazetteer for a FAERS vocabulary, building and caching it if needed.
+
+    Args:
+        column: Column of merged_data.csv to use ('drug' or 'reaction')
+        fallback_terms: Terms to use when the FAERS data is not available
+        data_path: Path to merged_data.csv. Default is None, which uses the default path
+        cache_dir: Directory for serialized automata. Default is None, which
+                   uses data/processed/gazetteers
+
+    Returns:
+        Gazetteer instance
+    """
+    data_path = Path(data_path) if data_path else MERGED_DATA_PATH
+    cache_dir = Path(cache_dir) if cache_dir else GAZETTEER_DIR
+    cache_path = cache_dir / f"{column}.pkl"
+
+    if not data_path.exists():
+        return Gazetteer(fallback_terms)
+
+    fingerprint = file_fingerprint(data_path)
+    try:
+        gazetteer = Gazetteer.load(cache_path, source_fingerprint=fingerprint)
+        if gazetteer is not None:
+            print(f"Loaded {column} gazetteer with {len(gazetteer)} terms from {cache_path}")
+            return gazetteer
+    except Exception as e:
+        print(f"Error loading cached {column} gazetteer: {e}")
+
+    # pandas is only needed to rebuild the cache, so keep it off the startup path
+    import pandas as pd
+    
+    print(f"Building {column} gazetteer from {data_path}")
+    data = pd.read_csv(data_path, sep='|', header=None)
+    data.columns = ['id', 'case_id', 'drug', 'reaction', 'source', 'severity']
+    gazetteer = Gazetteer(data[column].dropna().astype(str).str.lower().unique())
+
+    try:
+        gazetteer.save(cache_path, source_fingerprint=fingerprint)
+        print(f"Saved {column} gazetteer with {len(gazetteer)} terms to {cache_path}")
+    except Exception as e:
+        print(f"Error saving {column} gazetteer: {e}")
+
+    return gazetteer
+
+def main():
+    """Build and cache the drug and reaction gazetteers."""
+    if not MERGED_DATA_PATH.exists():
+        print(f"Merged data not found at {MERGED_DATA_PATH}. Please run preprocess.py first.")
+        return
+
+    for column in ('drug', 'reaction'):
+        gazetteer = load_faers_gazetteer(column)
+        print(f"{column}: {len(gazetteer)} terms")
+
+if __name__ == "__main__":
+    main()
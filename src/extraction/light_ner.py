@@ -0,0 +1,518 @@
+"""Lightweight NER Module.
+
+This module provides a CPU-only alternative to the transformer NER model: an
+averaged perceptron token tagger over handcrafted features (word form,
+prefixes and suffixes, word shape, neighbouring words, the previous tag and
+FAERS gazetteer matches). It is trained locally without annotated data by
+weak-labelling text with the FAERS drug and reaction vocabularies, and is
+served as the "light" backend of BiomedicalNER:
+
+    python src/extraction/light_ner.py                 # train from the FAERS vocabularies
+    python src/extraction/light_ner.py --corpus notes.txt  # also learn from real transcripts
+    NER_BACKEND=light python ...                       # use it
+
+Gazetteer features are dropped for part of the training tokens, so the tagger
+also learns suffix and context cues ("taking X", "-pril", "-statin") and can
+recognize names that are not in the vocabulary.
+"""
+
+import re
+import sys
+import math
+import pickle
+import random
+import argparse
+from collections import defaultdict
+from pathlib import Path
+
+try:
+    from .gazetteer import load_faers_gazetteer
+    from .model_store import model_cache_dir
+except ImportError:
+    # Run as a script (python src/extraction/light_ner.py); import through the
+    # package so pickled gazetteers load in the backend too
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+    from extraction.gazetteer import load_faers_gazetteer
+    from extraction.model_store import model_cache_dir
+
+# Bump when the serialized layout changes so stale models are rejected
+MODEL_FORMAT_VERSION = 1
+
+TOKEN_PATTERN = re.compile(r"\w+(?:[-']\w+)*|[^\w\s]")
+LABELS = ["O", "B-DRUG", "I-DRUG", "B-SYMPTOM", "I-SYMPTOM"]
+
+# Sentence templates used to place vocabulary terms in conversational context
+DRUG_CONTEXTS = [
+    "I've been taking {drug} for about a month.",
+    "She was started on {drug} {dose} mg last week.",
+    "He is on {drug} {dose}mg twice a day.",
+    "We could try {drug} instead.",
+    "Did the {drug} help at all?",
+    "I stopped taking {drug} because of the side effects.",
+    "My doctor prescribed {drug} for my blood pressure.",
+    "Please keep taking the {drug} every morning."
+]
+
+SYMPTOM_CONTEXTS = [
+    "I've been having {symptom} lately.",
+    "The {symptom} started after the new medication.",
+    "She complains of {symptom} at night.",
+    "Any {symptom} since then?",
+    "I noticed some {symptom} this week.",
+    "It gave me {symptom} and I felt awful."
+]
+
+MIXED_CONTEXTS = [
+    "Since starting {drug} I have had {symptom}.",
+    "The {drug} is causing {symptom}, I think.",
+    "I get {symptom} whenever I take {drug}."
+]
+
+NEUTRAL_SENTENCES = [
+    "How are you feeling today?",
+    "Let's review your medications.",
+    "I'll see you again in two weeks.",
+    "Thank you, doctor.",
+    "Can you describe it in more detail?",
+    "It has been a stressful month at work.",
+    "My daughter drove me here today.",
+    "We will check your blood work on Monday."
+]
+
+DOSES = ["5", "10", "20", "25", "50", "100", "250", "500"]
+
+def default_model_path():
+    """Get the default location of the trained light model in the model store."""
+    return model_cache_dir() / "light" / "light_ner.pkl"
+
+def tokenize(text):
+    """Split text into tokens with their character offsets.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of (token, start, end) tuples
+    """
+    return [(match.group(0), match.start(), match.end()) for match in TOKEN_PATTERN.finditer(text)]
+
+def _gazetteer_tags(text, tokens, gazetteer):
+    """Tag tokens B/I/O for the longest non-overlapping gazetteer matches."""
+    tags = ["O"] * len(tokens)
+    if gazetteer is None or not tokens:
+        return tags
+
+    starts = {start: index for index, (_, start, _) in enumerate(tokens)}
+    ends = {end: index for index, (_, _, end) in enumerate(tokens)}
+
+    # Prefer longer matches, then earlier ones
+    matches = sorted(gazetteer.find_all(text), key=lambda match: (match[0] - match[1], match[0]))
+    for start, end, _ in matches:
+        first, last = starts.get(start), ends.get(end)
+        if first is None or last is None or any(tag != "O" for tag in tags[first:last + 1]):
+            continue
+        tags[first] = "B"
+        for index in range(first + 1, last + 1):
+            tags[index] = "I"
+    return tags
+
+def weak_label(text, drug_gazetteer, reaction_gazetteer):
+    """Label the tokens of a text with the FAERS vocabularies.
+
+    Args:
+        text: Text to label
+        drug_gazetteer: Gazetteer of drug names (labelled DRUG)
+        reaction_gazetteer: Gazetteer of reaction terms (labelled SYMPTOM)
+
+    Returns:
+        Tuple of (tokens, BIO labels)
+    """
+    tokens = tokenize(text)
+    labels = ["O"] * len(tokens)
+    for gazetteer, entity_type in ((drug_gazetteer, "DRUG"), (reaction_gazetteer, "SYMPTOM")):
+        for index, tag in enumerate(_gazetteer_tags(text, tokens, gazetteer)):
+            if tag != "O" and labels[index] == "O":
+                labels[index] = f"{tag}-{entity_type}"
+    return tokens, labels
+
+def _shape(word):
+    """Collapse a word to its character classes (e.g. "Lisinopril" -> "Xx")."""
+    shape = []
+    for char in word:
+        kind = "X" if char.isupper() else "x" if char.islower() else "d" if char.isdigit() else char
+        if not shape or shape[-1] != kind:
+            shape.append(kind)
+    return "".join(shape)
+
+class LightNERTagger:
+    """Averaged perceptron BIO tagger over handcrafted token features."""
+
+    def __init__(self, drug_gazetteer=None, reaction_gazetteer=None):
+        """Initialize an untrained tagger.
+
+        Args:
+            drug_gazetteer: Gazetteer of drug names used as features
+            reaction_gazetteer: Gazetteer of reaction terms used as features
+        """
+        self.drug_gazetteer = drug_gazetteer
+        self.reaction_gazetteer = reaction_gazetteer
+        self.labels = list(LABELS)
+        self.weights = {}  # feature -> {label: weight}
+
+        # Accumulators for weight averaging during training
+        self._totals = defaultdict(float)
+        self._timestamps = defaultdict(int)
+        self._instances = 0
+
+    def _features(self, tokens, index, gazetteer_tags, previous_label, use_gazetteers=True):
+        """Extract the features of one token."""
+        word = tokens[index][0]
+        lower = word.lower()
+        previous_word = tokens[index - 1][0].lower() if index > 0 else "<s>"
+        next_word = tokens[index + 1][0].lower() if index + 1 < len(tokens) else "</s>"
+        previous_word2 = tokens[index - 2][0].lower() if index > 1 else "<s>"
+
+        features = [
+            "bias",
+            "w=" + lower,
+            "suf3=" + lower[-3:],
+            "suf4=" + lower[-4:],
+            "pre3=" + lower[:3],
+            "shape=" + _shape(word),
+            "len=" + str(min(len(word), 12)),
+            "w-1=" + previous_word,
+            "w+1=" + next_word,
+            "w-2=" + previous_word2,
+            "w-1,w=" + previous_word + "|" + lower,
+            "t-1=" + previous_label,
+            "t-1,suf3=" + previous_label + "|" + lower[-3:]
+        ]
+        if index == 0 or tokens[index - 1][0] == ":":
+            features.append("first")
+        if use_gazetteers:
+            drug_tags, reaction_tags = gazetteer_tags
+            features.append("gaz_drug=" + drug_tags[index])
+            features.append("gaz_reaction=" + reaction_tags[index])
+        return features
+
+    def _scores(self, features):
+        """Score every label for a feature list."""
+        scores = dict.fromkeys(self.labels, 0.0)
+        for feature in features:
+            weights = self.weights.get(feature)
+            if weights:
+                for label, weight in weights.items():
+                    scores[label] += weight
+        return scores
+
+    @staticmethod
+    def _constrain(label, previous_label):
+        """Turn an I- label that does not continue an entity into a B- label."""
+        if label.startswith("I-") and previous_label[2:] != label[2:]:
+            return "B-" + label[2:]
+        return label
+
+    def _gazetteer_tags(self, text, tokens):
+        """Gazetteer B/I/O tags of the tokens for both vocabularies."""
+        return (_gazetteer_tags(text, tokens, self.drug_gazetteer),
+                _gazetteer_tags(text, tokens, self.reaction_gazetteer))
+
+    def tag(self, text):
+        """Tag a text.
+
+        Args:
+            text: Text to tag
+
+        Returns:
+            List of (token, start, end, label, confidence) tuples
+        """
+        tokens = tokenize(text)
+        gazetteer_tags = self._gazetteer_tags(text, tokens)
+
+        tagged = []
+        previous_label = "O"
+        for index, (word, start, end) in enumerate(tokens):
+            scores = self._scores(self._features(tokens, index, gazetteer_tags, previous_label))
+            label = max(self.labels, key=lambda candidate: scores[candidate])
+
+            # Softmax over the label scores as a confidence estimate
+            top = scores[label]
+            normalizer = sum(math.exp(score - top) for score in scores.values())
+            confidence = 1.0 / normalizer
+
+            label = self._constrain(label, previous_label)
+            tagged.append((word, start, end, label, confidence))
+            previous_label = label
+        return tagged
+
+    def _update(self, truth, guess, features):
+        """Perceptron update with lazy accumulation for averaging."""
+        def adjust(feature, label, delta):
+            weights = self.weights.setdefault(feature, {})
+            key = (feature, label)
+            weight = weights.get(label, 0.0)
+            self._totals[key] += (self._instances - self._timestamps[key]) * weight
+            self._timestamps[key] = self._instances
+            weights[label] = weight + delta
+
+        self._instances += 1
+        if truth == guess:
+            return
+        for feature in features:
+            adjust(feature, truth, 1.0)
+            adjust(feature, guess, -1.0)
+
+    def train(self, texts, epochs=5, gazetteer_dropout=0.5, seed=0):
+        """Train the tagger on weak labels from the gazetteers.
+
+        Args:
+            texts: Training texts
+            epochs: Number of passes over the texts
+            gazetteer_dropout: Fraction of tokens trained without gazetteer
+                               features, so context and spelling cues are learned
+            seed: Random seed for shuffling and dropout
+        """
+        generator = random.Random(seed)
+        examples = []
+        for text in texts:
+            tokens, labels = weak_label(text, self.drug_gazetteer, self.reaction_gazetteer)
+            if tokens:
+                examples.append((tokens, labels, self._gazetteer_tags(text, tokens)))
+
+        for epoch in range(epochs):
+            generator.shuffle(examples)
+            errors = 0
+            total = 0
+            for tokens, labels, gazetteer_tags in examples:
+                previous_label = "O"
+                for index, truth in enumerate(labels):
+                    use_gazetteers = generator.random() >= gazetteer_dropout
+                    features = self._features(tokens, index, gazetteer_tags, previous_label, use_gazetteers)
+                    scores = self._scores(features)
+                    guess = max(self.labels, key=lambda candidate: scores[candidate])
+                    self._update(truth, guess, features)
+                    errors += guess != truth
+                    total += 1
+                    # Teacher forcing: condition on the true previous label
+                    previous_label = truth
+            print(f"Epoch {epoch + 1}/{epochs}: {errors / max(total, 1):.2%} token errors")
+
+        self._average_weights()
+
+    def _average_weights(self):
+        """Replace the weights with their average over all training updates."""
+        for feature, weights in self.weights.items():
+            averaged = {}
+            for label, weight in weights.items():
+                key = (feature, label)
+                total = self._totals[key] + (self._instances - self._timestamps[key]) * weight
+                value = round(total / max(self._instances, 1), 4)
+                if value:
+                    averaged[label] = value
+            self.weights[feature] = averaged
+        self.weights = {feature: weights for feature, weights in self.weights.items() if weights}
+        self._totals.clear()
+        self._timestamps.clear()
+
+    def save(self, path):
+        """Serialize the trained tagger.
+
+        Args:
+            path: Destination file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            'version': MODEL_FORMAT_VERSION,
+            'labels': self.labels,
+            'weights': self.weights,
+            'drug_gazetteer': self.drug_gazetteer,
+            'reaction_gazetteer': self.reaction_gazetteer
+        }
+        # Write to a temporary file first so readers never see a partial model
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a tagger written by save().
+
+        Args:
+            path: Model file
+
+        Returns:
+            LightNERTagger instance
+        """
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        if state.get('version') != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported light NER model format in {path}, please retrain it")
+
+        tagger = cls(state['drug_gazetteer'], state['reaction_gazetteer'])
+        tagger.labels = state['labels']
+        tagger.weights = state['weights']
+        return tagger
+
+class LightBackend:
+    """BiomedicalNER backend running the light tagger."""
+
+    name = "light"
+
+    def __init__(self, model_path=None):
+        """Load a trained light tagger.
+
+        Args:
+            model_path: Path to the trained model. Default is None, which uses
+                        light/light_ner.pkl in the model store
+        """
+        model_path = Path(model_path) if model_path else default_model_path()
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"Light NER model not found at {model_path}. "
+                f"Train it first with: python src/extraction/light_ner.py"
+            )
+
+        self.model_name = str(model_path)
+        self.quantized = False
+        self.device = "cpu"
+        self.tokenizer = None
+        self.tagger = LightNERTagger.load(model_path)
+        print(f"Loaded light NER model with {len(self.tagger.weights)} features from {model_path}")
+
+    @property
+    def identity(self):
+        """String identifying the model and inference configuration."""
+        stat = Path(self.model_name).stat()
+        return f"{self.name}:{self.model_name}:{stat.st_mtime_ns}"
+
+    def count_tokens(self, text):
+        """Count the tagger tokens of a text."""
+        return len(TOKEN_PATTERN.findall(text))
+
+    def set_num_threads(self, threads):
+        """The light tagger is single-threaded, so this is a no-op."""
+
+    def _entities(self, text):
+        """Group the tagged tokens of a text into pipeline-style entities."""
+        entities = []
+        current = None
+        for _, start, end, label, confidence in self.tagger.tag(text):
+            if label == "O":
+                current = None
+                continue
+            prefix, entity_type = label.split("-", 1)
+            if current is not None and prefix == "I" and current['entity_group'] == entity_type:
+                current['end'] = end
+                current['scores'].append(confidence)
+                continue
+            current = {'entity_group': entity_type, 'start': start, 'end': end, 'scores': [confidence]}
+            entities.append(current)
+
+        return [
+            {
+                'entity_group': entity['entity_group'],
+                'score': sum(entity['scores']) / len(entity['scores']),
+                'word': text[entity['start']:entity['end']],
+                'start': entity['start'],
+                'end': entity['end']
+            }
+            for entity in entities
+        ]
+
+    def __call__(self, texts):
+        """Run NER on a string or a list of strings."""
+        if isinstance(texts, str):
+            return self._entities(texts)
+        return [self._entities(text) for text in texts]
+
+def training_texts(drug_terms, reaction_terms, sentences=20000, seed=0):
+    """Generate weakly labelled training sentences from the vocabularies.
+
+    Args:
+        drug_terms: Drug names to place in context
+        reaction_terms: Reaction terms to place in context
+        sentences: Number of sentences to generate
+        seed: Random seed
+
+    Returns:
+        List of sentences
+    """
+    generator = random.Random(seed)
+    drug_terms = [term for term in drug_terms if term]
+    reaction_terms = [term for term in reaction_terms if term]
+
+    def cased(term):
+        # Transcripts mix capitalized and lowercase drug names
+        return term.capitalize() if generator.random() < 0.5 else term
+
+    texts = []
+    for _ in range(sentences):
+        roll = generator.random()
+        if roll < 0.35:
+            texts.append(generator.choice(DRUG_CONTEXTS).format(
+                drug=cased(generator.choice(drug_terms)), dose=generator.choice(DOSES)))
+        elif roll < 0.7:
+            texts.append(generator.choice(SYMPTOM_CONTEXTS).format(symptom=generator.choice(reaction_terms)))
+        elif roll < 0.85:
+            texts.append(generator.choice(MIXED_CONTEXTS).format(
+                drug=cased(generator.choice(drug_terms)), symptom=generator.choice(reaction_terms)))
+        else:
+            texts.append(generator.choice(NEUTRAL_SENTENCES))
+    return texts
+
+def train_light_model(output_path=None, corpus_path=None, sentences=20000, epochs=5, seed=0):
+    """Train the light tagger from the FAERS vocabularies and save it.
+
+    Args:
+        output_path: Where to save the model. Default is None, which uses the model store
+        corpus_path: Optional text file with one transcript sentence per line,
+                     weak-labelled and added to the generated sentences
+        sentences: Number of generated training sentences
+        epochs: Number of training epochs
+        seed: Random seed
+
+    Returns:
+        Path of the saved model
+    """
+    from extraction.medicine_extractor import FALLBACK_MEDICINES
+    from extraction.symptom_extractor import FALLBACK_SYMPTOMS
+
+    output_path = Path(output_path) if output_path else default_model_path()
+    drug_gazetteer = load_faers_gazetteer('drug', fallback_terms=FALLBACK_MEDICINES)
+    reaction_gazetteer = load_faers_gazetteer('reaction', fallback_terms=FALLBACK_SYMPTOMS)
+
+    texts = training_texts(drug_gazetteer.terms, reaction_gazetteer.terms, sentences=sentences, seed=seed)
+    if corpus_path:
+        with open(corpus_path) as f:
+            corpus = [line.strip() for line in f if line.strip()]
+        print(f"Adding {len(corpus)} sentences from {corpus_path}")
+        texts.extend(corpus)
+
+    print(f"Training light NER on {len(texts)} sentences "
+          f"({len(drug_gazetteer)} drugs, {len(reaction_gazetteer)} reactions)")
+    tagger = LightNERTagger(drug_gazetteer, reaction_gazetteer)
+    tagger.train(texts, epochs=epochs, seed=seed)
+    tagger.save(output_path)
+    print(f"Saved light NER model with {len(tagger.weights)} features to {output_path}")
+    return output_path
+
+def main():
+    """Train the light NER model."""
+    parser = argparse.ArgumentParser(description="Train the lightweight CPU NER model")
+    parser.add_argument("--output", default=None, help="Output path (default: <MODEL_CACHE_DIR>/light/light_ner.pkl)")
+    parser.add_argument("--corpus", default=None, help="Optional text file of transcript sentences, one per line")
+    parser.add_argument("--sentences", type=int, default=20000, help="Number of generated training sentences")
+    parser.add_argument("--epochs", type=int, default=5, help="Number of training epochs")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    try:
+        train_light_model(args.output, corpus_path=args.corpus, sentences=args.sentences,
+                          epochs=args.epochs, seed=args.seed)
+    except Exception as e:
+        print(f"Error training light NER model: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -5,48 +5,37 @@ It processes conversation text and identifies medication mentions with high accu
 """
 
 import re
-import torch
-from transformers import AutoTokenizer, AutoModelForTokenClassification
-import numpy as np
 from .biomedical_ner import BiomedicalNER
+from .text_normalizer import DOSAGE_NORMALIZER
 
 """
 Medicine extraction module.
 """
 import re
-import pandas as pd
-from pathlib import Path
+import copy
+from .gazetteer import Gazetteer, load_faers_gazetteer
+from .cascade import ExtractionCascade, MEDICINE_CUE_PATTERN, cascade_env_default
+
+# Small list of common medicines used when the FAERS data is not available
+FALLBACK_MEDICINES = [
+    "aspirin", "lisinopril", "amlodipine", "metformin", "atorvastatin",
+    "simvastatin", "omeprazole", "losartan", "albuterol", "gabapentin",
+    "hydrochlorothiazide", "metoprolol", "levothyroxine", "prednisone"
+]
 
 class MedicineExtractor:
     """Class for extracting medicine mentions from text."""
     
     def __init__(self):
         """Initialize the medicine extractor."""
-        # Load a list of common medicines from the merged data
+        # Load the drug vocabulary automaton (cached on disk, built from the merged data)
         try:
-            project_root = Path(__file__).resolve().parent.parent.parent
-            data_path = project_root / "data" / "processed" / "merged_data.csv"
-            
-            if data_path.exists():
-                data = pd.read_csv(data_path, sep='|', header=None)
-                data.columns = ['id', 'case_id', 'drug', 'reaction', 'source', 'severity']
-                self.medicine_list = data['drug'].unique().tolist()
-                self.medicine_list = [med.lower() for med in self.medicine_list]
-            else:
-                # Fallback to a small list of common medicines
-                self.medicine_list = [
-                    "aspirin", "lisinopril", "amlodipine", "metformin", "atorvastatin",
-                    "simvastatin", "omeprazole", "losartan", "albuterol", "gabapentin",
-                    "hydrochlorothiazide", "metoprolol", "levothyroxine", "prednisone"
-                ]
+            self.gazetteer = load_faers_gazetteer('drug', fallback_terms=FALLBACK_MEDICINES)
         except Exception as e:
             print(f"Error loading medicine list: {e}")
             # Fallback to a small list of common medicines
-            self.medicine_list = [
-                "aspirin", "lisinopril", "amlodipine", "metformin", "atorvastatin",
-                "simvastatin", "omeprazole", "losartan", "albuterol", "gabapentin",
-                "hydrochlorothiazide", "metoprolol", "levothyroxine", "prednisone"
-            ]
+            self.gazetteer = Gazetteer(FALLBACK_MEDICINES)
+        self.medicine_list = self.gazetteer.terms
     
     def extract(self, text):
         """
@@ -61,10 +50,8 @@ class MedicineExtractor:
         text = text.lower()
         extracted_medicines = []
         
-        # Look for medicines in our list
-        for medicine in self.medicine_list:
-            if medicine in text:
-                extracted_medicines.append(medicine)
+        # Look for medicines in our list (whole words, one pass over the text)
+        extracted_medicines.extend(self.gazetteer.terms_in(text))
         
         # Look for medicine mentions with patterns
         patterns = [
@@ -89,14 +76,24 @@ class MedicineExtractor:
 class MedicineExtractor:
     """Class for extracting medicine names from text using enhanced biomedical NER."""
     
-    def __init__(self, model_name="alvaroalon2/biobert_genetic_ner"):
+    def __init__(self, model_name="alvaroalon2/biobert_genetic_ner", cascade=None):
         """Initialize the medicine extractor with a specialized biomedical NER model.
         
         Args:
             model_name: The name of the pre-trained model to use
                        Default is BioBERT which is fine-tuned for biomedical NER
+            cascade: Run the FAERS drug gazetteer first and only send sentences
+                     with unexplained candidates to the NER model. Default is
+                     None, which reads the EXTRACTION_CASCADE environment variable
         """
+        if cascade is None:
+            cascade = cascade_env_default()
+        
         print(f"Initializing MedicineExtractor with enhanced biomedical NER")
+        
+        # Compiled single-pass normalizer (keeps offsets back to the input text)
+        self.normalizer = DOSAGE_NORMALIZER
+        
         try:
             # Initialize the biomedical NER component
             self.ner = BiomedicalNER(model_name=model_name)
@@ -104,6 +101,23 @@ class MedicineExtractor:
             
             # Legacy model support (for backward compatibility)
             self.device = self.ner.device
+            
+            # Automaton over the common drug names for the rule-based pass
+            self.common_drug_gazetteer = Gazetteer(self.ner.common_drugs)
+            
+            # Optional tiered extraction: gazetteer first, transformer only where needed
+            self.cascade = None
+            if cascade:
+                drug_gazetteer = load_faers_gazetteer('drug', fallback_terms=FALLBACK_MEDICINES + self.ner.common_drugs)
+                self.cascade = ExtractionCascade(
+                    self.ner,
+                    drug_gazetteer,
+                    entity_types={"DRUG"},
+                    cue_patterns=[MEDICINE_CUE_PATTERN],
+                    route_capitalized=True,
+                    route_dosage=True
+                )
+                print(f"Extraction cascade enabled with {len(drug_gazetteer)} known drug names")
         except Exception as e:
             print(f"Error initializing enhanced biomedical NER: {e}")
             raise
@@ -117,28 +131,8 @@ class MedicineExtractor:
         Returns:
             Preprocessed text
         """
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Replace common abbreviations
-        replacements = {
-            'mg': ' milligrams ',
-            'ml': ' milliliters ',
-            'g': ' grams ',
-            'mcg': ' micrograms ',
-            'tabs': ' tablets ',
-            'tab': ' tablet ',
-            'caps': ' capsules ',
-            'cap': ' capsule '
-        }
-        
-        for abbr, full in replacements.items():
-            text = re.sub(r'\b' + abbr + r'\b', full, text)
-        
-        return text
+        # Lowercase, collapse whitespace and expand dosage abbreviations in one pass
+        return self.normalizer(text)
     
     def extract_medicines(self, text, confidence_threshold=0.7):
         """Extract medicine names from the given text using enhanced biomedical NER.
@@ -172,20 +166,22 @@ class MedicineExtractor:
             List of extracted medicine names
         """
         try:
-            # Process the entire conversation with the biomedical NER
-            # This is more effective than sentence-by-sentence as it captures context
-            drug_entities = self.ner.extract_entities_from_conversation(conversation_text, entity_type="DRUG")
-            
-            # Filter by confidence threshold and extract just the text
-            medicines = [entity['text'] for entity in drug_entities if entity['score'] >= confidence_threshold]
+            if self.cascade is not None:
+                # Gazetteer pass over every sentence, NER only for unexplained ones
+                medicines = self.cascade.extract(conversation_text, confidence_threshold=confidence_threshold)
+            else:
+                # Process the entire conversation with the biomedical NER
+                # This is more effective than sentence-by-sentence as it captures context
+                drug_entities = self.ner.extract_entities_from_conversation(conversation_text, entity_type="DRUG")
+                
+                # Filter by confidence threshold and extract just the text
+                medicines = [entity['text'] for entity in drug_entities if entity['score'] >= confidence_threshold]
             
             # Add rule-based extraction for common drug names that might be missed
             # This helps catch medicines that the model might not recognize
-            for drug in self.ner.common_drugs:
-                # Check if the drug name appears in the conversation (case-insensitive)
-                if re.search(r'\b' + re.escape(drug) + r'\b', conversation_text.lower()):
-                    if drug not in medicines:
-                        medicines.append(drug)
+            for drug in self.common_drug_gazetteer.terms_in(conversation_text):
+                if drug not in medicines:
+                    medicines.append(drug)
             
             # Remove duplicates and sort
             unique_medicines = sorted(list(set(medicines)))
@@ -197,6 +193,34 @@ class MedicineExtractor:
             print(f"Error extracting medicines from conversation: {e}")
             return []
 
+    def cascade_stats(self):
+        """Return the cascade routing metrics.
+        
+        Returns:
+            Dictionary with total sentences, sentences routed to the NER model
+            and the routed fraction, or None if the cascade is disabled
+        """
+        return self.cascade.stats() if self.cascade is not None else None
+    
+    def with_reloaded_gazetteers(self):
+        """Create a copy of the extractor that uses the current FAERS drug vocabulary.
+        
+        The copy shares the loaded NER model; only the gazetteer of the
+        cascade is reloaded. This extractor is left unchanged, so requests
+        using it are not affected.
+        
+        Returns:
+            MedicineExtractor instance
+        """
+        extractor = copy.copy(self)
+        if self.cascade is not None:
+            extractor.cascade = copy.copy(self.cascade)
+            extractor.cascade.gazetteer = load_faers_gazetteer(
+                'drug', fallback_terms=FALLBACK_MEDICINES + self.ner.common_drugs
+            )
+            extractor.cascade.reset_stats()
+        return extractor
+
 # Example usage
 def main():
     """Example usage of the MedicineExtractor class."""
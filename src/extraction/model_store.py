@@ -0,0 +1,194 @@
+"""Local Model Store Module.
+
+This module keeps the NER and Whisper models in a local directory
+(MODEL_CACHE_DIR, default ./model_cache) in formats that are memory-mapped at
+load time instead of deserialized:
+
+    ner/<model name>/        save_pretrained output with safetensors weights
+                             (plus model.onnx when exported for the onnx backend)
+    whisper/<name>.pt        Whisper state dict saved for torch.load(mmap=True)
+
+Worker processes on one node that load the same files share their physical
+pages through the OS page cache, and startup does not depend on the Hugging
+Face hub or network access. Install the models once with:
+
+    python src/extraction/model_store.py --ner alvaroalon2/biobert_genetic_ner --whisper tiny base
+"""
+
+import os
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_MODEL_CACHE_DIR = PROJECT_ROOT / "model_cache"
+
+def model_cache_dir():
+    """Get the local model store directory.
+
+    Returns:
+        Path from the MODEL_CACHE_DIR environment variable, or ./model_cache
+    """
+    return Path(os.environ.get("MODEL_CACHE_DIR") or DEFAULT_MODEL_CACHE_DIR)
+
+def ner_model_path(model_name, cache_dir=None):
+    """Get the store directory for a Hugging Face model name."""
+    cache_dir = Path(cache_dir) if cache_dir else model_cache_dir()
+    return cache_dir / "ner" / model_name.replace("/", "--")
+
+def whisper_model_path(name, cache_dir=None):
+    """Get the store file for a Whisper model."""
+    cache_dir = Path(cache_dir) if cache_dir else model_cache_dir()
+    return cache_dir / "whisper" / f"{name}.pt"
+
+def resolve_ner_model(model_name, cache_dir=None):
+    """Resolve a model name to a local directory when one is available.
+
+    Args:
+        model_name: Hugging Face model name or local model directory
+        cache_dir: Model store directory. Default is None, which uses MODEL_CACHE_DIR
+
+    Returns:
+        Local model directory, or model_name unchanged if the model is not
+        in the store (it is then loaded through the Hugging Face hub cache)
+    """
+    if Path(model_name).is_dir():
+        return str(model_name)
+    local_path = ner_model_path(model_name, cache_dir)
+    if (local_path / "config.json").exists():
+        return str(local_path)
+    return model_name
+
+def install_ner_model(model_name, cache_dir=None, export_onnx_model=False):
+    """Download a token classification model into the store.
+
+    Args:
+        model_name: Hugging Face model name
+        cache_dir: Model store directory. Default is None, which uses MODEL_CACHE_DIR
+        export_onnx_model: Also export model.onnx for the onnx backend
+
+    Returns:
+        Path of the stored model directory
+    """
+    from transformers import AutoTokenizer, AutoModelForTokenClassification
+
+    local_path = ner_model_path(model_name, cache_dir)
+    print(f"Installing NER model {model_name} to {local_path}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForTokenClassification.from_pretrained(model_name)
+
+    # safetensors weights are memory-mapped by from_pretrained
+    local_path.mkdir(parents=True, exist_ok=True)
+    tokenizer.save_pretrained(str(local_path))
+    model.save_pretrained(str(local_path), safe_serialization=True)
+
+    if export_onnx_model:
+        try:
+            from .ner_backends import export_onnx
+        except ImportError:
+            # Run as a script (python src/extraction/model_store.py)
+            from ner_backends import export_onnx
+        export_onnx(local_path)
+
+    return local_path
+
+def install_whisper_model(name, cache_dir=None):
+    """Download a Whisper model and store it for memory-mapped loading.
+
+    Args:
+        name: Whisper model name (e.g. "tiny", "base")
+        cache_dir: Model store directory. Default is None, which uses MODEL_CACHE_DIR
+
+    Returns:
+        Path of the stored model file
+    """
+    import dataclasses
+    import torch
+    import whisper
+
+    path = whisper_model_path(name, cache_dir)
+    print(f"Installing Whisper model {name} to {path}")
+
+    # Reuse a checkpoint already in Whisper's own cache (~/.cache/whisper)
+    model = whisper.load_model(name, device="cpu")
+    alignment_heads = getattr(whisper, "_ALIGNMENT_HEADS", {}).get(name)
+
+    checkpoint = {
+        'dims': dataclasses.asdict(model.dims),
+        'model_state_dict': model.state_dict(),
+        'alignment_heads': alignment_heads.decode('ascii') if alignment_heads else None
+    }
+
+    # Write to a temporary file first so workers never map a partial file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    torch.save(checkpoint, str(tmp_path))
+    tmp_path.replace(path)
+    return path
+
+def load_whisper_model(name, device=None, cache_dir=None):
+    """Load a Whisper model, memory-mapping it from the store when installed.
+
+    Args:
+        name: Whisper model name (e.g. "tiny", "base")
+        device: Device to load the model on. Default is None, which uses
+                CUDA when available
+        cache_dir: Model store directory. Default is None, which uses MODEL_CACHE_DIR
+
+    Returns:
+        whisper.model.Whisper instance
+    """
+    import torch
+    import whisper
+    from whisper.model import ModelDimensions, Whisper
+
+    if device is None:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    path = whisper_model_path(name, cache_dir)
+    if not path.exists():
+        # Not installed: fall back to Whisper's own loader and cache (~/.cache/whisper)
+        return whisper.load_model(name, device=device)
+
+    # Tensors stay backed by the file's pages instead of being read into memory
+    checkpoint = torch.load(str(path), map_location="cpu", mmap=True, weights_only=True)
+    dims = ModelDimensions(**checkpoint['dims'])
+
+    if checkpoint['alignment_heads']:
+        # Build the module without allocating weights, then adopt the mapped tensors
+        with torch.device("meta"):
+            model = Whisper(dims)
+        model.load_state_dict(checkpoint['model_state_dict'], assign=True)
+        model.set_alignment_heads(checkpoint['alignment_heads'].encode('ascii'))
+    else:
+        model = Whisper(dims)
+        model.load_state_dict(checkpoint['model_state_dict'], assign=True)
+
+    return model.to(device)
+
+def main():
+    """Install models into the local model store."""
+    parser = argparse.ArgumentParser(description="Install models into the local model store")
+    parser.add_argument("--ner", nargs="*", default=[], help="Hugging Face NER model names")
+    parser.add_argument("--whisper", nargs="*", default=[], help="Whisper model names (e.g. tiny base)")
+    parser.add_argument("--onnx", action="store_true", help="Also export NER models to ONNX")
+    parser.add_argument("--cache-dir", default=None, help="Model store directory (default: MODEL_CACHE_DIR)")
+    args = parser.parse_args()
+
+    if not args.ner and not args.whisper:
+        parser.error("nothing to install: pass --ner and/or --whisper model names")
+
+    for model_name in args.ner:
+        try:
+            install_ner_model(model_name, cache_dir=args.cache_dir, export_onnx_model=args.onnx)
+        except Exception as e:
+            print(f"Error installing NER model {model_name}: {e}")
+
+    for name in args.whisper:
+        try:
+            install_whisper_model(name, cache_dir=args.cache_dir)
+        except Exception as e:
+            print(f"Error installing Whisper model {name}: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Negation Detection Module.
+
+This module implements a NegEx-style negation detector for clinical
+conversations. All trigger phrases are compiled into a single regular
+expression once, and the negation scopes of a sentence are computed in one
+pass over its trigger and token offsets, so the negation status of every
+entity in the sentence is resolved at once.
+
+Trigger categories:
+    pre-negation:     negate the words that follow ("no", "denies", "free of")
+    post-negation:    negate the words that precede ("... was ruled out")
+    pseudo-negation:  look like triggers but do not negate ("no increase",
+                      "not sure"); they are matched and ignored
+    termination:      end a negation scope early ("but", "however")
+
+A conjunction or comma ends a scope only when a new clause follows it ("I deny
+chest pain and have nausea"), so negated lists ("no fever, chills or nausea")
+stay negated.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+
+PRE_NEGATION_TRIGGERS = [
+    "no", "not", "without", "deny", "denies", "denied", "denying",
+    "negative for", "free of", "absence of", "never", "never had",
+    "no signs of", "no evidence of", "no history of", "no complaints of",
+    "haven't had", "hasn't had", "have not had", "has not had",
+    "didn't have", "did not have", "don't have", "do not have",
+    "doesn't have", "does not have", "not experiencing", "not having"
+]
+
+POST_NEGATION_TRIGGERS = [
+    "was ruled out", "were ruled out", "is ruled out", "has been ruled out",
+    "is absent", "was absent", "are absent", "has resolved", "have resolved",
+    "went away", "has gone away", "is gone", "was negative", "is negative"
+]
+
+PSEUDO_NEGATIONS = [
+    "no increase", "no change", "no further", "no longer", "not only",
+    "not necessarily", "not sure", "not certain", "not cause", "not caused",
+    "without difficulty", "gram negative", "no doubt", "not just",
+    "not worse", "not better"
+]
+
+TERMINATION_TERMS = [
+    "but", "however", "although", "though", "except", "aside from",
+    "apart from", "yet", "which", "still", "because", "since", "as well as",
+    "other than", "whereas"
+]
+
+# Conjunctions that end a negation scope when followed by a clause opener
+CLAUSE_CONJUNCTIONS = ["and", "or", "but", "so", "then"]
+
+CLAUSE_OPENERS = [
+    "i", "i'm", "i've", "he", "she", "they", "we", "it", "you", "patient",
+    "have", "has", "had", "am", "is", "are", "was", "were", "been",
+    "feel", "feels", "felt", "feeling", "get", "gets", "got", "getting",
+    "started", "starting", "developed", "noticed", "experienced", "experiencing",
+    "now", "also", "then", "still", "do", "does", "did"
+]
+
+class NegationDetector:
+    """NegEx-style negation detector with precompiled triggers."""
+
+    def __init__(self, pre_triggers=None, post_triggers=None, pseudo_negations=None,
+                 termination_terms=None, clause_openers=None, scope_tokens=5):
+        """Compile the trigger phrases.
+
+        Args:
+            pre_triggers: Phrases negating the words that follow them
+            post_triggers: Phrases negating the words that precede them
+            pseudo_negations: Phrases that look like triggers but do not negate
+            termination_terms: Phrases that end a negation scope
+            clause_openers: Words that start a new clause after a conjunction or comma
+            scope_tokens: Maximum number of word tokens in a negation scope
+        """
+        self.scope_tokens = scope_tokens
+
+        self.phrase_kinds = {}
+        # Later categories win if a phrase is listed twice, pseudo-negations last
+        for kind, phrases in (
+            ('pre', PRE_NEGATION_TRIGGERS if pre_triggers is None else pre_triggers),
+            ('post', POST_NEGATION_TRIGGERS if post_triggers is None else post_triggers),
+            ('termination', TERMINATION_TERMS if termination_terms is None else termination_terms),
+            ('pseudo', PSEUDO_NEGATIONS if pseudo_negations is None else pseudo_negations),
+        ):
+            for phrase in phrases:
+                self.phrase_kinds[self._phrase_key(phrase)] = kind
+
+        # Longest phrases first so "no increase" wins over "no" at the same position
+        phrases = sorted(self.phrase_kinds, key=len, reverse=True)
+        alternation = '|'.join(self._phrase_regex(phrase) for phrase in phrases)
+        openers = CLAUSE_OPENERS if clause_openers is None else clause_openers
+        conjunctions = '|'.join(re.escape(word) for word in CLAUSE_CONJUNCTIONS)
+        opener_alternation = '|'.join(
+            self._phrase_regex(phrase) for phrase in sorted(openers, key=len, reverse=True)
+        )
+        self.trigger_pattern = re.compile(
+            r"(?P<clause>(?:,\s*(?:(?:" + conjunctions + r")\s+)?|(?<![\w'’])(?:"
+            + conjunctions + r")\s+)(?=(?:" + opener_alternation + r")(?![\w'’])))"
+            r"|(?<![\w'’])(?:" + alternation + r")(?![\w'’])|(?P<punct>[.;:!?])",
+            re.IGNORECASE
+        )
+        self.token_pattern = re.compile(r"\w+(?:['’]\w+)?")
+
+    @staticmethod
+    def _phrase_key(phrase):
+        """Normalize a phrase for lookup (lowercase, single spaces, plain apostrophes)."""
+        return ' '.join(phrase.lower().replace('’', "'").split())
+
+    @staticmethod
+    def _phrase_regex(phrase):
+        """Build the pattern for a phrase, tolerant of whitespace and apostrophe style."""
+        words = [re.escape(word).replace("'", "['’]") for word in phrase.split()]
+        return r'\s+'.join(words)
+
+    def negated_scopes(self, sentence):
+        """Compute the negated character ranges of a sentence.
+
+        Args:
+            sentence: The sentence text
+
+        Returns:
+            List of (start, end) character ranges that are negated
+        """
+        tokens = [match.span() for match in self.token_pattern.finditer(sentence)]
+        token_starts = [start for start, _ in tokens]
+        token_ends = [end for _, end in tokens]
+
+        # One scan collects every trigger, termination term and clause boundary
+        triggers = []
+        boundaries = [(len(sentence), len(sentence))]
+        for match in self.trigger_pattern.finditer(sentence):
+            if match.group('punct') is not None or match.group('clause') is not None:
+                boundaries.append(match.span())
+                continue
+            kind = self.phrase_kinds.get(self._phrase_key(match.group(0)))
+            if kind in ('pre', 'post'):
+                triggers.append((kind, match.start(), match.end()))
+                # A trigger also ends the scope of the previous one
+                boundaries.append(match.span())
+            elif kind == 'termination':
+                boundaries.append(match.span())
+        boundaries.sort()
+        boundary_starts = [start for start, _ in boundaries]
+        boundary_ends = sorted(end for _, end in boundaries)
+
+        scopes = []
+        for kind, start, end in triggers:
+            if kind == 'pre':
+                # Up to scope_tokens tokens after the trigger, stopping at the next boundary
+                next_boundary = boundary_starts[bisect_left(boundary_starts, end)]
+                first_token = bisect_left(token_starts, end)
+                last_token = min(first_token + self.scope_tokens, len(tokens)) - 1
+                window_end = token_ends[last_token] if last_token >= first_token else end
+                scopes.append((end, min(window_end, next_boundary)))
+            else:
+                # Up to scope_tokens tokens before the trigger, stopping at the previous boundary
+                position = bisect_right(boundary_ends, start) - 1
+                previous_boundary = boundary_ends[position] if position >= 0 else 0
+                last_token = bisect_right(token_ends, start) - 1
+                first_token = max(last_token - self.scope_tokens + 1, 0)
+                window_start = token_starts[first_token] if last_token >= first_token else start
+                scopes.append((max(window_start, previous_boundary), start))
+
+        return [(start, end) for start, end in scopes if end > start]
+
+    def detect(self, sentence, spans):
+        """Determine the negation status of several entities in a sentence.
+
+        Args:
+            sentence: The sentence text
+            spans: List of (start, end) character spans of entities in the sentence
+
+        Returns:
+            List of booleans, True where the entity is negated
+        """
+        if not spans:
+            return []
+
+        scopes = self.negated_scopes(sentence)
+        if not scopes:
+            return [False] * len(spans)
+
+        return [
+            any(start < scope_end and end > scope_start for scope_start, scope_end in scopes)
+            for start, end in spans
+        ]
+
+    def is_negated(self, sentence, span):
+        """Determine whether a single entity span is negated in a sentence."""
+        return self.detect(sentence, [span])[0]
@@ -0,0 +1,457 @@
+"""Inference backends for biomedical NER.
+
+This module provides interchangeable inference backends for the token
+classification model used by BiomedicalNER. Every backend is a callable that
+takes a string (or a list of strings) and returns entities in the same format
+as the transformers "ner" pipeline with aggregation_strategy="simple".
+
+Available backends:
+    transformers: PyTorch model served through the transformers pipeline
+                  (optionally dynamic int8 quantized)
+    onnx:         Model exported once to ONNX and served through ONNX Runtime.
+                  Only needs onnxruntime, tokenizers and numpy at inference
+                  time, so lightweight workers never import PyTorch
+    light:        Averaged perceptron tagger trained from the FAERS
+                  vocabularies (see light_ner.py); pure Python and much
+                  faster per sentence, at lower recall
+
+Frameworks are imported by the backend that uses them, when it is created, so
+importing this module (and the extractors built on it) stays cheap.
+"""
+
+import os
+import json
+import inspect
+import argparse
+from pathlib import Path
+try:
+    from .model_store import resolve_ner_model
+except ImportError:
+    # Run as a script (python src/extraction/ner_backends.py)
+    from model_store import resolve_ner_model
+
+DEFAULT_BACKEND = "transformers"
+ONNX_FILENAME = "model.onnx"
+
+def quantize_env_default():
+    """Read the deployment-wide quantization setting from the environment.
+
+    Returns:
+        True if NER_QUANTIZE is set to a truthy value ("1", "true", "yes", "on")
+    """
+    return os.environ.get("NER_QUANTIZE", "").strip().lower() in ("1", "true", "yes", "on")
+
+def backend_env_default():
+    """Read the deployment-wide inference backend from the environment.
+
+    Returns:
+        The value of NER_BACKEND, or "transformers" if it is not set
+    """
+    return os.environ.get("NER_BACKEND", DEFAULT_BACKEND).strip().lower() or DEFAULT_BACKEND
+
+def _split_tag(label):
+    """Split a BIO label into its prefix and entity tag.
+
+    Mirrors the transformers pipeline: labels without a B-/I- prefix
+    (such as "O") are treated as inside tokens of their own tag.
+    """
+    if label.startswith("B-"):
+        return "B", label[2:]
+    if label.startswith("I-"):
+        return "I", label[2:]
+    return "I", label
+
+def aggregate_simple(text, offsets, special_tokens_mask, logits, id2label, tokens=None, decode=None):
+    """Group token predictions into entities like aggregation_strategy="simple".
+
+    As in the pipeline, an entity's word is its tokens decoded back to a
+    string, so it can differ from the source text between start and end
+    (lowercased by uncased vocabularies, spaces around punctuation).
+
+    Args:
+        text: The text that was tokenized
+        offsets: Character (start, end) offsets for each token
+        special_tokens_mask: 1 for special tokens ([CLS], [SEP], padding), else 0
+        logits: Array of shape (num_tokens, num_labels)
+        id2label: Mapping from label id to label name
+        tokens: Token strings, needed to decode words (unknown tokens should be
+                replaced by their source text, as the pipeline does).
+                Default is None, which uses the source text between start
+                and end as the word
+        decode: Function joining a list of tokens into a string
+                Default is None, which joins them with spaces
+
+    Returns:
+        List of entity dictionaries with entity_group, score, word, start and end
+    """
+    import numpy as np
+
+    # Softmax over the label dimension
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    probabilities = np.exp(shifted)
+    probabilities /= probabilities.sum(axis=-1, keepdims=True)
+    label_ids = probabilities.argmax(axis=-1)
+
+    groups = []
+    current = None
+    for index, (start, end) in enumerate(offsets):
+        if special_tokens_mask[index] or start == end:
+            continue
+
+        label_id = int(label_ids[index])
+        prefix, tag = _split_tag(id2label[label_id])
+        score = float(probabilities[index, label_id])
+
+        if current is not None and tag == current['tag'] and prefix != "B":
+            current['end'] = end
+            current['scores'].append(score)
+            current['tokens'].append(index)
+        else:
+            if current is not None:
+                groups.append(current)
+            current = {'tag': tag, 'start': start, 'end': end, 'scores': [score], 'tokens': [index]}
+
+    if current is not None:
+        groups.append(current)
+
+    def word(group):
+        if tokens is None:
+            return text[group['start']:group['end']]
+        group_tokens = [tokens[index] for index in group['tokens']]
+        return decode(group_tokens) if decode is not None else " ".join(group_tokens)
+
+    return [
+        {
+            'entity_group': group['tag'],
+            'score': float(np.mean(group['scores'])),
+            'word': word(group),
+            'start': group['start'],
+            'end': group['end']
+        }
+        for group in groups if group['tag'] != "O"
+    ]
+
+class TransformersBackend:
+    """Backend running the PyTorch model through the transformers pipeline."""
+
+    name = "transformers"
+
+    def __init__(self, model_name, quantize=False):
+        """Load the tokenizer and model and build the NER pipeline.
+
+        Args:
+            model_name: Hugging Face model name or local model directory
+                        (names installed in the local model store are loaded
+                        from there, without network access)
+            quantize: Apply dynamic int8 quantization to the linear layers
+        """
+        import torch
+        from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
+
+        self.model_name = model_name
+        self.quantized = bool(quantize)
+
+        # Load tokenizer and model (safetensors weights are memory-mapped)
+        model_path = resolve_ner_model(model_name)
+        local_files_only = Path(model_path).is_dir()
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=local_files_only)
+        self.model = AutoModelForTokenClassification.from_pretrained(model_path, local_files_only=local_files_only)
+        self.model.eval()
+
+        # Set device (quantized kernels are CPU-only)
+        use_cuda = torch.cuda.is_available() and not self.quantized
+        self.device = torch.device("cuda" if use_cuda else "cpu")
+        self.model.to(self.device)
+        print(f"Device set to use {self.device}")
+
+        if self.quantized:
+            # Replace nn.Linear weights with int8 and quantize activations on the fly
+            self.model = torch.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+        # Create NER pipeline with the biomedical model
+        self.pipeline = pipeline(
+            "ner",
+            model=self.model,
+            tokenizer=self.tokenizer,
+            device=0 if use_cuda else -1,
+            aggregation_strategy="simple"  # Merge tokens with same entity
+        )
+
+    @property
+    def identity(self):
+        """String identifying the model and inference configuration."""
+        return f"{self.name}:{self.model_name}:{'int8' if self.quantized else 'fp32'}"
+
+    def count_tokens(self, text):
+        """Count the model tokens of a text, excluding special tokens."""
+        return len(self.tokenizer(text, add_special_tokens=False)['input_ids'])
+
+    def set_num_threads(self, threads):
+        """Set the number of CPU threads used by this process for inference."""
+        import torch
+        torch.set_num_threads(threads)
+
+    def __call__(self, texts):
+        """Run NER on a string or a list of strings."""
+        return self.pipeline(texts)
+
+class OnnxBackend:
+    """Backend running an exported ONNX model through ONNX Runtime."""
+
+    name = "onnx"
+
+    def __init__(self, model_dir, onnx_path=None, intra_op_threads=None, max_length=512):
+        """Create an ONNX Runtime session for an exported model.
+
+        Args:
+            model_dir: Local model directory containing config.json and tokenizer.json
+            onnx_path: Path to the exported ONNX model
+                       Default is None, which uses model.onnx inside model_dir
+            intra_op_threads: Number of threads used inside each operator
+                              Default is None, which reads NER_INTRA_OP_THREADS
+                              or falls back to the number of CPU cores
+            max_length: Maximum number of tokens per input (longer inputs are truncated)
+        """
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        onnx_path = Path(onnx_path) if onnx_path else model_dir / ONNX_FILENAME
+        if not onnx_path.exists():
+            raise FileNotFoundError(
+                f"ONNX model not found at {onnx_path}. "
+                f"Export it first with: python src/extraction/ner_backends.py {model_dir}"
+            )
+
+        self.model_name = str(model_dir)
+        self.quantized = False
+        self.device = "cpu"
+
+        # Label names come from the model config
+        with open(model_dir / "config.json") as f:
+            config = json.load(f)
+        self.id2label = {int(label_id): label for label_id, label in config['id2label'].items()}
+
+        # The fast tokenizer returns character offsets without importing transformers
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.no_padding()
+        # Token counts drive sentence windowing, so they must not stop at max_length
+        self.counting_tokenizer = Tokenizer.from_str(self.tokenizer.to_str())
+        self.counting_tokenizer.no_truncation()
+        self.unk_token = getattr(self.tokenizer.model, 'unk_token', None)
+
+        if intra_op_threads is None:
+            intra_op_threads = int(os.environ.get("NER_INTRA_OP_THREADS", 0)) or os.cpu_count() or 1
+
+        self.onnx_path = onnx_path
+        self.intra_op_threads = intra_op_threads
+        # Filled in with the session, which is only created in the process that runs inference
+        self.input_names = None
+
+    @property
+    def session(self):
+        """This process's ONNX Runtime session.
+
+        ONNX Runtime thread pools do not survive fork, so the session is
+        created lazily per process (worker pools fork after loading), and
+        never in a process that only forks workers.
+        """
+        if getattr(self, '_session_pid', None) != os.getpid():
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+            options.intra_op_num_threads = self.intra_op_threads
+            options.inter_op_num_threads = 1
+
+            self._session = ort.InferenceSession(
+                str(self.onnx_path), options, providers=["CPUExecutionProvider"]
+            )
+            self._session_pid = os.getpid()
+            self.input_names = [model_input.name for model_input in self._session.get_inputs()]
+            print(f"ONNX Runtime session created with {self.intra_op_threads} intra-op threads")
+        return self._session
+
+    def set_num_threads(self, threads):
+        """Set the number of intra-op threads used by this process for inference."""
+        if threads != self.intra_op_threads:
+            self.intra_op_threads = threads
+            self._session_pid = None
+
+    @property
+    def identity(self):
+        """String identifying the model and inference configuration."""
+        return f"{self.name}:{self.model_name}"
+
+    def count_tokens(self, text):
+        """Count the model tokens of a text, excluding special tokens."""
+        return len(self.counting_tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def decode_tokens(self, tokens):
+        """Join tokens into a string like the pipeline's convert_tokens_to_string."""
+        if self.tokenizer.decoder is None:
+            return " ".join(tokens)
+        return self.tokenizer.decoder.decode(tokens)
+
+    def __call__(self, texts):
+        """Run NER on a string or a list of strings."""
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        if not batch:
+            return []
+
+        import numpy as np
+
+        encodings = self.tokenizer.encode_batch(batch)
+
+        # Pad the batch to the longest sequence
+        max_tokens = max(len(encoding.ids) for encoding in encodings)
+        input_ids = np.zeros((len(batch), max_tokens), dtype=np.int64)
+        attention_mask = np.zeros((len(batch), max_tokens), dtype=np.int64)
+        token_type_ids = np.zeros((len(batch), max_tokens), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            length = len(encoding.ids)
+            input_ids[row, :length] = encoding.ids
+            attention_mask[row, :length] = encoding.attention_mask
+            token_type_ids[row, :length] = encoding.type_ids
+
+        inputs = {
+            'input_ids': input_ids,
+            'attention_mask': attention_mask,
+            'token_type_ids': token_type_ids
+        }
+        session = self.session
+        logits = session.run(None, {name: inputs[name] for name in self.input_names})[0]
+
+        results = []
+        for row, (text, encoding) in enumerate(zip(batch, encodings)):
+            length = len(encoding.ids)
+            results.append(aggregate_simple(
+                text,
+                encoding.offsets,
+                encoding.special_tokens_mask,
+                logits[row, :length],
+                self.id2label,
+                tokens=[
+                    text[start:end] if token == self.unk_token else token
+                    for token, (start, end) in zip(encoding.tokens, encoding.offsets)
+                ],
+                decode=self.decode_tokens
+            ))
+
+        return results[0] if single else results
+
+def export_onnx(model_dir, output_path=None, opset=14):
+    """Export a local token classification model to ONNX.
+
+    This only needs to run once per model; it requires PyTorch and
+    transformers, but serving the exported model does not.
+
+    Args:
+        model_dir: Local model directory (as written by save_pretrained)
+        output_path: Where to write the ONNX model
+                     Default is None, which writes model.onnx inside model_dir
+        opset: ONNX opset version
+
+    Returns:
+        Path to the exported ONNX model
+    """
+    import torch
+    from transformers import AutoTokenizer, AutoModelForTokenClassification
+
+    model_dir = Path(model_dir)
+    output_path = Path(output_path) if output_path else model_dir / ONNX_FILENAME
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForTokenClassification.from_pretrained(model_dir)
+    model.eval()
+
+    # The ONNX backend reads the fast tokenizer definition directly
+    if not (model_dir / "tokenizer.json").exists():
+        tokenizer.save_pretrained(model_dir)
+
+    class LogitsOnly(torch.nn.Module):
+        """Wrapper returning a plain logits tensor instead of a ModelOutput."""
+
+        def __init__(self, wrapped):
+            super().__init__()
+            self.wrapped = wrapped
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.wrapped(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids
+            ).logits
+
+    sample = tokenizer("patient takes lisinopril 10 milligrams", return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    sample_inputs = tuple(
+        sample[name] if name in sample else torch.zeros_like(sample['input_ids'])
+        for name in input_names
+    )
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["logits"]}
+
+    print(f"Exporting {model_dir} to {output_path} (opset {opset})")
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # Use the TorchScript exporter, which supports dynamic_axes
+        export_kwargs['dynamo'] = False
+    with torch.no_grad():
+        torch.onnx.export(
+            LogitsOnly(model),
+            sample_inputs,
+            str(output_path),
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            **export_kwargs
+        )
+
+    print(f"Saved ONNX model to {output_path}")
+    return output_path
+
+def create_backend(backend, model_name, quantize=False, **options):
+    """Create an inference backend by name.
+
+    Args:
+        backend: Backend name ("transformers", "onnx" or "light")
+        model_name: Model name or local model directory (for the light
+                    backend, a trained model file, otherwise the default
+                    light model in the model store is used)
+        quantize: Apply dynamic int8 quantization (transformers backend only)
+        **options: Extra backend-specific keyword arguments
+
+    Returns:
+        A callable backend instance
+    """
+    if backend == "transformers":
+        return TransformersBackend(model_name, quantize=quantize)
+    if backend == "onnx":
+        if quantize:
+            print("Warning: NER_QUANTIZE is ignored by the onnx backend")
+        return OnnxBackend(resolve_ner_model(model_name), **options)
+    if backend == "light":
+        from .light_ner import LightBackend
+        return LightBackend(model_name if Path(model_name).is_file() else None)
+    raise ValueError(f"Unknown NER backend: {backend}")
+
+def main():
+    """Export a local model directory to ONNX for the onnx backend."""
+    parser = argparse.ArgumentParser(description="Export a token classification model to ONNX")
+    parser.add_argument("model_dir", help="Local model directory (as written by save_pretrained)")
+    parser.add_argument("--output", default=None, help="Output path (default: <model_dir>/model.onnx)")
+    parser.add_argument("--opset", type=int, default=14, help="ONNX opset version")
+    args = parser.parse_args()
+
+    try:
+        export_onnx(args.model_dir, output_path=args.output, opset=args.opset)
+    except Exception as e:
+        print(f"Error exporting model: {e}")
+
+if __name__ == "__main__":
+    main()
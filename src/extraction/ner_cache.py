@@ -0,0 +1,186 @@
+"""NER Result Cache Module.
+
+This module caches processed NER results per sentence so repeated sentences
+("Any other symptoms?", "How long have you been taking it?") cost a dictionary
+lookup instead of a transformer forward pass.
+
+The cache has two tiers:
+    memory:     an LRU bounded by entry count and approximate size in bytes
+    persistent: an optional SQLite file shared by all worker processes on a
+                node (and across restarts)
+
+Keys combine the model identity with the normalized sentence text, so results
+from different models or inference configurations never mix.
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_MB = 64
+
+class NERCache:
+    """Two-tier LRU cache for sentence-level NER results."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_MB * 1024 * 1024,
+                 persistent_path=None):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of sentences kept in memory
+            max_bytes: Approximate memory budget for cached results in bytes
+            persistent_path: Optional SQLite file for the shared persistent tier
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.persistent_path = Path(persistent_path) if persistent_path else None
+
+        self._entries = OrderedDict()  # key -> (serialized entities, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # The SQLite connection is opened lazily per process (safe across fork)
+        self._connection = None
+        self._connection_pid = None
+
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        """Create a cache configured from the environment.
+
+        NER_CACHE_SIZE sets the maximum number of cached sentences (0 disables
+        the cache), NER_CACHE_MAX_MB the memory budget and NER_CACHE_PATH the
+        SQLite file of the persistent tier.
+
+        Returns:
+            NERCache instance, or None if caching is disabled
+        """
+        max_entries = int(os.environ.get("NER_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+        if max_entries <= 0:
+            return None
+        max_mb = float(os.environ.get("NER_CACHE_MAX_MB", DEFAULT_MAX_MB))
+        return cls(
+            max_entries=max_entries,
+            max_bytes=int(max_mb * 1024 * 1024),
+            persistent_path=os.environ.get("NER_CACHE_PATH") or None
+        )
+
+    @staticmethod
+    def make_key(model_identity, text):
+        """Build the cache key for a model and a normalized sentence."""
+        return hashlib.sha1(f"{model_identity}\0{text}".encode('utf-8')).hexdigest()
+
+    def _db(self):
+        """Get this process's connection to the persistent tier."""
+        if self.persistent_path is None:
+            return None
+        if self._connection is None or self._connection_pid != os.getpid():
+            self.persistent_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.persistent_path), timeout=5, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS ner_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            connection.commit()
+            self._connection = connection
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def _remember(self, key, value):
+        """Store a serialized value in the memory tier, evicting as needed."""
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def get(self, model_identity, text):
+        """Look up the cached entities for a sentence.
+
+        Args:
+            model_identity: String identifying the model configuration
+            text: The normalized sentence text
+
+        Returns:
+            A fresh list of entity dictionaries, or None on a miss
+        """
+        key = self.make_key(model_identity, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[0])
+
+            value = None
+            try:
+                db = self._db()
+                if db is not None:
+                    row = db.execute("SELECT value FROM ner_cache WHERE key = ?", (key,)).fetchone()
+                    value = row[0] if row else None
+            except sqlite3.Error as e:
+                print(f"Error reading persistent NER cache: {e}")
+
+            if value is None:
+                self.misses += 1
+                return None
+
+            self.persistent_hits += 1
+            self._remember(key, value)
+            return json.loads(value)
+
+    def put(self, model_identity, text, entities):
+        """Cache the entities for a sentence.
+
+        Args:
+            model_identity: String identifying the model configuration
+            text: The normalized sentence text
+            entities: List of JSON-serializable entity dictionaries
+        """
+        key = self.make_key(model_identity, text)
+        value = json.dumps(entities, separators=(',', ':'))
+        with self._lock:
+            self._remember(key, value)
+            try:
+                db = self._db()
+                if db is not None:
+                    db.execute("INSERT OR REPLACE INTO ner_cache (key, value) VALUES (?, ?)", (key, value))
+                    db.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing persistent NER cache: {e}")
+
+    def clear(self):
+        """Drop the memory tier and reset the counters (the persistent tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.persistent_hits = self.misses = 0
+
+    def stats(self):
+        """Return cache metrics.
+
+        Returns:
+            Dictionary with hit/miss counts, hit rate, entry count and memory use
+        """
+        lookups = self.hits + self.persistent_hits + self.misses
+        return {
+            'hits': self.hits,
+            'persistent_hits': self.persistent_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.persistent_hits) / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'bytes': self._bytes
+        }
@@ -0,0 +1,255 @@
+"""NER Worker Pool Module.
+
+This module runs BiomedicalNER inference in a pool of worker processes. The
+pool is forked after the model is loaded, so every worker shares the model
+weights with the parent through copy-on-write pages instead of holding its
+own copy, and model pre/post-processing runs outside the parent's GIL.
+
+Texts are submitted one by one through a queue and each worker micro-batches
+them: it waits a few milliseconds for more texts (from any request thread)
+and runs them through the model together. Results come back as futures.
+
+A BiomedicalNER with a pool attached submits its model calls to the pool
+transparently, so callers of extract_entities do not change. If a worker
+dies, the pool fails its pending texts at once and closes, and BiomedicalNER
+runs the model in-process from then on (workers are not re-forked, since
+forking a process with running threads is unsafe).
+"""
+
+import os
+import queue
+import atexit
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future
+
+DEFAULT_BATCH_WINDOW_MS = 5
+DEFAULT_MAX_BATCH = 32
+DEFAULT_TIMEOUT = 120
+# How often the collector checks that the workers are alive (seconds)
+WORKER_CHECK_INTERVAL = 0.5
+
+# Pools shared by all BiomedicalNER instances of the same model in this process
+_shared_pools = {}
+_shared_pools_lock = threading.Lock()
+
+def pool_env_default():
+    """Read the deployment-wide pool size from the environment.
+
+    Returns:
+        Number of workers from NER_POOL_WORKERS (0 disables the pool)
+    """
+    return int(os.environ.get("NER_POOL_WORKERS", 0))
+
+def _worker_main(ner, requests, results, threads, batch_window, max_batch):
+    """Worker loop: collect a micro-batch, run the model, send back results."""
+    if threads:
+        ner.ner_pipeline.set_num_threads(threads)
+
+    while True:
+        item = requests.get()
+        if item is None:
+            return
+
+        # Collect more texts for a few milliseconds to fill the batch
+        batch = [item]
+        stop = False
+        try:
+            while len(batch) < max_batch:
+                item = requests.get(timeout=batch_window)
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+        except queue.Empty:
+            pass
+
+        request_ids = [request_id for request_id, _ in batch]
+        try:
+            entities = ner._run_model([text for _, text in batch])
+            results.put([(request_id, result, None) for request_id, result in zip(request_ids, entities)])
+        except Exception as e:
+            results.put([(request_id, None, str(e)) for request_id in request_ids])
+
+        if stop:
+            return
+
+class NERWorkerPool:
+    """Pool of forked worker processes running NER model inference."""
+
+    def __init__(self, ner, workers=2, threads_per_worker=None, batch_window_ms=None,
+                 max_batch=DEFAULT_MAX_BATCH):
+        """Fork the worker processes.
+
+        Args:
+            ner: Loaded BiomedicalNER whose model the workers share
+            workers: Number of worker processes
+            threads_per_worker: CPU threads per worker for inference. Default is
+                                None, which splits the CPU cores between workers
+            batch_window_ms: How long a worker waits to fill a micro-batch.
+                             Default is None, which reads NER_POOL_BATCH_MS
+                             or uses 5 ms
+            max_batch: Maximum number of texts per forward pass
+        """
+        if threads_per_worker is None:
+            threads_per_worker = max((os.cpu_count() or 1) // workers, 1)
+        if batch_window_ms is None:
+            batch_window_ms = float(os.environ.get("NER_POOL_BATCH_MS", DEFAULT_BATCH_WINDOW_MS))
+
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.max_batch = max_batch
+
+        # Fork so workers inherit the loaded model without pickling or reloading it
+        context = multiprocessing.get_context("fork")
+        self._requests = context.Queue()
+        self._results = context.Queue()
+        self._processes = [
+            context.Process(
+                target=_worker_main,
+                args=(ner, self._requests, self._results, threads_per_worker, batch_window_ms / 1000, max_batch),
+                daemon=True
+            )
+            for _ in range(workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+        self._futures = {}
+        self._futures_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._closed = False
+
+        # A collector thread resolves futures as batches finish. It starts on
+        # the first submit, so pools forked while models load (one per model)
+        # are all forked before any pool thread runs
+        self._collector = None
+        atexit.register(self.close)
+
+        print(f"NER worker pool started with {workers} workers "
+              f"({threads_per_worker} threads each, {batch_window_ms} ms batch window)")
+
+    @property
+    def closed(self):
+        """Whether the pool was closed or lost a worker."""
+        return self._closed
+
+    def _collect(self):
+        """Resolve the futures of finished texts, watching for dead workers."""
+        while True:
+            try:
+                batch = self._results.get(timeout=WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                batch = []
+            except (EOFError, OSError):
+                # The queue was torn down at interpreter exit
+                return
+            if batch is None:
+                return
+            for request_id, entities, error in batch:
+                with self._futures_lock:
+                    future = self._futures.pop(request_id, None)
+                if future is None:
+                    continue
+                if error is None:
+                    future.set_result(entities)
+                else:
+                    future.set_exception(RuntimeError(f"NER worker failed: {error}"))
+
+            # A killed worker (e.g. out of memory) never answers its texts
+            dead = [process for process in self._processes if not process.is_alive()]
+            if dead and not self._closed:
+                self._fail_workers(dead)
+                return
+
+    def _fail_workers(self, dead):
+        """Close the pool after workers died, failing every pending text."""
+        with self._futures_lock:
+            self._closed = True
+            futures = list(self._futures.values())
+            self._futures.clear()
+
+        exit_codes = ", ".join(f"pid {process.pid} exit code {process.exitcode}" for process in dead)
+        print(f"NER worker pool lost {len(dead)} of {self.workers} workers ({exit_codes}); "
+              f"failing {len(futures)} pending texts and closing the pool")
+        error = RuntimeError(f"NER worker died ({exit_codes})")
+        for future in futures:
+            future.set_exception(error)
+
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+
+    def submit(self, preprocessed_text):
+        """Submit one preprocessed text for inference.
+
+        Args:
+            preprocessed_text: Text produced by the BiomedicalNER normalizer
+
+        Returns:
+            Future resolving to the grouped entities of the text
+        """
+        future = Future()
+        request_id = next(self._request_ids)
+        with self._futures_lock:
+            # Checked under the lock so a failing pool cannot miss this future
+            if self._closed:
+                raise RuntimeError("NER worker pool is closed")
+            if self._collector is None:
+                self._collector = threading.Thread(target=self._collect, name="ner-pool-collector",
+                                                   daemon=True)
+                self._collector.start()
+            self._futures[request_id] = future
+        self._requests.put((request_id, preprocessed_text))
+        return future
+
+    def run_model(self, preprocessed_texts, timeout=DEFAULT_TIMEOUT):
+        """Run the model on several texts through the pool and wait for the results.
+
+        Args:
+            preprocessed_texts: List of texts produced by the normalizer
+            timeout: Maximum seconds to wait for each text
+
+        Returns:
+            List with the grouped entities of each text
+        """
+        futures = [self.submit(text) for text in preprocessed_texts]
+        return [future.result(timeout=timeout) for future in futures]
+
+    def close(self):
+        """Stop the workers and the collector thread."""
+        with self._futures_lock:
+            if self._closed:
+                return
+            self._closed = True
+        for _ in self._processes:
+            self._requests.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        if self._collector is not None:
+            self._results.put(None)
+            self._collector.join(timeout=5)
+
+def shared_pool(ner, workers, **options):
+    """Get the pool for a model, forking it on first use.
+
+    BiomedicalNER instances with the same model identity (e.g. the ones inside
+    MedicineExtractor and SymptomExtractor) share one pool.
+
+    Args:
+        ner: Loaded BiomedicalNER
+        workers: Number of worker processes
+        **options: Extra NERWorkerPool options
+
+    Returns:
+        NERWorkerPool instance
+    """
+    with _shared_pools_lock:
+        pool = _shared_pools.get(ner.model_identity)
+        if pool is None or pool._closed:
+            pool = NERWorkerPool(ner, workers=workers, **options)
+            _shared_pools[ner.model_identity] = pool
+        return pool
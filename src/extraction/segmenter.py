@@ -0,0 +1,192 @@
+"""Token Budget Segmenter Module.
+
+This module splits conversation transcripts into segments sized for the NER
+model. Whisper transcripts often have few sentence terminators, so splitting
+on punctuation alone produces either sentences longer than the model's token
+limit (which would be silently truncated) or many tiny fragments (each a
+separate forward pass). The segmenter:
+
+    - packs consecutive short sentences together up to a token budget
+    - splits sentences longer than the budget into overlapping windows of
+      words, so entities on a window edge are seen whole in the next window
+
+Segments are slices of the original text and carry their start offset, so
+entity spans can be mapped back to the transcript and duplicates found in
+window overlaps can be reconciled by position.
+"""
+
+import re
+
+SENTENCE_BOUNDARY = re.compile(r'[.!?]\s+')
+WORD_PATTERN = re.compile(r'\S+')
+
+# BERT-style models accept 512 tokens including [CLS] and [SEP]
+DEFAULT_MAX_TOKENS = 510
+DEFAULT_STRIDE_TOKENS = 64
+
+class Segment:
+    """A slice of a transcript to be sent through the model."""
+
+    __slots__ = ('text', 'start')
+
+    def __init__(self, text, start):
+        """Create a segment.
+
+        Args:
+            text: The segment text
+            start: Offset of the segment in the source text
+        """
+        self.text = text
+        self.start = start
+
+    def __repr__(self):
+        return f"Segment(start={self.start}, text={self.text!r})"
+
+class TokenBudgetSegmenter:
+    """Segmenter packing short sentences and windowing long ones."""
+
+    def __init__(self, count_tokens, max_tokens=DEFAULT_MAX_TOKENS, stride_tokens=DEFAULT_STRIDE_TOKENS,
+                 pack_sentences=True):
+        """Initialize the segmenter.
+
+        Args:
+            count_tokens: Function returning the number of model tokens in a text
+            max_tokens: Token budget per segment
+            stride_tokens: Minimum number of tokens shared by consecutive
+                           windows of a long sentence; windows always share
+                           at least one whole word unless a window holds a
+                           single word
+            pack_sentences: Pack consecutive short sentences into one segment
+                            (disable to keep one segment per sentence)
+        """
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.stride_tokens = max(min(stride_tokens, max_tokens // 2), 1)
+        self.pack_sentences = pack_sentences
+
+    @staticmethod
+    def sentence_spans(text):
+        """Split text into sentences, keeping their character spans.
+
+        Sentences end at ".", "!" or "?" followed by whitespace; the terminator
+        stays with its sentence.
+
+        Args:
+            text: The source text
+
+        Returns:
+            List of (start, end) spans of non-empty sentences
+        """
+        spans = []
+        position = 0
+        for match in SENTENCE_BOUNDARY.finditer(text):
+            spans.append((position, match.start() + 1))
+            position = match.end()
+        spans.append((position, len(text)))
+        return [(start, end) for start, end in spans if text[start:end].strip()]
+
+    def segment(self, text):
+        """Split text into segments that fit the token budget.
+
+        Args:
+            text: The source text
+
+        Returns:
+            List of Segment objects in text order
+        """
+        segments = []
+        pack_start = pack_end = None
+        pack_tokens = 0
+
+        for start, end in self.sentence_spans(text):
+            tokens = self.count_tokens(text[start:end])
+
+            if tokens > self.max_tokens:
+                # Flush the current pack, then window the long sentence
+                if pack_start is not None:
+                    segments.append(Segment(text[pack_start:pack_end], pack_start))
+                    pack_start = None
+                segments.extend(self._windows(text, start, end))
+                continue
+
+            if (pack_start is not None and self.pack_sentences
+                    and pack_tokens + tokens <= self.max_tokens):
+                pack_end = end
+                pack_tokens += tokens
+                continue
+
+            if pack_start is not None:
+                segments.append(Segment(text[pack_start:pack_end], pack_start))
+            pack_start, pack_end, pack_tokens = start, end, tokens
+
+        if pack_start is not None:
+            segments.append(Segment(text[pack_start:pack_end], pack_start))
+
+        return segments
+
+    def _windows(self, text, start, end):
+        """Split a long sentence into overlapping windows of whole words."""
+        words = [match.span() for match in WORD_PATTERN.finditer(text, start, end)]
+        counts = [max(self.count_tokens(text[word_start:word_end]), 1) for word_start, word_end in words]
+
+        windows = []
+        first = 0
+        while first < len(words):
+            # Grow the window up to the budget (always at least one word)
+            last = first
+            total = counts[first]
+            while last + 1 < len(words) and total + counts[last + 1] <= self.max_tokens:
+                last += 1
+                total += counts[last]
+
+            window_start, window_end = words[first][0], words[last][1]
+            windows.append(Segment(text[window_start:window_end], window_start))
+            if last == len(words) - 1:
+                break
+
+            # Start the next window far enough back to overlap by at least
+            # stride_tokens (and one whole word), but past this window's first
+            # word so windowing always advances
+            next_first = last + 1
+            overlap = 0
+            while next_first - 1 > first and overlap < self.stride_tokens:
+                next_first -= 1
+                overlap += counts[next_first]
+            first = next_first
+
+        return windows
+
+def reconcile_overlaps(entities):
+    """Remove duplicate entities found in overlapping windows.
+
+    Entities of the same type whose spans overlap are considered the same
+    mention; the one with the highest score (then the longest) is kept.
+
+    Args:
+        entities: Entities with 'type', 'score', 'start' and 'end' in source offsets
+
+    Returns:
+        List of entities ordered by position
+    """
+    positioned = sorted(
+        (entity for entity in entities if entity.get('start') is not None),
+        key=lambda entity: (entity['start'], entity['end'])
+    )
+
+    kept = []
+    last_by_type = {}  # type -> index in kept of the last entity of that type
+    for entity in positioned:
+        index = last_by_type.get(entity['type'])
+        previous = kept[index] if index is not None else None
+        if previous is not None and entity['start'] < previous['end']:
+            better = (entity['score'], entity['end'] - entity['start']) > \
+                     (previous['score'], previous['end'] - previous['start'])
+            if better:
+                kept[index] = entity
+            continue
+        last_by_type[entity['type']] = len(kept)
+        kept.append(entity)
+
+    # Entities without offsets cannot be reconciled and are kept as they are
+    kept.extend(entity for entity in entities if entity.get('start') is None)
+    return kept
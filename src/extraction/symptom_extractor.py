@@ -2,45 +2,61 @@
 Symptom extraction module.
 """
 import re
-import pandas as pd
-from pathlib import Path
+import copy
 from .biomedical_ner import BiomedicalNER
+from .gazetteer import Gazetteer, load_faers_gazetteer
+from .cascade import ExtractionCascade, SYMPTOM_CUE_PATTERN, cascade_env_default
+
+# Small list of common symptoms used when the FAERS data is not available
+FALLBACK_SYMPTOMS = [
+    "headache", "dizziness", "nausea", "fatigue", "cough",
+    "rash", "fever", "pain", "swelling", "vomiting",
+    "diarrhea", "constipation", "insomnia", "anxiety", "depression"
+]
 
 class SymptomExtractor:
     """Class for extracting symptom mentions from text."""
     
-    def __init__(self, model_name="alvaroalon2/biobert_genetic_ner"):
-        """Initialize the symptom extractor."""
-        # Load a list of common symptoms from the merged data
+    def __init__(self, model_name="alvaroalon2/biobert_genetic_ner", cascade=None):
+        """Initialize the symptom extractor.
+        
+        Args:
+            model_name: The name of the pre-trained model to use
+            cascade: Run the FAERS reaction gazetteer first and only send
+                     sentences with unexplained candidates to the NER model.
+                     Default is None, which reads the EXTRACTION_CASCADE
+                     environment variable
+        """
+        if cascade is None:
+            cascade = cascade_env_default()
+        self.cascade = None
+        
+        # Load the reaction vocabulary automaton (cached on disk, built from the merged data)
         try:
-            project_root = Path(__file__).resolve().parent.parent.parent
-            data_path = project_root / "data" / "processed" / "merged_data.csv"
-            
-            if data_path.exists():
-                data = pd.read_csv(data_path, sep='|', header=None)
-                data.columns = ['id', 'case_id', 'drug', 'reaction', 'source', 'severity']
-                self.symptom_list = data['reaction'].unique().tolist()
-                self.symptom_list = [symptom.lower() for symptom in self.symptom_list]
-            else:
-                # Fallback to a small list of common symptoms
-                self.symptom_list = [
-                    "headache", "dizziness", "nausea", "fatigue", "cough",
-                    "rash", "fever", "pain", "swelling", "vomiting",
-                    "diarrhea", "constipation", "insomnia", "anxiety", "depression"
-                ]
+            self.gazetteer = load_faers_gazetteer('reaction', fallback_terms=FALLBACK_SYMPTOMS)
+            self.symptom_list = self.gazetteer.terms
                 
             # Initialize the biomedical NER component for enhanced extraction
             self.ner = BiomedicalNER(model_name=model_name)
             print("Enhanced biomedical NER initialized successfully for symptom extraction")
             
+            # Optional tiered extraction: gazetteer first, transformer only where needed
+            if cascade:
+                self.cascade = ExtractionCascade(
+                    self.ner,
+                    self.gazetteer,
+                    entity_types={"SYMPTOM", "DISEASE"},
+                    cue_patterns=[SYMPTOM_CUE_PATTERN],
+                    route_capitalized=False
+                )
+                print(f"Extraction cascade enabled with {len(self.gazetteer)} known reactions")
+            
         except Exception as e:
             print(f"Error loading symptom list: {e}")
             # Fallback to a small list of common symptoms
-            self.symptom_list = [
-                "headache", "dizziness", "nausea", "fatigue", "cough",
-                "rash", "fever", "pain", "swelling", "vomiting",
-                "diarrhea", "constipation", "insomnia", "anxiety", "depression"
-            ]
+            if not hasattr(self, 'gazetteer'):
+                self.gazetteer = Gazetteer(FALLBACK_SYMPTOMS)
+            self.symptom_list = self.gazetteer.terms
     
     def extract(self, text):
         """
@@ -55,10 +71,8 @@ class SymptomExtractor:
         text = text.lower()
         extracted_symptoms = []
         
-        # Look for symptoms in our list
-        for symptom in self.symptom_list:
-            if symptom in text:
-                extracted_symptoms.append(symptom)
+        # Look for symptoms in our list (whole words, one pass over the text)
+        extracted_symptoms.extend(self.gazetteer.terms_in(text))
         
         # Look for symptom mentions with patterns
         patterns = [
@@ -93,6 +107,16 @@ class SymptomExtractor:
                 print("Short conversation detected, using pattern-based extraction only")
                 return self.extract(conversation_text)
                 
+            if self.cascade is not None:
+                # Gazetteer pass over every sentence, NER only for unexplained ones
+                print("Extracting symptoms with the extraction cascade...")
+                all_symptoms = self.cascade.extract(conversation_text, confidence_threshold=confidence_threshold)
+                pattern_symptoms = self.extract(conversation_text)
+                combined_symptoms = list(set(all_symptoms + pattern_symptoms))
+                
+                print(f"Extracted {len(combined_symptoms)} symptoms from conversation using the extraction cascade")
+                return combined_symptoms
+            
             # Process the entire conversation with the biomedical NER
             print("Extracting symptom entities from conversation...")
             symptom_entities = self.ner.extract_entities_from_conversation(
@@ -135,4 +159,32 @@ class SymptomExtractor:
             print(f"Error extracting symptoms from conversation: {e}")
             # Fallback to pattern-based extraction
             print("Falling back to pattern-based extraction due to error")
-            return self.extract(conversation_text)
\ No newline at end of file
+            return self.extract(conversation_text)
+    
+    def cascade_stats(self):
+        """Return the cascade routing metrics.
+        
+        Returns:
+            Dictionary with total sentences, sentences routed to the NER model
+            and the routed fraction, or None if the cascade is disabled
+        """
+        return self.cascade.stats() if self.cascade is not None else None
+    
+    def with_reloaded_gazetteers(self):
+        """Create a copy of the extractor that uses the current FAERS reaction vocabulary.
+        
+        The copy shares the loaded NER model; only the gazetteer (also used by
+        the cascade) is reloaded. This extractor is left unchanged, so requests
+        using it are not affected.
+        
+        Returns:
+            SymptomExtractor instance
+        """
+        extractor = copy.copy(self)
+        extractor.gazetteer = load_faers_gazetteer('reaction', fallback_terms=FALLBACK_SYMPTOMS)
+        extractor.symptom_list = extractor.gazetteer.terms
+        if self.cascade is not None:
+            extractor.cascade = copy.copy(self.cascade)
+            extractor.cascade.gazetteer = extractor.gazetteer
+            extractor.cascade.reset_stats()
+        return extractor
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""Test script for the NegEx-style negation detector.
+
+This script checks the negation scopes computed by NegationDetector on
+sentences from patient conversations.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import from other modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from extraction.negation import NegationDetector
+
+DETECTOR = NegationDetector()
+
+def negated_terms(sentence, terms):
+    """Return the negation status of each term by its first occurrence in the sentence."""
+    spans = []
+    for term in terms:
+        start = sentence.index(term)
+        spans.append((start, start + len(term)))
+    return dict(zip(terms, DETECTOR.detect(sentence, spans)))
+
+def test_scope_ends_at_new_clause():
+    """A conjunction or comma followed by a new clause ends the negation scope."""
+    assert negated_terms("I deny chest pain and have nausea", ["chest pain", "nausea"]) == {
+        "chest pain": True, "nausea": False
+    }
+    assert negated_terms("No fever, I have a headache", ["fever", "headache"]) == {
+        "fever": True, "headache": False
+    }
+    assert negated_terms("No rash but I feel dizzy", ["rash", "dizzy"]) == {
+        "rash": True, "dizzy": False
+    }
+
+def test_negated_lists():
+    """Coordinated entities after a trigger stay negated."""
+    assert negated_terms("I deny chest pain and nausea", ["chest pain", "nausea"]) == {
+        "chest pain": True, "nausea": True
+    }
+    assert negated_terms("No fever, chills or vomiting", ["fever", "chills", "vomiting"]) == {
+        "fever": True, "chills": True, "vomiting": True
+    }
+
+def test_post_negation():
+    """Post-negation triggers negate the clause before them."""
+    assert negated_terms("I had nausea, then the rash went away", ["nausea", "rash"]) == {
+        "nausea": False, "rash": True
+    }
+
+def test_pseudo_negation():
+    """Pseudo-negations do not negate the words that follow them."""
+    assert negated_terms("There was no increase in headaches", ["headaches"]) == {
+        "headaches": False
+    }
+
+def main():
+    """Main function to run tests."""
+    print("Starting negation tests...\n")
+    for test in (test_scope_ends_at_new_clause, test_negated_lists,
+                 test_post_negation, test_pseudo_negation):
+        test()
+        print(f"{test.__name__}: passed")
+    print("\nAll tests completed successfully!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Test script for the token budget segmenter.
+
+This script checks that long sentences are split into windows within the
+token budget that overlap as documented, using whitespace word counts in
+place of a model tokenizer.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import from other modules
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from extraction.segmenter import TokenBudgetSegmenter
+
+def count_words(text):
+    """Count one token per whitespace-separated word."""
+    return len(text.split())
+
+def count_letters(text):
+    """Count one token per letter, so long words take several tokens."""
+    return sum(len(word) for word in text.split())
+
+def check_windows(segmenter, text):
+    """Check the windows of a long sentence and return them."""
+    windows = segmenter.segment(text)
+    assert len(windows) > 1
+    assert windows[0].start == 0
+    assert windows[-1].start + len(windows[-1].text) == len(text)
+    for segment in windows:
+        assert text[segment.start:segment.start + len(segment.text)] == segment.text
+        assert segmenter.count_tokens(segment.text) <= segmenter.max_tokens
+    for previous, current in zip(windows, windows[1:]):
+        overlap = text[current.start:previous.start + len(previous.text)]
+        # Windows start on a word, so the overlap is made of whole words
+        assert overlap.strip()
+        assert segmenter.count_tokens(overlap) >= segmenter.stride_tokens
+    return windows
+
+def test_window_overlap():
+    """Consecutive windows share at least stride_tokens tokens."""
+    text = " ".join(f"word{index}" for index in range(100))
+    check_windows(TokenBudgetSegmenter(count_words, max_tokens=20, stride_tokens=5), text)
+
+def test_overlap_with_long_words():
+    """Words larger than the stride still give an overlap of one whole word."""
+    text = " ".join(["a", "ibuprofen", "bb", "acetaminophen", "c", "omeprazole"] * 10)
+    check_windows(TokenBudgetSegmenter(count_letters, max_tokens=30, stride_tokens=4), text)
+
+def test_zero_stride():
+    """A stride of zero still overlaps windows by one word."""
+    text = " ".join(f"word{index}" for index in range(50))
+    check_windows(TokenBudgetSegmenter(count_words, max_tokens=10, stride_tokens=0), text)
+
+def main():
+    """Main function to run tests."""
+    print("Starting segmenter tests...\n")
+    for test in (test_window_overlap, test_overlap_with_long_words, test_zero_stride):
+        test()
+        print(f"{test.__name__}: passed")
+    print("\nAll tests completed successfully!")
+
+if __name__ == "__main__":
+    main()
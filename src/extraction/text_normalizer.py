@@ -0,0 +1,165 @@
+"""Text Normalization Module.
+
+This module normalizes clinical text before entity extraction in a single
+compiled pass: it lowercases the text, collapses whitespace and expands
+common medical abbreviations. Alongside the normalized text it keeps an offset
+map back to the source text, so spans found in the normalized text can be
+mapped to the exact characters of the original input.
+"""
+
+import re
+
+# Common medical abbreviations and their expansions. Expansions are padded with
+# spaces so an abbreviation glued to punctuation still yields separate words.
+MEDICAL_ABBREVIATIONS = {
+    'mg': ' milligrams ',
+    'ml': ' milliliters ',
+    'g': ' grams ',
+    'mcg': ' micrograms ',
+    'tabs': ' tablets ',
+    'tab': ' tablet ',
+    'caps': ' capsules ',
+    'cap': ' capsule ',
+    'inj': ' injection ',
+    'soln': ' solution ',
+    'susp': ' suspension ',
+    'sr': ' sustained release ',
+    'xr': ' extended release ',
+    'prn': ' as needed ',
+    'bid': ' twice daily ',
+    'tid': ' three times daily ',
+    'qid': ' four times daily ',
+    'qd': ' once daily ',
+    'po': ' by mouth ',
+    'iv': ' intravenous ',
+    'im': ' intramuscular ',
+    'sc': ' subcutaneous '
+}
+
+# Dosage units and forms only, used for medicine name extraction
+DOSAGE_ABBREVIATIONS = {
+    abbr: MEDICAL_ABBREVIATIONS[abbr]
+    for abbr in ('mg', 'ml', 'g', 'mcg', 'tabs', 'tab', 'caps', 'cap')
+}
+
+class NormalizedText:
+    """Normalized text with a character offset map back to the source text."""
+
+    __slots__ = ('text', 'starts', 'ends')
+
+    def __init__(self, text, starts, ends):
+        """Create a normalized text.
+
+        Args:
+            text: The normalized text
+            starts: For every normalized character, the start offset of the
+                    source characters it was produced from
+            ends: For every normalized character, the end offset (exclusive)
+                  of the source characters it was produced from
+        """
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+
+    def to_original_span(self, start, end):
+        """Map a span of the normalized text back to the source text.
+
+        Characters produced by an abbreviation expansion map to the whole
+        abbreviation, and a collapsed space maps to the whole whitespace run.
+
+        Args:
+            start: Start offset in the normalized text
+            end: End offset (exclusive) in the normalized text
+
+        Returns:
+            Tuple of (start, end) offsets in the source text
+        """
+        if not self.text:
+            return 0, 0
+        start = min(max(start, 0), len(self.text) - 1)
+        end = min(max(end, start + 1), len(self.text))
+        return self.starts[start], self.ends[end - 1]
+
+    def __str__(self):
+        return self.text
+
+class TextNormalizer:
+    """Single-pass text normalizer that preserves character offsets."""
+
+    def __init__(self, abbreviations=None):
+        """Compile the normalization pattern.
+
+        Args:
+            abbreviations: Mapping of lowercase abbreviation to expansion
+                           Default is None, which uses MEDICAL_ABBREVIATIONS
+        """
+        if abbreviations is None:
+            abbreviations = MEDICAL_ABBREVIATIONS
+        self.abbreviations = dict(abbreviations)
+
+        # One alternation for every rewrite: whitespace that is not already a
+        # single space, or a whole-word abbreviation (longest first)
+        alternation = '|'.join(
+            re.escape(abbr) for abbr in sorted(self.abbreviations, key=len, reverse=True)
+        )
+        self.pattern = re.compile(r'(\s{2,}|[^\S ])|\b(' + alternation + r')\b')
+
+    def normalize(self, text):
+        """Normalize text and record where every output character came from.
+
+        Args:
+            text: The input text
+
+        Returns:
+            NormalizedText with the normalized text and its offset map
+        """
+        lowered = text.lower()
+
+        # Lowercasing may change the length of a few non-ASCII characters; keep
+        # a map from lowered positions to source positions when that happens
+        lowered_to_source = None
+        if len(lowered) != len(text):
+            lowered_to_source = []
+            for index, char in enumerate(text):
+                lowered_to_source.extend([index] * len(char.lower()))
+
+        # Leading and trailing whitespace is dropped entirely
+        stripped = lowered.strip()
+        offset = len(lowered) - len(lowered.lstrip())
+
+        pieces = []
+        starts = []
+        ends = []
+        position = 0
+        for match in self.pattern.finditer(stripped):
+            match_start, match_end = match.span()
+            if match_start > position:
+                # Unchanged text maps one-to-one
+                pieces.append(stripped[position:match_start])
+                starts.extend(range(offset + position, offset + match_start))
+                ends.extend(range(offset + position + 1, offset + match_start + 1))
+
+            replacement = ' ' if match.group(1) is not None else self.abbreviations[match.group(2)]
+            pieces.append(replacement)
+            starts.extend([offset + match_start] * len(replacement))
+            ends.extend([offset + match_end] * len(replacement))
+            position = match_end
+
+        if position < len(stripped):
+            pieces.append(stripped[position:])
+            starts.extend(range(offset + position, offset + len(stripped)))
+            ends.extend(range(offset + position + 1, offset + len(stripped) + 1))
+
+        if lowered_to_source is not None:
+            starts = [lowered_to_source[start] for start in starts]
+            ends = [lowered_to_source[end - 1] + 1 for end in ends]
+
+        return NormalizedText(''.join(pieces), starts, ends)
+
+    def __call__(self, text):
+        """Return only the normalized text."""
+        return self.normalize(text).text
+
+# Shared normalizers, compiled once at import
+CLINICAL_NORMALIZER = TextNormalizer(MEDICAL_ABBREVIATIONS)
+DOSAGE_NORMALIZER = TextNormalizer(DOSAGE_ABBREVIATIONS)
@@ -0,0 +1,103 @@
+"""Drug Synonyms Module.
+
+This module reduces drug names to an ingredient key, so the many FAERS
+variants of one ingredient ("TYLENOL EXTRA STRENGTH", "acetaminophen 500mg
+tablets", "APAP") collapse into a single drug. A name is canonicalized by:
+
+    rules       dose strengths, dosage forms and release modifiers are removed
+                anywhere in the name, and salt words at its end ("metoprolol
+                succinate" becomes "metoprolol")
+    synonyms    the remaining text is looked up in a locally supplied table of
+                brand names and synonyms (data/reference/drug_synonyms.csv,
+                with synonym and ingredient columns)
+
+Preprocessing builds the drug-reaction mapping from the keys, and FAERSMatcher
+applies the same function to extracted medicine names before matching.
+"""
+
+import csv
+import re
+from pathlib import Path
+
+DEFAULT_SYNONYMS_FILE = Path(__file__).resolve().parent.parent.parent / "data/reference/drug_synonyms.csv"
+
+# Names are matched after punctuation removal, so "0.5 mg/ml" appears as "05 mgml"
+DOSE_PATTERN = re.compile(
+    r'\b\d+\s*(?:mg|mcg|ug|g|kg|ml|l|iu|units?|meq|mmol|mgml|mcgml|mgl|unitsml|iuml|percent)\b'
+    r'(?:\s*(?:\d+\s*)?(?:ml|l|g|hr|h|dose|actuation)\b)?'
+)
+TRAILING_NUMBER_PATTERN = re.compile(r'(?:\s+\d+)+$')
+
+FORM_WORDS = {
+    "tablet", "tablets", "tab", "tabs", "capsule", "capsules", "cap", "caps", "caplet", "caplets",
+    "injection", "injectable", "solution", "suspension", "syrup", "elixir", "cream", "ointment",
+    "gel", "lotion", "patch", "spray", "inhaler", "inhalation", "aerosol", "powder", "drops",
+    "oral", "topical", "intravenous", "iv", "po", "chewable", "coated", "film", "extended",
+    "delayed", "release", "er", "xr", "sr", "xl", "cr", "dr", "ec", "odt", "hfa",
+    "extra", "strength", "maximum", "regular"
+}
+
+SALT_WORDS = {
+    "hcl", "hydrochloride", "hydrobromide", "sodium", "potassium", "calcium", "magnesium",
+    "maleate", "mesylate", "besylate", "succinate", "tartrate", "fumarate", "citrate",
+    "sulfate", "sulphate", "acetate", "phosphate", "dihydrate", "monohydrate"
+}
+
+def strip_drug_name(name):
+    """Remove doses, dosage forms and trailing salt words from a normalized drug name.
+
+    Args:
+        name: Drug name, lowercased and without punctuation
+
+    Returns:
+        Stripped name, or the name itself if nothing would remain
+    """
+    stripped = TRAILING_NUMBER_PATTERN.sub('', DOSE_PATTERN.sub(' ', name))
+    words = [word for word in stripped.split() if word not in FORM_WORDS]
+    # Salts only go from the end, and never the last remaining word
+    while len(words) > 1 and words[-1] in SALT_WORDS:
+        words.pop()
+    return " ".join(words) or " ".join(name.split())
+
+def ingredient_key(name, synonyms=None):
+    """Canonicalize a normalized drug name to its ingredient key.
+
+    Args:
+        name: Drug name, lowercased and without punctuation
+        synonyms: Optional dictionary of stripped synonym -> ingredient key
+                  (see load_drug_synonyms)
+
+    Returns:
+        Ingredient key
+    """
+    key = strip_drug_name(name)
+    if synonyms:
+        key = synonyms.get(key, key)
+    return key
+
+def _normalize(text):
+    return re.sub(r'[^\w\s]', '', str(text).lower()).strip()
+
+def load_drug_synonyms(synonyms_file=None):
+    """Load the synonym table as a dictionary of stripped synonym -> ingredient key.
+
+    Args:
+        synonyms_file: CSV with synonym and ingredient columns.
+                       Default is None, which uses data/reference/drug_synonyms.csv
+
+    Returns:
+        Dictionary (empty if the file does not exist)
+    """
+    synonyms_file = Path(synonyms_file) if synonyms_file is not None else DEFAULT_SYNONYMS_FILE
+    if not synonyms_file.exists():
+        print(f"No drug synonym table found at {synonyms_file}")
+        return {}
+
+    synonyms = {}
+    with open(synonyms_file, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            synonym = strip_drug_name(_normalize(row['synonym']))
+            ingredient = strip_drug_name(_normalize(row['ingredient']))
+            if synonym and ingredient and synonym != ingredient:
+                synonyms.setdefault(synonym, ingredient)
+    return synonyms
@@ -4,49 +4,162 @@ This module matches extracted medicine names and symptoms with the FAERS dataset
 to identify potential adverse drug events and their severity.
 """
 
-import pandas as pd
-import numpy as np
+import os
+from collections import Counter
 from pathlib import Path
-import re
+
+import numpy as np
+
+try:
+    from .mapping_store import ColumnarDrugMapping, load_drug_mapping
+    from .name_index import NameIndex, normalize_name
+    from .fuzzy_index import FuzzyNameIndex
+    from .match_cache import LRUCache, DEFAULT_MAX_ENTRIES
+    from .drug_synonyms import ingredient_key, load_drug_synonyms
+    from .sqlite_store import SQLiteDrugMapping, SQLiteFuzzyIndex, sqlite_path
+except ImportError:
+    # Run as a script (python src/matching/faers_matcher.py)
+    from mapping_store import ColumnarDrugMapping, load_drug_mapping
+    from name_index import NameIndex, normalize_name
+    from fuzzy_index import FuzzyNameIndex
+    from match_cache import LRUCache, DEFAULT_MAX_ENTRIES
+    from drug_synonyms import ingredient_key, load_drug_synonyms
+    from sqlite_store import SQLiteDrugMapping, SQLiteFuzzyIndex, sqlite_path
 
 # Define paths
 PROCESSED_DATA_DIR = Path(__file__).resolve().parent.parent.parent / "data/processed"
 
+# Minimum fuzzy score for a misspelled medicine to count as a match
+FUZZY_MATCH_THRESHOLD = 0.8
+
 class FAERSMatcher:
     """Class for matching medicines and symptoms with FAERS data."""
     
-    def __init__(self, drug_reaction_mapping_file=None):
+    def __init__(self, drug_reaction_mapping_file=None, fuzzy_matching=None, cache_size=None, synonyms_file=None,
+                 store=None):
         """Initialize the FAERS matcher with preprocessed FAERS data.
         
         Args:
             drug_reaction_mapping_file: Path to the drug-reaction mapping file
                                        Default is None, which will use the default path
+            fuzzy_matching: Fall back to fuzzy matching for medicines without a
+                            substring match (tolerates transcription errors).
+                            Default is None, which reads FAERS_FUZZY_MATCH from the environment
+            cache_size: Maximum entries of each memoization cache (0 disables them).
+                        Default is None, which reads FAERS_MATCH_CACHE_SIZE from the environment
+            synonyms_file: Brand name/synonym table used to canonicalize medicine
+                           names to ingredient keys. Default is None, which uses
+                           data/reference/drug_synonyms.csv
+            store: "columnar" to load the mapping into memory (memory-mapped
+                   arrays or the CSV), or "sqlite" to query the SQLite database
+                   written by preprocessing. Default is None, which reads
+                   FAERS_STORE from the environment
         """
+        if fuzzy_matching is None:
+            fuzzy_matching = os.environ.get("FAERS_FUZZY_MATCH", "0") == "1"
+        self.fuzzy_matching = fuzzy_matching
+        
+        if cache_size is None:
+            cache_size = int(os.environ.get("FAERS_MATCH_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+        # normalized medicine -> (drug index, score); normalized symptom -> term scores;
+        # (drug index, normalized symptom) -> (reaction, score, pair index)
+        self.drug_match_cache = LRUCache(cache_size)
+        self.symptom_cache = LRUCache(cache_size)
+        self.reaction_match_cache = LRUCache(cache_size)
+        
+        # Synonym -> ingredient key, the same table preprocessing collapsed the drugs with
+        self.drug_synonyms = load_drug_synonyms(synonyms_file)
+        
         if drug_reaction_mapping_file is None:
-            drug_reaction_mapping_file = Path(__file__).resolve().parent.parent.parent / "data/processed/drug_reaction_mapping.csv"
+            drug_reaction_mapping_file = PROCESSED_DATA_DIR / "drug_reaction_mapping.csv"
         
         print(f"Initializing FAERSMatcher with mapping file: {drug_reaction_mapping_file}")
         try:
-            # Load the drug-reaction mapping
-            self.drug_mapping = pd.read_csv(drug_reaction_mapping_file)
-            
-            # Convert string representations of lists to actual lists
-            self.drug_mapping['reactions'] = self.drug_mapping['reactions'].apply(
-                lambda x: eval(x) if isinstance(x, str) else x
-            )
-            self.drug_mapping['severities'] = self.drug_mapping['severities'].apply(
-                lambda x: eval(x) if isinstance(x, str) else x
-            )
+            if store is None:
+                store = os.environ.get("FAERS_STORE", "columnar")
+            if store == "sqlite":
+                # Query the database on disk instead of loading the mapping
+                self.drug_mapping = SQLiteDrugMapping(sqlite_path(drug_reaction_mapping_file))
+            else:
+                # Memory-map the columnar mapping written by preprocessing, or parse the CSV
+                self.drug_mapping = load_drug_mapping(drug_reaction_mapping_file)
             
             print(f"Loaded mapping with {len(self.drug_mapping)} drugs")
         except Exception as e:
             print(f"Error loading drug-reaction mapping: {e}")
-            self.drug_mapping = pd.DataFrame({
-                'drugname': [],
-                'reactions': [], 
-                'severities': [],
-                'highest_severity': []
-            })
+            self.drug_mapping = ColumnarDrugMapping.empty()
+        
+        # Stamp of the loaded data, reported with results so they can be traced to it
+        self.data_version = self.drug_mapping.data_version()
+        
+        self.build_indexes()
+    
+    def build_indexes(self):
+        """Build the lookup indexes over the loaded mapping.
+        
+        Drug names are normalized once here instead of on every lookup. The
+        fuzzy index is only built up front in fuzzy matching mode; otherwise
+        find_fuzzy_matches builds it on first use. Memoized results refer to
+        the previous mapping, so the caches are cleared.
+        
+        Synonyms whose ingredient is one of the drugs form the alias index, so
+        brand names resolve to the ingredient's drug (also when misspelled).
+        
+        The SQLite store answers name lookups from its own indexes, so nothing
+        is built in memory for it.
+        """
+        self.drug_match_cache.clear()
+        self.symptom_cache.clear()
+        self.reaction_match_cache.clear()
+        
+        sqlite_store = isinstance(self.drug_mapping, SQLiteDrugMapping)
+        if sqlite_store:
+            self.drug_name_index = self.drug_mapping.drug_name_index()
+        else:
+            normalized_drugs = [self.normalize_text(drug) for drug in self.drug_mapping.iter_drug_names()]
+            self.drug_name_index = NameIndex(normalized_drugs)
+        
+        self.drug_aliases = {}
+        for synonym, ingredient in self.drug_synonyms.items():
+            drug_index = self.drug_name_index.id_of(ingredient)
+            if drug_index is not None:
+                self.drug_aliases[synonym] = drug_index
+        
+        self.fuzzy_drug_index = None
+        if self.fuzzy_matching:
+            self.build_fuzzy_index()
+        
+        # Reactions are integer ids shared by all drugs; ids that normalize to
+        # the same text share a term, and symptoms are resolved against the terms
+        if sqlite_store:
+            # The database stores each reaction's term (see reaction_terms_of)
+            self.reaction_terms = None
+            self.reaction_term_index = self.drug_mapping.reaction_term_index()
+            return
+        
+        term_ids = {}
+        self.reaction_terms = np.fromiter(
+            (term_ids.setdefault(self.normalize_text(reaction), len(term_ids))
+             for reaction in self.drug_mapping.iter_reaction_names()),
+            dtype=np.int32, count=self.drug_mapping.reaction_count()
+        )
+        self.reaction_term_index = NameIndex(term_ids)
+    
+    def build_fuzzy_index(self):
+        """Build the fuzzy index over the drug names and their aliases.
+        
+        Name ids beyond the drugs are aliases; fuzzy_alias_targets maps
+        them (minus the number of drugs) to their drug index.
+        """
+        if isinstance(self.drug_mapping, SQLiteDrugMapping):
+            # Drug names are looked up in the database, only the aliases are held in memory
+            self.fuzzy_drug_index = SQLiteFuzzyIndex(self.drug_mapping, list(self.drug_aliases))
+        else:
+            normalized_drugs = [self.normalize_text(drug) for drug in self.drug_mapping.iter_drug_names()]
+            self.fuzzy_drug_index = FuzzyNameIndex(normalized_drugs + list(self.drug_aliases))
+        self.fuzzy_alias_targets = np.asarray(list(self.drug_aliases.values()), dtype=np.int64)
+        # Looking up this many names per requested drug always yields enough distinct drugs
+        self.fuzzy_names_per_drug = 1 + max(Counter(self.drug_aliases.values()).values(), default=0)
     
     def normalize_text(self, text):
         """Normalize text for better matching.
@@ -57,16 +170,9 @@ class FAERSMatcher:
         Returns:
             Normalized text
         """
-        if not isinstance(text, str):
-            return ""
-        
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove special characters and extra spaces
-        text = re.sub(r'[^\w\s]', '', text).strip()
-        
-        return text
+        # Lowercase and remove special characters and extra spaces (shared
+        # with the SQLite store, which stores names already normalized)
+        return normalize_name(text)
     
     def find_closest_match(self, medicine_name, threshold=0.8):
         """Find the closest matching drug in the FAERS data.
@@ -78,33 +184,100 @@ class FAERSMatcher:
         Returns:
             Tuple of (matched_drug_name, similarity_score) or (None, 0) if no match
         """
+        drug_index, score = self.find_closest_drug_index(medicine_name, threshold)
+        
+        if drug_index is None:
+            return None, 0
+        return self.drug_mapping.drug_name(drug_index), score
+    
+    def find_closest_drug_index(self, medicine_name, threshold=0.8):
+        """Find the position of the closest matching drug in the mapping.
+        
+        The position addresses the drug's record (reactions, severities) directly.
+        The medicine name is first canonicalized to its ingredient key (doses,
+        forms and salts stripped, brand names replaced by their ingredient);
+        if the key matches no drug the plain name is tried.
+        
+        Args:
+            medicine_name: The medicine name to match
+            threshold: Similarity threshold for matching (0-1)
+            
+        Returns:
+            Tuple of (drug_index, similarity_score) or (None, 0) if no match
+        """
         # Normalize the input medicine name
         normalized_name = self.normalize_text(medicine_name)
         
         if not normalized_name:
             return None, 0
         
-        best_match = None
-        best_score = 0
+        cached = self.drug_match_cache.get((normalized_name, threshold))
+        if cached is not None:
+            return cached
+        
+        # Candidates come from the index instead of a scan over every drug name;
+        # scores and tie-breaks are the same as scanning the names in order
+        key = ingredient_key(normalized_name, self.drug_synonyms)
+        result = self.drug_name_index.best_match(key, threshold)
+        if result[0] is None and key != normalized_name:
+            result = self.drug_name_index.best_match(normalized_name, threshold)
+        
+        if result[0] is None and self.fuzzy_matching:
+            fuzzy_matches = self.find_fuzzy_drug_indices(normalized_name, top_k=1, threshold=FUZZY_MATCH_THRESHOLD)
+            if fuzzy_matches:
+                result = fuzzy_matches[0]
         
-        # Simple matching algorithm - can be improved with fuzzy matching
-        for drug in self.drug_mapping['drugname']:
-            normalized_drug = self.normalize_text(drug)
+        self.drug_match_cache.put((normalized_name, threshold), result)
+        return result
+    
+    def find_fuzzy_matches(self, medicine_name, top_k=5, threshold=0.0):
+        """Find the FAERS drugs closest to a possibly misspelled medicine name.
+        
+        Args:
+            medicine_name: The medicine name to match
+            top_k: Maximum number of candidates to return
+            threshold: Minimum similarity score (0-1)
             
-            # Check if the normalized medicine name is contained in the drug name or vice versa
-            if normalized_name in normalized_drug or normalized_drug in normalized_name:
-                # Calculate a simple similarity score based on length ratio
-                score = min(len(normalized_name), len(normalized_drug)) / max(len(normalized_name), len(normalized_drug))
-                
-                if score > best_score:
-                    best_score = score
-                    best_match = drug
+        Returns:
+            List of (drug_name, similarity_score) tuples, best first
+        """
+        return [
+            (self.drug_mapping.drug_name(drug_index), score)
+            for drug_index, score in self.find_fuzzy_drug_indices(medicine_name, top_k, threshold)
+        ]
+    
+    def find_fuzzy_drug_indices(self, medicine_name, top_k=5, threshold=0.0):
+        """Like find_fuzzy_matches, but return drug positions in the mapping.
         
-        # Return the best match if it meets the threshold
-        if best_score >= threshold:
-            return best_match, best_score
-        else:
-            return None, 0
+        Misspelled brand names match through their aliases.
+        
+        Returns:
+            List of (drug_index, similarity_score) tuples, best first
+        """
+        normalized_name = self.normalize_text(medicine_name)
+        
+        if not normalized_name:
+            return []
+        
+        if self.fuzzy_drug_index is None:
+            self.build_fuzzy_index()
+        
+        # Doses and forms would only add edits, so the stripped name is looked up
+        key = ingredient_key(normalized_name)
+        
+        # A drug and its aliases can all match; each drug is reported once, with its best score
+        results = []
+        seen = set()
+        for name_id, score in self.fuzzy_drug_index.lookup(key, top_k=top_k * self.fuzzy_names_per_drug,
+                                                           min_score=threshold):
+            # Ids beyond the drugs are aliases
+            drug_index = name_id if name_id < len(self.drug_mapping) else int(
+                self.fuzzy_alias_targets[name_id - len(self.drug_mapping)]
+            )
+            if drug_index not in seen:
+                seen.add(drug_index)
+                results.append((drug_index, score))
+        return results[:top_k]
     
     def match_symptom_to_reactions(self, symptom, reactions, threshold=0.7):
         """Match a symptom to reactions in the FAERS data.
@@ -145,12 +318,143 @@ class FAERSMatcher:
         else:
             return None, 0
     
-    def detect_adverse_events(self, medicines, symptoms):
+    def resolve_symptom(self, symptom, threshold=0.7):
+        """Find the reaction terms a symptom matches, independent of any drug.
+        
+        Args:
+            symptom: The symptom to match
+            threshold: Similarity threshold for matching (0-1)
+            
+        Returns:
+            Dictionary of reaction term id -> similarity score
+        """
+        normalized_symptom = self.normalize_text(symptom)
+        
+        if not normalized_symptom:
+            return {}
+        
+        term_scores = self.symptom_cache.get((normalized_symptom, threshold))
+        if term_scores is None:
+            term_scores = self.reaction_term_index.matches(normalized_symptom, threshold)
+            self.symptom_cache.put((normalized_symptom, threshold), term_scores)
+        return term_scores
+    
+    def match_resolved_symptoms(self, resolved_symptoms, drug_index):
+        """Match resolved symptoms to the reactions of one drug.
+        
+        Gives the same results as match_symptom_to_reactions on the drug's
+        reaction list, but intersects the drug's reaction ids with the
+        symptoms' matching terms once instead of comparing strings.
+        
+        Args:
+            resolved_symptoms: List of (symptom, resolve_symptom result) tuples
+            drug_index: Index of the drug in the mapping
+            
+        Returns:
+            List of (symptom, matched_reaction, similarity_score, pair_index)
+            tuples for the symptoms that match one of the drug's reactions. The
+            pair index addresses the pair's statistics in the mapping.
+        """
+        matched_terms = set()
+        for _, term_scores in resolved_symptoms:
+            matched_terms.update(term_scores)
+        
+        if not matched_terms:
+            return []
+        
+        if self.reaction_terms is None:
+            reaction_ids, drug_terms = self.drug_mapping.reaction_terms_of(drug_index)
+        else:
+            reaction_ids = self.drug_mapping.reaction_ids_of(drug_index)
+            drug_terms = self.reaction_terms[reaction_ids]
+        positions = np.flatnonzero(np.isin(drug_terms, np.fromiter(matched_terms, dtype=np.int32)))
+        hits = [(position, int(drug_terms[position])) for position in positions.tolist()]
+        
+        matches = []
+        for symptom, term_scores in resolved_symptoms:
+            best_position = None
+            best_score = 0
+            
+            # The first reaction with the highest score wins, as in a scan of the list
+            for position, term in hits:
+                score = term_scores.get(term, 0)
+                if score > best_score:
+                    best_score = score
+                    best_position = position
+            
+            if best_position is not None:
+                matches.append((
+                    symptom,
+                    self.drug_mapping.reaction_name(int(reaction_ids[best_position])),
+                    best_score,
+                    self.drug_mapping.pair_index(drug_index, best_position)
+                ))
+        
+        return matches
+    
+    def match_symptoms_to_drug(self, symptoms, drug_index):
+        """Match symptoms to the reactions of one drug, memoized per (drug, symptom).
+        
+        Args:
+            symptoms: List of symptoms
+            drug_index: Index of the drug in the mapping
+            
+        Returns:
+            List of (symptom, matched_reaction, similarity_score, pair_index)
+            tuples for the symptoms that match, in the order of the symptoms
+        """
+        matches = {}
+        missed = []
+        for position, symptom in enumerate(symptoms):
+            key = (drug_index, self.normalize_text(symptom))
+            cached = self.reaction_match_cache.get(key)
+            if cached is None:
+                missed.append((position, key))
+            elif cached[0] is not None:
+                matches[position] = cached
+        
+        if missed:
+            # Match all uncached symptoms in one pass over the drug's reactions
+            resolved = [(position, self.resolve_symptom(symptoms[position])) for position, _ in missed]
+            new_matches = {
+                position: (matched_reaction, score, pair_index)
+                for position, matched_reaction, score, pair_index in self.match_resolved_symptoms(resolved, drug_index)
+            }
+            for position, key in missed:
+                result = new_matches.get(position, (None, 0, None))
+                self.reaction_match_cache.put(key, result)
+                if result[0] is not None:
+                    matches[position] = result
+        
+        return [(symptoms[position],) + matches[position] for position in sorted(matches)]
+    
+    def cache_stats(self):
+        """Return hit/miss metrics of the memoization caches.
+        
+        Returns:
+            Dictionary of cache name -> stats dictionary
+        """
+        return {
+            'drug_matches': self.drug_match_cache.stats(),
+            'symptom_resolutions': self.symptom_cache.stats(),
+            'reaction_matches': self.reaction_match_cache.stats()
+        }
+    
+    def detect_adverse_events(self, medicines, symptoms, signals_only=False, rank_by_signal=False):
         """Detect potential adverse events from extracted medicines and symptoms.
         
+        When preprocessing computed disproportionality statistics, each matched
+        symptom carries the report count, PRR and ROR (with 95% confidence
+        intervals) and the highest severity of its drug-reaction pair, read
+        from the mapping by position.
+        
         Args:
             medicines: List of extracted medicine names
             symptoms: List of extracted symptoms
+            signals_only: Only keep matched symptoms whose drug-reaction pair is
+                          a disproportionality signal. Default is False
+            rank_by_signal: Order the matched symptoms of each event by PRR,
+                            strongest first, instead of symptom order. Default is False
             
         Returns:
             List of dictionaries containing detected adverse events with severity
@@ -161,32 +465,44 @@ class FAERSMatcher:
         
         for medicine in medicines:
             # Find the closest matching drug in FAERS
-            matched_drug, drug_score = self.find_closest_match(medicine)
+            drug_index, drug_score = self.find_closest_drug_index(medicine)
             
-            if matched_drug is None:
+            if drug_index is None:
                 print(f"No match found for medicine: {medicine}")
                 continue
             
+            matched_drug = self.drug_mapping.drug_name(drug_index)
             print(f"Matched medicine '{medicine}' to FAERS drug '{matched_drug}' with score {drug_score:.2f}")
             
-            # Get the drug data from the mapping
-            drug_data = self.drug_mapping[self.drug_mapping['drugname'] == matched_drug].iloc[0]
-            reactions = drug_data['reactions']
-            severities = drug_data['severities']
-            highest_severity = drug_data['highest_severity']
+            # Get the drug data from the mapping by position (no scan over the drugs)
+            reactions = self.drug_mapping.reactions(drug_index)
+            severities = self.drug_mapping.severities(drug_index)
+            highest_severity = self.drug_mapping.highest_severity(drug_index)
             
             # Match symptoms to reactions
             matched_symptoms = []
-            for symptom in symptoms:
-                matched_reaction, reaction_score = self.match_symptom_to_reactions(symptom, reactions)
+            for symptom, matched_reaction, reaction_score, pair_index in self.match_symptoms_to_drug(symptoms, drug_index):
+                signal = self.drug_mapping.pair_signal(pair_index)
+                if signals_only and not (signal and signal['is_signal']):
+                    continue
                 
-                if matched_reaction is not None:
-                    print(f"  Matched symptom '{symptom}' to reaction '{matched_reaction}' with score {reaction_score:.2f}")
-                    matched_symptoms.append({
-                        'symptom': symptom,
-                        'matched_reaction': matched_reaction,
-                        'confidence': reaction_score
-                    })
+                print(f"  Matched symptom '{symptom}' to reaction '{matched_reaction}' with score {reaction_score:.2f}")
+                matched_symptoms.append({
+                    'symptom': symptom,
+                    'matched_reaction': matched_reaction,
+                    'confidence': reaction_score,
+                    'reports': signal['reports'] if signal else 0,
+                    'prr': signal['prr'] if signal else None,
+                    'prr_ci': signal['prr_ci'] if signal else None,
+                    'ror': signal['ror'] if signal else None,
+                    'ror_ci': signal['ror_ci'] if signal else None,
+                    'is_signal': signal['is_signal'] if signal else False,
+                    'reaction_severity': signal['severity'] if signal else None
+                })
+            
+            if rank_by_signal:
+                # Stable sort: pairs without statistics keep their order at the end
+                matched_symptoms.sort(key=lambda match: -match['prr'] if match['prr'] is not None else float('inf'))
             
             # If we found matching symptoms, record an adverse event
             if matched_symptoms:
@@ -203,6 +519,97 @@ class FAERSMatcher:
         
         print(f"Detected {len(adverse_events)} potential adverse events")
         return adverse_events
+    
+    def detect_adverse_events_bulk(self, medicines, symptoms, signals_only=False):
+        """Detect adverse events for many conversations at once.
+        
+        Every distinct medicine string and every distinct symptom string in the
+        batch is resolved once, and every distinct (drug, symptom) pair is
+        matched once, however many conversations mention them. Repeated
+        (conversation, medicine) and (conversation, symptom) pairs are dropped.
+        
+        Args:
+            medicines: DataFrame with conversation_id and medicine columns, or a
+                       sequence of (conversation_id, medicine) pairs
+            symptoms: DataFrame with conversation_id and symptom columns, or a
+                      sequence of (conversation_id, symptom) pairs
+            signals_only: Only keep rows whose drug-reaction pair is a
+                          disproportionality signal. Default is False
+            
+        Returns:
+            DataFrame with one row per matched (conversation, medicine, symptom):
+            conversation_id, medicine, matched_drug, drug_match_confidence,
+            symptom, matched_reaction, confidence, severity, and the pair's
+            reports, prr, prr_lower, prr_upper, ror, ror_lower, ror_upper,
+            is_signal and reaction_severity
+        """
+        import pandas as pd
+        
+        columns = ['conversation_id', 'medicine', 'matched_drug', 'drug_match_confidence',
+                   'symptom', 'matched_reaction', 'confidence', 'severity', 'reports',
+                   'prr', 'prr_lower', 'prr_upper', 'ror', 'ror_lower', 'ror_upper',
+                   'is_signal', 'reaction_severity']
+        
+        # Missing medicines and symptoms are dropped (factorize would code them -1)
+        medicines = pd.DataFrame(medicines, columns=['conversation_id', 'medicine']).dropna(subset=['medicine'])
+        medicines = medicines.drop_duplicates()
+        symptoms = pd.DataFrame(symptoms, columns=['conversation_id', 'symptom']).dropna(subset=['symptom'])
+        symptoms = symptoms.drop_duplicates()
+        print(f"Detecting adverse events in bulk for {len(medicines)} medicine and {len(symptoms)} symptom mentions")
+        
+        # Resolve each distinct medicine once
+        medicine_codes, unique_medicines = pd.factorize(medicines['medicine'])
+        resolved_medicines = [self.find_closest_drug_index(medicine) for medicine in unique_medicines]
+        drug_indices = np.array([-1 if drug_index is None else drug_index
+                                 for drug_index, _ in resolved_medicines], dtype=np.int64)
+        drug_scores = np.array([score for _, score in resolved_medicines], dtype=np.float64)
+        medicines['drug_index'] = drug_indices[medicine_codes]
+        medicines['drug_match_confidence'] = drug_scores[medicine_codes]
+        medicines = medicines[medicines['drug_index'] >= 0]
+        
+        # Resolve each distinct symptom once
+        symptom_codes, unique_symptoms = pd.factorize(symptoms['symptom'])
+        resolved_symptoms = [self.resolve_symptom(symptom) for symptom in unique_symptoms]
+        symptoms['symptom_code'] = symptom_codes
+        symptoms = symptoms[np.array([bool(resolved_symptoms[code]) for code in symptom_codes], dtype=bool)]
+        
+        # All (conversation, drug, symptom) combinations, then each distinct
+        # (drug, symptom) pair is matched once
+        pairs = medicines.merge(symptoms, on='conversation_id')
+        if pairs.empty:
+            return pd.DataFrame(columns=columns)
+        
+        matched = {'drug_index': [], 'symptom_code': [], 'matched_reaction': [], 'confidence': [], 'pair_index': []}
+        unique_pairs = pairs[['drug_index', 'symptom_code']].drop_duplicates()
+        for drug_index, symptom_code_group in unique_pairs.groupby('drug_index')['symptom_code']:
+            candidates = [(code, resolved_symptoms[code]) for code in symptom_code_group.tolist()]
+            for code, matched_reaction, reaction_score, pair_index in self.match_resolved_symptoms(candidates, drug_index):
+                matched['drug_index'].append(drug_index)
+                matched['symptom_code'].append(code)
+                matched['matched_reaction'].append(matched_reaction)
+                matched['confidence'].append(reaction_score)
+                matched['pair_index'].append(pair_index)
+        
+        # Signal statistics are gathered by pair index, one array lookup per column
+        matched = pd.DataFrame(matched)
+        for name, values in self.drug_mapping.pair_signal_columns(matched['pair_index'].to_numpy()).items():
+            matched[name] = values
+        if signals_only:
+            matched = matched[matched['is_signal'].to_numpy(dtype=bool)]
+        
+        events = pairs.merge(matched, on=['drug_index', 'symptom_code'])
+        
+        # Drug names and severities are looked up once per distinct drug
+        event_drugs = events['drug_index'].unique()
+        events['matched_drug'] = events['drug_index'].map(
+            {drug_index: self.drug_mapping.drug_name(drug_index) for drug_index in event_drugs}
+        )
+        events['severity'] = events['drug_index'].map(
+            {drug_index: self.drug_mapping.highest_severity(drug_index) for drug_index in event_drugs}
+        )
+        
+        print(f"Detected {len(events)} potential adverse events in bulk")
+        return events[columns].reset_index(drop=True)
 
 # Example usage
 def main():
@@ -227,6 +634,9 @@ def main():
             print("Matched Symptoms:")
             for match in event['matched_symptoms']:
                 print(f"  - {match['symptom']} (matched to {match['matched_reaction']})")
+                if match['prr'] is not None:
+                    print(f"    Reports: {match['reports']}, PRR: {match['prr']:.2f} "
+                          f"(95% CI {match['prr_ci'][0]:.2f}-{match['prr_ci'][1]:.2f})")
     
     except Exception as e:
         print(f"Error in main: {e}")
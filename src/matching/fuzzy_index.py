@@ -0,0 +1,303 @@
+"""Fuzzy Name Index Module.
+
+This module finds vocabulary names that are close to a misspelled query, such
+as drug names mis-transcribed by Whisper ("metforman", "lysine april"). It
+combines two precomputed indexes over the names with spaces removed:
+
+    symmetric delete    every string obtained by deleting up to max_distance
+                        characters from a name's prefix (SymSpell). Any name
+                        within max_distance edits of the query shares one of
+                        these with the query, so candidates are found with a
+                        few hash lookups and then verified by edit distance.
+    phonetic key        a consonant skeleton of the name ("lisinopril" and
+                        "lysine april" both become "lsnprl") that catches
+                        sound-alike transcriptions with more edits.
+
+Postings are stored as sorted hash arrays instead of dictionaries of lists,
+which keeps the index compact for the full FAERS vocabulary.
+"""
+
+import re
+import heapq
+
+import numpy as np
+
+DEFAULT_MAX_DISTANCE = 2
+DEFAULT_PREFIX_LENGTH = 7
+MIN_PHONETIC_LENGTH = 4
+
+# Character histogram columns: a-z, 0-9 and one column for everything else
+HISTOGRAM_COLUMNS = np.full(256, 36, dtype=np.int64)
+HISTOGRAM_COLUMNS[np.frombuffer(b"abcdefghijklmnopqrstuvwxyz0123456789", dtype=np.uint8)] = np.arange(36)
+
+PHONETIC_RULES = [
+    (re.compile(r'ph'), 'f'),
+    (re.compile(r'ck'), 'k'),
+    (re.compile(r'qu'), 'kw'),
+    (re.compile(r'c(?=[eiy])'), 's'),
+    (re.compile(r'[cq]'), 'k'),
+    (re.compile(r'x'), 'ks'),
+    (re.compile(r'z'), 's'),
+    (re.compile(r'y'), 'i'),
+]
+
+def spelling_key(name):
+    """Key used for edit distances: the normalized name without spaces."""
+    return "".join(name.split())
+
+def phonetic_key(name):
+    """Compute a simple phonetic key for a normalized name.
+
+    Letters that sound alike are merged, vowels after the first letter are
+    dropped and repeated consonants are collapsed.
+
+    Args:
+        name: Normalized name
+
+    Returns:
+        Phonetic key (may be empty)
+    """
+    key = re.sub(r'[^a-z]', '', name)
+    for pattern, replacement in PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    if not key:
+        return key
+    skeleton = key[0] + re.sub(r'[aeiou]', '', key[1:])
+    return re.sub(r'(.)\1+', r'\1', skeleton)
+
+def edit_distance(a, b, max_distance=None):
+    """Optimal string alignment distance (Levenshtein with transpositions).
+
+    Args:
+        a: First string
+        b: Second string
+        max_distance: Stop early and return max_distance + 1 once the distance
+                      is known to exceed it. Default is None (no limit)
+
+    Returns:
+        Edit distance, or max_distance + 1 if it exceeds max_distance
+    """
+    if a == b:
+        return 0
+    if max_distance is None:
+        max_distance = max(len(a), len(b))
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    # A common prefix and suffix never change the distance
+    prefix = 0
+    while prefix < len(a) and prefix < len(b) and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < len(a) - prefix and suffix < len(b) - prefix
+           and a[len(a) - 1 - suffix] == b[len(b) - 1 - suffix]):
+        suffix += 1
+    a = a[prefix:len(a) - suffix]
+    b = b[prefix:len(b) - suffix]
+    if not a or not b:
+        distance = len(a) + len(b)
+        return distance if distance <= max_distance else max_distance + 1
+
+    # Only cells within max_distance of the diagonal can stay within the limit
+    limit = max_distance + 1
+    previous_previous = None
+    previous = [j if j < limit else limit for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [limit] * (len(b) + 1)
+        if i < limit:
+            current[0] = i
+        row_minimum = current[0]
+        char_a = a[i - 1]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            value = previous[j - 1] if char_a == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == b[j - 1]
+                    and previous_previous[j - 2] + 1 < value):
+                value = previous_previous[j - 2] + 1
+            current[j] = value if value < limit else limit
+            if current[j] < row_minimum:
+                row_minimum = current[j]
+        if row_minimum >= limit:
+            return limit
+        previous_previous, previous = previous, current
+
+    return previous[-1]
+
+def character_histograms(keys):
+    """Count the characters of each key per histogram column.
+
+    One edit changes the histogram by at most 2 (in L1 distance), so keys
+    whose histograms differ by more than 2 * max_distance can be skipped
+    without computing their edit distance.
+
+    Args:
+        keys: List of strings
+
+    Returns:
+        uint8 array of shape (len(keys), 37), with counts capped at 255
+    """
+    lengths = np.fromiter((len(key) for key in keys), dtype=np.int64, count=len(keys))
+    # Encoding with replacement keeps one byte per character
+    codes = np.frombuffer("".join(keys).encode('ascii', 'replace'), dtype=np.uint8)
+    rows = np.repeat(np.arange(len(keys), dtype=np.int64), lengths)
+    counts = np.bincount(rows * 37 + HISTOGRAM_COLUMNS[codes], minlength=len(keys) * 37)
+    return np.minimum(counts, 255).astype(np.uint8).reshape(len(keys), 37)
+
+def _deletes(text, max_distance):
+    """All strings obtained by deleting up to max_distance characters."""
+    variants = {text}
+    frontier = {text}
+    for _ in range(min(max_distance, len(text))):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+def _ranges(starts, ends):
+    """Concatenate the index ranges [start, end) into one array."""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    # Each position is its range's start plus its offset within the range
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + offsets
+
+class _HashPostings:
+    """Read-only multimap from string keys to integer ids, stored as sorted hash arrays."""
+
+    def __init__(self, pairs):
+        hashes = []
+        ids = []
+        for key, value in pairs:
+            hashes.append(hash(key))
+            ids.append(value)
+        hashes = np.asarray(hashes, dtype=np.int64)
+        order = np.argsort(hashes, kind='stable')
+        self.hashes = hashes[order]
+        self.ids = np.asarray(ids, dtype=np.int32)[order]
+
+    def get(self, keys):
+        """Ids stored under any of the keys (plus any hash collisions)."""
+        key_hashes = np.fromiter((hash(key) for key in keys), dtype=np.int64)
+        starts = np.searchsorted(self.hashes, key_hashes, side='left')
+        ends = np.searchsorted(self.hashes, key_hashes, side='right')
+        return self.ids[_ranges(starts, ends)]
+
+class FuzzyNameIndex:
+    """Symmetric delete and phonetic index for fuzzy name lookup."""
+
+    def __init__(self, normalized_names, max_distance=DEFAULT_MAX_DISTANCE, prefix_length=DEFAULT_PREFIX_LENGTH):
+        """Build the index.
+
+        Args:
+            normalized_names: List of normalized names; positions are the ids
+                              returned by lookups
+            max_distance: Maximum edit distance found through the delete index
+            prefix_length: Length of the name prefix the deletes are generated from
+        """
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+
+        # Names that differ only in spacing share a term; the first id represents it
+        self.terms = []
+        self.term_name_ids = []
+        term_of_key = {}
+        for name_id, name in enumerate(normalized_names):
+            key = spelling_key(name)
+            if key and key not in term_of_key:
+                term_of_key[key] = len(self.terms)
+                self.terms.append(key)
+                self.term_name_ids.append(name_id)
+        self.term_lengths = np.fromiter((len(key) for key in self.terms), dtype=np.int32, count=len(self.terms))
+        self.term_histograms = character_histograms(self.terms)
+
+        # Deletes only depend on the prefix, and many names share one ("metformin
+        # hcl", "metformin er"), so they are generated once per distinct prefix.
+        # Terms of prefix p are prefix_terms[prefix_indptr[p]:prefix_indptr[p + 1]]
+        prefix_ids = {}
+        term_prefixes = np.fromiter(
+            (prefix_ids.setdefault(key[:prefix_length], len(prefix_ids)) for key in self.terms),
+            dtype=np.int32, count=len(self.terms)
+        )
+        self.prefix_terms = np.argsort(term_prefixes, kind='stable').astype(np.int32)
+        self.prefix_indptr = np.zeros(len(prefix_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_prefixes, minlength=len(prefix_ids)), out=self.prefix_indptr[1:])
+
+        self.deletes = _HashPostings(
+            (variant, prefix_id)
+            for prefix, prefix_id in prefix_ids.items()
+            for variant in _deletes(prefix, max_distance)
+        )
+        self.phonetic = _HashPostings(
+            (phonetic_key(key), term) for term, key in enumerate(self.terms)
+        )
+
+    def __len__(self):
+        return len(self.terms)
+
+    def lookup(self, query, top_k=5, min_score=0.0):
+        """Find the names closest to a normalized query.
+
+        A name within max_distance edits scores 1 - distance / length of the
+        longer key. A name with the same phonetic key scores halfway between
+        that edit score and 1, so sound-alikes are found even with more edits.
+
+        Args:
+            query: Normalized query text
+            top_k: Maximum number of results
+            min_score: Minimum score (0-1)
+
+        Returns:
+            List of (name id, score) tuples, best first (lowest id on ties)
+        """
+        query_key = spelling_key(query)
+        if not query_key:
+            return []
+
+        scores = {}
+        prefix_ids = np.unique(self.deletes.get(_deletes(query_key[:self.prefix_length], self.max_distance)))
+        if len(prefix_ids):
+            candidates = self.prefix_terms[_ranges(self.prefix_indptr[prefix_ids], self.prefix_indptr[prefix_ids + 1])]
+            # Lower bounds on the edit distance (length and character histogram
+            # differences) rule out most candidates without computing it
+            length_difference = np.abs(self.term_lengths[candidates] - len(query_key))
+            histogram_difference = np.abs(
+                self.term_histograms[candidates].astype(np.int16) - character_histograms([query_key]).astype(np.int16)
+            ).sum(axis=1)
+            lower_bound = np.maximum(length_difference, (histogram_difference + 1) // 2)
+            keep = lower_bound <= self.max_distance
+            candidates = candidates[keep]
+            upper_bound = 1 - lower_bound[keep] / np.maximum(self.term_lengths[candidates], len(query_key))
+
+            # Verify in order of best possible score and stop once no remaining
+            # candidate can enter the top k
+            top_scores = []
+            for position in np.lexsort((candidates, -upper_bound)).tolist():
+                if upper_bound[position] < min_score:
+                    break
+                if len(top_scores) >= top_k and top_scores[0] > upper_bound[position]:
+                    break
+                term = int(candidates[position])
+                key = self.terms[term]
+                distance = edit_distance(query_key, key, self.max_distance)
+                if distance <= self.max_distance:
+                    scores[term] = 1 - distance / max(len(query_key), len(key))
+                    heapq.heappush(top_scores, scores[term])
+                    if len(top_scores) > top_k:
+                        heapq.heappop(top_scores)
+
+        query_phonetic = phonetic_key(query_key)
+        if len(query_phonetic) >= MIN_PHONETIC_LENGTH:
+            for term in self.phonetic.get([query_phonetic]).tolist():
+                key = self.terms[term]
+                if phonetic_key(key) != query_phonetic:
+                    continue
+                edit_score = max(0.0, 1 - edit_distance(query_key, key) / max(len(query_key), len(key)))
+                scores[term] = max(scores.get(term, 0.0), (1 + edit_score) / 2)
+
+        results = [(self.term_name_ids[term], score) for term, score in scores.items() if score >= min_score]
+        results.sort(key=lambda result: (-result[1], result[0]))
+        return results[:top_k]
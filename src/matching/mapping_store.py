@@ -0,0 +1,520 @@
+"""Columnar Drug-Reaction Mapping Module.
+
+This module stores the drug-reaction mapping produced by preprocessing as a
+directory of flat numpy arrays that FAERSMatcher memory-maps at startup:
+
+    drug_names.npy            UTF-8 drug names, concatenated (uint8)
+    drug_offsets.npy          start offset of each drug name, plus the end (int64)
+    reaction_names.npy        UTF-8 reaction vocabulary, concatenated (uint8)
+    reaction_offsets.npy      start offset of each reaction name, plus the end (int64)
+    reaction_indptr.npy       CSR row pointers: drug i has reaction ids
+                              reaction_ids[indptr[i]:indptr[i + 1]] (int64)
+    reaction_ids.npy          reaction ids of every drug (int32)
+    severity_indptr.npy       CSR row pointers of the per-drug severities (int64)
+    severity_ids.npy          severity ids of every drug (uint8)
+    highest_severity_ids.npy  highest severity id of each drug (uint8)
+    meta.json                 format version, counts, the severity labels and
+                              the data version (a hash of the arrays)
+
+When preprocessing computed disproportionality statistics, one value per
+drug-reaction pair is stored in the order of reaction_ids, so the statistics of
+the reaction at position p of drug i are at reaction_indptr[i] + p:
+
+    pair_reports.npy          number of reports of the pair (int32, 0 if unknown)
+    pair_prr.npy              proportional reporting ratio (float32)
+    pair_prr_lower.npy        lower bound of its 95% confidence interval (float32)
+    pair_prr_upper.npy        upper bound of its 95% confidence interval (float32)
+    pair_ror.npy              reporting odds ratio (float32)
+    pair_ror_lower.npy        lower bound of its 95% confidence interval (float32)
+    pair_ror_upper.npy        upper bound of its 95% confidence interval (float32)
+    pair_severity_ids.npy     highest severity id of the pair's reports (uint8)
+
+Loading parses nothing: the arrays stay backed by the files' pages, so startup
+takes milliseconds regardless of the FAERS size and worker processes on one
+node share the same physical memory. Each reaction string is stored once no
+matter how many drugs report it.
+"""
+
+import os
+import re
+import ast
+import json
+import hashlib
+import shutil
+import tempfile
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+ARRAY_NAMES = [
+    "drug_names", "drug_offsets", "reaction_names", "reaction_offsets",
+    "reaction_indptr", "reaction_ids", "severity_indptr", "severity_ids", "highest_severity_ids"
+]
+
+SIGNAL_STATISTICS = ["prr", "prr_lower", "prr_upper", "ror", "ror_lower", "ror_upper"]
+
+SIGNAL_ARRAY_NAMES = ["pair_reports"] + [f"pair_{name}" for name in SIGNAL_STATISTICS] + ["pair_severity_ids"]
+
+# A pair is flagged as a signal when it has at least this many reports and the
+# lower bound of its PRR confidence interval is above 1
+SIGNAL_MIN_REPORTS = 3
+
+SIGNALS_FILE_NAME = "drug_reaction_signals.csv"
+
+MISSING_IN_LIST = re.compile(r'(?<=[\[,\s])nan(?=\s*[,\]])')
+
+def _encode_strings(strings):
+    """Concatenate strings into a UTF-8 byte array with offsets."""
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(data) for data in encoded], dtype=np.int64)
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+def _iter_strings(blob, offsets):
+    """Decode the strings of a UTF-8 byte array with offsets."""
+    data = blob.tobytes()
+    offsets = offsets.tolist()
+    for start, end in zip(offsets, offsets[1:]):
+        yield data[start:end].decode('utf-8')
+
+def _csr(rows, vocabulary, dtype):
+    """Encode lists of strings as CSR row pointers and vocabulary ids."""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    ids = []
+    for i, row in enumerate(rows):
+        ids.extend(vocabulary[value] for value in row)
+        indptr[i + 1] = len(ids)
+    return indptr, np.asarray(ids, dtype=dtype)
+
+def _pair_signal_arrays(drug_names, reactions, signals, severity_vocabulary):
+    """Align per-pair statistics with the CSR order of the drugs' reactions.
+
+    Pairs missing from the statistics get 0 reports, NaN statistics and the
+    Unknown severity.
+    """
+    rows = {
+        (str(drug), str(reaction)): row
+        for row, (drug, reaction) in enumerate(zip(signals['drugname'].tolist(), signals['pt'].tolist()))
+    }
+    positions = np.fromiter(
+        (rows.get((drug, reaction), -1) for drug, row in zip(drug_names, reactions) for reaction in row),
+        dtype=np.int64
+    )
+    found = positions >= 0
+    positions = np.where(found, positions, 0)
+
+    arrays = {}
+    reports = signals['reports'].to_numpy(dtype=np.int64)
+    arrays['pair_reports'] = np.where(found, reports[positions] if len(reports) else 0, 0).astype(np.int32)
+    for name in SIGNAL_STATISTICS:
+        values = signals[name].to_numpy(dtype=np.float64)
+        arrays[f"pair_{name}"] = np.where(found, values[positions] if len(values) else np.nan, np.nan).astype(np.float32)
+
+    unknown = severity_vocabulary.setdefault('Unknown', len(severity_vocabulary))
+    severity_ids = np.fromiter(
+        (severity_vocabulary.setdefault(str(label), len(severity_vocabulary))
+         for label in signals['highest_severity'].tolist()),
+        dtype=np.int64, count=len(signals)
+    )
+    arrays['pair_severity_ids'] = np.where(
+        found, severity_ids[positions] if len(severity_ids) else unknown, unknown
+    ).astype(np.uint8)
+    return arrays
+
+def make_pair_signal(reports, statistics, severity):
+    """Build the pair_signal dictionary of a drug-reaction pair.
+
+    Args:
+        reports: Number of reports of the pair
+        statistics: Dictionary of SIGNAL_STATISTICS name -> value
+        severity: Highest severity label of the pair's reports
+
+    Returns:
+        Dictionary with reports, prr, prr_ci, ror, ror_ci, is_signal and severity
+    """
+    return {
+        'reports': reports,
+        'prr': statistics['prr'],
+        'prr_ci': (statistics['prr_lower'], statistics['prr_upper']),
+        'ror': statistics['ror'],
+        'ror_ci': (statistics['ror_lower'], statistics['ror_upper']),
+        'is_signal': reports >= SIGNAL_MIN_REPORTS and statistics['prr_lower'] > 1,
+        'severity': severity
+    }
+
+def _is_missing(value):
+    """Check for None or NaN without importing pandas."""
+    return value is None or (isinstance(value, float) and value != value)
+
+def _as_list(value):
+    """Turn a mapping cell into a list of strings, dropping missing values."""
+    if isinstance(value, str):
+        # CSV cells hold the repr of a Python list, in which missing values appear as a bare nan
+        value = ast.literal_eval(MISSING_IN_LIST.sub("None", value))
+    if _is_missing(value):
+        return []
+    return [str(item) for item in value if not _is_missing(item)]
+
+class ColumnarDrugMapping:
+    """Read-only drug-reaction mapping backed by flat arrays."""
+
+    def __init__(self, arrays, severity_labels, data_version=None):
+        """Initialize the mapping from its arrays.
+
+        Args:
+            arrays: Dictionary of array name -> numpy array (see ARRAY_NAMES)
+            severity_labels: List of severity labels indexed by severity id
+            data_version: Version stamp of the arrays. Default is None, which
+                          computes it on first use
+        """
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        # Disproportionality statistics are optional (see SIGNAL_ARRAY_NAMES)
+        for name in SIGNAL_ARRAY_NAMES:
+            setattr(self, name, arrays.get(name))
+        self.severity_labels = list(severity_labels)
+        self._data_version = data_version
+
+    @classmethod
+    def from_records(cls, drug_names, reactions, severities, highest_severities, signals=None):
+        """Build an in-memory mapping from per-drug columns.
+
+        Args:
+            drug_names: List of drug names
+            reactions: List of reaction lists, one per drug
+            severities: List of severity lists, one per drug
+            highest_severities: List of highest severity labels, one per drug
+            signals: Optional compute_disproportionality DataFrame with the
+                     statistics of the drug-reaction pairs
+
+        Returns:
+            ColumnarDrugMapping instance
+        """
+        drug_names = [str(name) for name in drug_names]
+        reactions = [_as_list(row) for row in reactions]
+        severities = [_as_list(row) for row in severities]
+        highest_severities = [str(label) for label in highest_severities]
+
+        # Vocabularies keep first-seen order, lists keep their order per drug
+        reaction_vocabulary = {}
+        for row in reactions:
+            for reaction in row:
+                reaction_vocabulary.setdefault(reaction, len(reaction_vocabulary))
+        severity_vocabulary = {}
+        for row in severities + [highest_severities]:
+            for label in row:
+                severity_vocabulary.setdefault(label, len(severity_vocabulary))
+
+        arrays = {}
+        arrays['drug_names'], arrays['drug_offsets'] = _encode_strings(drug_names)
+        arrays['reaction_names'], arrays['reaction_offsets'] = _encode_strings(reaction_vocabulary)
+        arrays['reaction_indptr'], arrays['reaction_ids'] = _csr(reactions, reaction_vocabulary, np.int32)
+        arrays['severity_indptr'], arrays['severity_ids'] = _csr(severities, severity_vocabulary, np.uint8)
+        arrays['highest_severity_ids'] = np.asarray(
+            [severity_vocabulary[label] for label in highest_severities], dtype=np.uint8
+        )
+        if signals is not None:
+            arrays.update(_pair_signal_arrays(drug_names, reactions, signals, severity_vocabulary))
+        return cls(arrays, severity_vocabulary)
+
+    @classmethod
+    def from_dataframe(cls, drug_mapping, signals=None):
+        """Build an in-memory mapping from a create_drug_reaction_mapping DataFrame.
+
+        Args:
+            drug_mapping: DataFrame with drugname, reactions, severities and highest_severity
+            signals: Optional compute_disproportionality DataFrame
+        """
+        return cls.from_records(
+            drug_mapping['drugname'].tolist(),
+            drug_mapping['reactions'].tolist(),
+            drug_mapping['severities'].tolist(),
+            drug_mapping['highest_severity'].tolist(),
+            signals=signals
+        )
+
+    @classmethod
+    def from_csv(cls, path, signals_file=None):
+        """Build an in-memory mapping from drug_reaction_mapping.csv.
+
+        The list columns are parsed with ast.literal_eval, never eval.
+
+        Args:
+            path: Path to drug_reaction_mapping.csv
+            signals_file: Optional path to drug_reaction_signals.csv
+        """
+        import pandas as pd
+
+        drug_mapping = pd.read_csv(path, keep_default_na=False)
+        signals = None
+        if signals_file is not None:
+            signals = pd.read_csv(signals_file, keep_default_na=False, na_values=[''])
+        return cls.from_dataframe(drug_mapping, signals=signals)
+
+    @classmethod
+    def empty(cls):
+        """Create a mapping with no drugs."""
+        return cls.from_records([], [], [], [])
+
+    @classmethod
+    def load(cls, directory):
+        """Memory-map a mapping written by save().
+
+        Args:
+            directory: Directory containing the arrays and meta.json
+
+        Returns:
+            ColumnarDrugMapping instance
+        """
+        link = Path(directory)
+        while True:
+            # Resolve the link written by save() once, so all files come from one version
+            directory = link.resolve()
+            try:
+                meta = json.loads((directory / "meta.json").read_text())
+                if meta.get('format_version') != FORMAT_VERSION:
+                    raise ValueError(
+                        f"Unsupported mapping format version {meta.get('format_version')} in {directory}"
+                    )
+
+                # Plain ndarray views of the memmaps: same pages, without the slow memmap indexing
+                names = ARRAY_NAMES + (SIGNAL_ARRAY_NAMES if meta.get('signals') else [])
+                arrays = {name: np.asarray(np.load(directory / f"{name}.npy", mmap_mode='r')) for name in names}
+                return cls(arrays, meta['severity_labels'], data_version=meta.get('data_version'))
+            except FileNotFoundError:
+                # Two saves removed this version while it was loading; load the current one
+                if link.resolve() == directory:
+                    raise
+
+    def save(self, directory):
+        """Write the mapping to a directory, replacing it atomically.
+
+        The arrays are written to a new versioned directory next to it
+        (directory.v*), and directory is a symlink that is switched to it
+        with one rename. Readers resolve the link once (see load), so they
+        see either the old or the new version, never a partial one or none.
+        The previous version is kept for readers that resolved it just
+        before the switch; older ones are removed.
+
+        Args:
+            directory: Output path (a symlink to the current version)
+
+        Returns:
+            Path of the written directory
+        """
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        tmp_directory = Path(tempfile.mkdtemp(prefix=directory.name + ".v", dir=directory.parent))
+
+        names = ARRAY_NAMES + (SIGNAL_ARRAY_NAMES if self.has_signals() else [])
+        for name in names:
+            np.save(tmp_directory / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'drugs': len(self),
+            'reactions': self.reaction_count(),
+            'severity_labels': self.severity_labels,
+            'signals': self.has_signals(),
+            'data_version': self.data_version()
+        }
+        (tmp_directory / "meta.json").write_text(json.dumps(meta, indent=2))
+
+        previous = directory.resolve() if directory.is_symlink() else None
+        if directory.exists() and not directory.is_symlink():
+            # A plain directory from an older version of save() is moved aside
+            # once; until the link is in place the path does not exist
+            previous = directory.rename(tempfile.mkdtemp(prefix=directory.name + ".v", dir=directory.parent)).resolve()
+
+        link = directory.with_name(directory.name + ".link.tmp")
+        if link.is_symlink() or link.exists():
+            link.unlink()
+        os.symlink(tmp_directory.name, link)
+        os.replace(link, directory)
+
+        keep = (tmp_directory.resolve(), previous)
+        for version in directory.parent.glob(directory.name + ".v*"):
+            if version.is_dir() and version.resolve() not in keep:
+                shutil.rmtree(version, ignore_errors=True)
+        return directory
+
+    def __len__(self):
+        return len(self.drug_offsets) - 1
+
+    def data_version(self):
+        """Get a short version stamp that changes whenever the mapping's content does.
+
+        Saved mappings store it in meta.json, so loading never hashes the arrays.
+        """
+        if self._data_version is None:
+            digest = hashlib.sha1()
+            names = ARRAY_NAMES + (SIGNAL_ARRAY_NAMES if self.has_signals() else [])
+            for name in names:
+                digest.update(np.ascontiguousarray(getattr(self, name)).tobytes())
+            digest.update(json.dumps(self.severity_labels).encode('utf-8'))
+            self._data_version = digest.hexdigest()[:12]
+        return self._data_version
+
+    def reaction_count(self):
+        """Number of distinct reactions in the vocabulary."""
+        return len(self.reaction_offsets) - 1
+
+    def drug_name(self, index):
+        """Get the name of the drug at an index."""
+        return self.drug_names[self.drug_offsets[index]:self.drug_offsets[index + 1]].tobytes().decode('utf-8')
+
+    def iter_drug_names(self):
+        """Iterate over the drug names in order."""
+        return _iter_strings(self.drug_names, self.drug_offsets)
+
+    def iter_reaction_names(self):
+        """Iterate over the reaction vocabulary in reaction id order."""
+        return _iter_strings(self.reaction_names, self.reaction_offsets)
+
+    def reaction_name(self, reaction_id):
+        """Get the reaction string of a reaction id."""
+        start, end = self.reaction_offsets[reaction_id], self.reaction_offsets[reaction_id + 1]
+        return self.reaction_names[start:end].tobytes().decode('utf-8')
+
+    def reaction_ids_of(self, index):
+        """Get the reaction ids of the drug at an index."""
+        return self.reaction_ids[self.reaction_indptr[index]:self.reaction_indptr[index + 1]]
+
+    def reactions(self, index):
+        """Get the reaction strings of the drug at an index."""
+        return [self.reaction_name(reaction_id) for reaction_id in self.reaction_ids_of(index)]
+
+    def severities(self, index):
+        """Get the severity labels of the drug at an index."""
+        ids = self.severity_ids[self.severity_indptr[index]:self.severity_indptr[index + 1]]
+        return [self.severity_labels[severity_id] for severity_id in ids]
+
+    def highest_severity(self, index):
+        """Get the highest severity label of the drug at an index."""
+        return self.severity_labels[self.highest_severity_ids[index]]
+
+    def has_signals(self):
+        """Check whether the mapping holds disproportionality statistics."""
+        return self.pair_reports is not None
+
+    def pair_index(self, index, position):
+        """Get the pair index of the reaction at a position in a drug's reaction list."""
+        return int(self.reaction_indptr[index]) + position
+
+    def pair_signal(self, pair_index):
+        """Get the report count and disproportionality statistics of a drug-reaction pair.
+
+        Args:
+            pair_index: Pair index (see pair_index)
+
+        Returns:
+            Dictionary with reports, prr, prr_ci, ror, ror_ci, is_signal and
+            severity, or None if the mapping has no statistics for the pair
+        """
+        if not self.has_signals() or not self.pair_reports[pair_index]:
+            return None
+        return make_pair_signal(
+            int(self.pair_reports[pair_index]),
+            {name: float(getattr(self, f"pair_{name}")[pair_index]) for name in SIGNAL_STATISTICS},
+            self.severity_labels[self.pair_severity_ids[pair_index]]
+        )
+
+    def pair_signal_columns(self, pair_indices):
+        """Get the statistics of many drug-reaction pairs as columns.
+
+        Args:
+            pair_indices: Integer array of pair indices
+
+        Returns:
+            Dictionary of column name -> array: reports, the SIGNAL_STATISTICS,
+            is_signal and reaction_severity. Without statistics reports are 0,
+            the statistics NaN and the severities None.
+        """
+        pair_indices = np.asarray(pair_indices, dtype=np.int64)
+        if not self.has_signals():
+            columns = {'reports': np.zeros(len(pair_indices), dtype=np.int32)}
+            for name in SIGNAL_STATISTICS:
+                columns[name] = np.full(len(pair_indices), np.nan, dtype=np.float32)
+            columns['is_signal'] = np.zeros(len(pair_indices), dtype=bool)
+            columns['reaction_severity'] = np.full(len(pair_indices), None, dtype=object)
+            return columns
+
+        columns = {'reports': self.pair_reports[pair_indices]}
+        for name in SIGNAL_STATISTICS:
+            columns[name] = getattr(self, f"pair_{name}")[pair_indices]
+        columns['is_signal'] = (columns['reports'] >= SIGNAL_MIN_REPORTS) & (columns['prr_lower'] > 1)
+        labels = np.asarray(self.severity_labels + [None], dtype=object)
+        columns['reaction_severity'] = np.where(
+            columns['reports'] > 0, labels[self.pair_severity_ids[pair_indices]], None
+        )
+        return columns
+
+def columnar_path(mapping_file):
+    """Get the columnar mapping directory that belongs to a mapping CSV path."""
+    mapping_file = Path(mapping_file)
+    return mapping_file if mapping_file.suffix != ".csv" else mapping_file.with_suffix("")
+
+def signals_path(mapping_file):
+    """Get the disproportionality statistics CSV written next to a mapping CSV."""
+    return Path(mapping_file).with_name(SIGNALS_FILE_NAME)
+
+def load_drug_mapping(mapping_file):
+    """Load a drug-reaction mapping, preferring the columnar artifact.
+
+    Args:
+        mapping_file: Path of the columnar directory or of drug_reaction_mapping.csv.
+                      For a CSV path the directory with the same name without the
+                      suffix is memory-mapped when it exists and is not older than
+                      the CSV. A CSV is loaded together with the
+                      drug_reaction_signals.csv next to it, if any.
+
+    Returns:
+        ColumnarDrugMapping instance
+    """
+    mapping_file = Path(mapping_file)
+    directory = columnar_path(mapping_file)
+
+    if (directory / "meta.json").exists():
+        csv_is_newer = (mapping_file.suffix == ".csv" and mapping_file.exists()
+                        and mapping_file.stat().st_mtime > (directory / "meta.json").stat().st_mtime)
+        if not csv_is_newer:
+            return ColumnarDrugMapping.load(directory)
+
+    signals_file = signals_path(mapping_file)
+    return ColumnarDrugMapping.from_csv(mapping_file, signals_file if signals_file.exists() else None)
+
+def write_columnar_mapping(drug_mapping, directory, signals=None):
+    """Write a create_drug_reaction_mapping DataFrame as a columnar mapping.
+
+    Args:
+        drug_mapping: DataFrame with drugname, reactions, severities and highest_severity
+        directory: Output directory
+        signals: Optional compute_disproportionality DataFrame
+
+    Returns:
+        Path of the written directory
+    """
+    return ColumnarDrugMapping.from_dataframe(drug_mapping, signals=signals).save(directory)
+
+def main():
+    """Convert an existing drug_reaction_mapping.csv to the columnar format."""
+    parser = argparse.ArgumentParser(description="Convert a drug-reaction mapping CSV to the columnar format")
+    parser.add_argument("mapping_file", help="Path to drug_reaction_mapping.csv")
+    parser.add_argument("--output", default=None,
+                        help="Output directory (default: the CSV path without the .csv suffix)")
+    parser.add_argument("--signals", default=None,
+                        help="drug_reaction_signals.csv to include (default: the one next to the CSV, if any)")
+    args = parser.parse_args()
+
+    signals_file = args.signals
+    if signals_file is None and signals_path(args.mapping_file).exists():
+        signals_file = signals_path(args.mapping_file)
+    mapping = ColumnarDrugMapping.from_csv(args.mapping_file, signals_file)
+    directory = mapping.save(args.output or columnar_path(args.mapping_file))
+    print(f"Wrote {len(mapping)} drugs and {mapping.reaction_count()} reactions to {directory}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Match Cache Module.
+
+This module provides the bounded LRU cache FAERSMatcher uses to memoize
+medicine and symptom resolution. A few medicines and symptoms ("lisinopril",
+"headache") recur in most conversations, so steady-state lookups become a
+dictionary hit instead of an index search. FAERSMatcher clears its caches
+whenever its indexes are rebuilt from a new mapping.
+"""
+
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 10000
+
+_MISSING = object()
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count, with hit counters."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Look up a key, marking it as recently used.
+
+        Args:
+            key: Hashable key
+            default: Value returned on a miss
+
+        Returns:
+            The cached value, or default on a miss
+        """
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries as needed."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries (the hit counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return cache metrics.
+
+        Returns:
+            Dictionary with hit/miss counts, hit rate and entry count
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries)
+        }
@@ -0,0 +1,198 @@
+"""Name Index Module.
+
+This module indexes a vocabulary of normalized names (FAERS drug names or
+reaction terms) for the containment matching FAERSMatcher uses: a query
+matches a name when one contains the other, scored by the ratio of their
+lengths. Since score >= threshold bounds the length of any useful name, a
+lookup only has to look at:
+
+    names contained in the query    the query's substrings of sufficient
+                                    length, looked up in a hash table
+    names containing the query      the intersection of the posting lists of
+                                    the query's rarest character trigrams,
+                                    filtered by length
+
+so its cost depends on the query, not on the size of the vocabulary.
+"""
+
+import re
+
+import numpy as np
+
+TRIGRAM_INTERSECTIONS = 3
+
+def normalize_name(text):
+    """Normalize a drug name, reaction or query the way FAERSMatcher compares them.
+
+    Returns:
+        Lowercased text without punctuation or surrounding spaces ("" for non-strings)
+    """
+    if not isinstance(text, str):
+        return ""
+    return re.sub(r'[^\w\s]', '', text.lower()).strip()
+
+def containment_score(query, name):
+    """Score a query against a name the way FAERSMatcher does.
+
+    Returns:
+        Ratio of the shorter to the longer length if one contains the other, else 0
+    """
+    if query in name or name in query:
+        return min(len(query), len(name)) / max(len(query), len(name))
+    return 0
+
+def length_bounds(length, threshold, longest):
+    """Bound the length of a name whose containment score with a query can reach the threshold.
+
+    score = shorter / longer >= threshold bounds the other name's length.
+
+    Args:
+        length: Length of the query
+        threshold: Minimum score (0-1)
+        longest: Length of the longest name, used when the threshold gives no bound
+
+    Returns:
+        Tuple of (min_length, max_length)
+    """
+    if threshold > 0:
+        return max(int(length * threshold) - 1, 1), int(length / threshold) + 1
+    return 1, longest
+
+def query_substrings(query, min_length):
+    """All distinct substrings of a query that are at least min_length long."""
+    length = len(query)
+    return {
+        query[start:start + size]
+        for size in range(max(min_length, 1), length + 1)
+        for start in range(length - size + 1)
+    }
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class NameIndex:
+    """Substring and trigram index over a list of normalized names."""
+
+    def __init__(self, normalized_names):
+        """Build the index.
+
+        Args:
+            normalized_names: List of normalized names; positions are the ids
+                              returned by lookups
+        """
+        self.names = list(normalized_names)
+        self.lengths = np.fromiter((len(name) for name in self.names), dtype=np.int32, count=len(self.names))
+
+        # Exact name -> first id with that name (ties go to the earliest id)
+        self.first_id = {}
+        for name_id, name in enumerate(self.names):
+            if name:
+                self.first_id.setdefault(name, name_id)
+
+        # Trigram postings in CSR layout: ids of names containing trigram t are
+        # posting_ids[posting_indptr[t]:posting_indptr[t + 1]], in ascending order
+        self.trigram_ids = {}
+        gram_column = []
+        id_column = []
+        for name_id, name in enumerate(self.names):
+            for gram in _trigrams(name):
+                gram_column.append(self.trigram_ids.setdefault(gram, len(self.trigram_ids)))
+                id_column.append(name_id)
+        gram_column = np.asarray(gram_column, dtype=np.int32)
+        order = np.argsort(gram_column, kind='stable')
+        self.posting_ids = np.asarray(id_column, dtype=np.int32)[order]
+        self.posting_indptr = np.zeros(len(self.trigram_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(gram_column, minlength=len(self.trigram_ids)), out=self.posting_indptr[1:])
+
+        # Short queries have no trigrams: fall back to the names ordered by length
+        self.ids_by_length = np.argsort(self.lengths, kind='stable').astype(np.int32)
+        self.sorted_lengths = self.lengths[self.ids_by_length]
+
+    def __len__(self):
+        return len(self.names)
+
+    def id_of(self, name):
+        """Get the first id of an exact normalized name, or None."""
+        return self.first_id.get(name)
+
+    def _postings(self, gram):
+        gram_id = self.trigram_ids.get(gram)
+        if gram_id is None:
+            return None
+        return self.posting_ids[self.posting_indptr[gram_id]:self.posting_indptr[gram_id + 1]]
+
+    def _containing(self, query, max_length):
+        """Ids of names that contain the query and are at most max_length long."""
+        length = len(query)
+        if length < 3:
+            start = np.searchsorted(self.sorted_lengths, length, side='left')
+            end = np.searchsorted(self.sorted_lengths, max_length, side='right')
+            return [name_id for name_id in self.ids_by_length[start:end].tolist() if query in self.names[name_id]]
+
+        postings = []
+        for gram in _trigrams(query):
+            gram_postings = self._postings(gram)
+            if gram_postings is None:
+                return []
+            postings.append(gram_postings)
+        postings.sort(key=len)
+
+        candidates = postings[0]
+        for gram_postings in postings[1:TRIGRAM_INTERSECTIONS]:
+            candidates = np.intersect1d(candidates, gram_postings, assume_unique=True)
+        candidates = candidates[self.lengths[candidates] <= max_length]
+        return [name_id for name_id in candidates.tolist() if query in self.names[name_id]]
+
+    def _contained(self, query, min_length):
+        """Ids of the names equal to a substring of the query at least min_length long."""
+        found = set()
+        for substring in query_substrings(query, min_length):
+            name_id = self.first_id.get(substring)
+            if name_id is not None:
+                found.add(name_id)
+        return found
+
+    def matches(self, query, threshold):
+        """Find every name whose containment score with the query reaches the threshold.
+
+        Args:
+            query: Normalized query text
+            threshold: Minimum score (0-1)
+
+        Returns:
+            Dictionary of name id -> score. Of several identical names only the
+            first id is guaranteed to be included.
+        """
+        length = len(query)
+        if not length:
+            return {}
+
+        min_length, max_length = length_bounds(
+            length, threshold, int(self.lengths.max()) if len(self.lengths) else 0
+        )
+
+        results = {}
+        for name_id in set(self._containing(query, max_length)) | self._contained(query, min_length):
+            score = containment_score(query, self.names[name_id])
+            if score >= threshold and score > 0:
+                results[name_id] = score
+        return results
+
+    def best_match(self, query, threshold):
+        """Find the best scoring name, preferring the lowest id on ties.
+
+        This gives the same result as scanning the names in order and keeping
+        the first one with the highest score.
+
+        Args:
+            query: Normalized query text
+            threshold: Minimum score (0-1)
+
+        Returns:
+            Tuple of (name id, score) or (None, 0) if no name reaches the threshold
+        """
+        results = self.matches(query, threshold)
+        if not results:
+            return None, 0
+        name_id = min(results, key=lambda candidate: (-results[candidate], candidate))
+        return name_id, results[name_id]
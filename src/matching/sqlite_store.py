@@ -0,0 +1,602 @@
+"""SQLite Drug-Reaction Store Module.
+
+This module stores the drug-reaction mapping in a single SQLite database for
+deployments where the FAERS data should not be held in memory. FAERSMatcher
+uses it (FAERS_STORE=sqlite) through the same accessors as the columnar
+mapping, and answers name lookups with queries against the database's indexes
+instead of building in-memory indexes:
+
+    drugs               drug name, normalized name and its length, spelling
+                        key, delete prefix and phonetic key, highest severity,
+                        and the range of the drug's rows in drug_reactions and
+                        drug_severities
+    drug_reactions      one row per drug-reaction pair, numbered in drug order
+                        (pair_id is the pair index of the columnar mapping),
+                        with the reaction, its term and the pair's statistics
+    drug_severities     the severities of every drug, in drug order
+    reactions           reaction vocabulary with the term of each reaction
+    reaction_terms      distinct normalized reaction terms
+    drug_names_fts      FTS5 trigram indexes over the normalized drug names
+    reaction_terms_fts  and reaction terms, for substring lookups
+    drug_name_deletes   the symmetric deletes of the drug name prefixes, for
+                        fuzzy lookups (see fuzzy_index)
+
+The rows of one drug are adjacent in rowid order, so a lookup reads a few
+neighbouring pages. Connections are read-only and memory-map the file: the
+data lives in the OS page cache, shared by all worker processes, instead of
+in each process, and memory use stays flat as the dataset grows.
+"""
+
+import os
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from .mapping_store import (SIGNAL_STATISTICS, SIGNAL_MIN_REPORTS,
+                                columnar_path, load_drug_mapping, make_pair_signal)
+    from .name_index import NameIndex, containment_score, length_bounds, normalize_name, query_substrings
+    from .fuzzy_index import (FuzzyNameIndex, DEFAULT_MAX_DISTANCE, DEFAULT_PREFIX_LENGTH, MIN_PHONETIC_LENGTH,
+                              _deletes, edit_distance, phonetic_key, spelling_key)
+except ImportError:
+    # Run as a script (python src/matching/sqlite_store.py)
+    from mapping_store import (SIGNAL_STATISTICS, SIGNAL_MIN_REPORTS,
+                               columnar_path, load_drug_mapping, make_pair_signal)
+    from name_index import NameIndex, containment_score, length_bounds, normalize_name, query_substrings
+    from fuzzy_index import (FuzzyNameIndex, DEFAULT_MAX_DISTANCE, DEFAULT_PREFIX_LENGTH, MIN_PHONETIC_LENGTH,
+                             _deletes, edit_distance, phonetic_key, spelling_key)
+
+FORMAT_VERSION = 1
+
+# Bytes of the database each connection memory-maps (pages are shared via the OS page cache)
+MMAP_SIZE = 1 << 30
+
+# Private page cache of each connection in KiB, kept small since the OS caches the pages
+CACHE_KIB = 2048
+
+# Parameters bound per IN (...) query, well below SQLite's variable limit
+MAX_QUERY_PARAMETERS = 500
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE severity_labels (id INTEGER PRIMARY KEY, label TEXT NOT NULL);
+CREATE TABLE drugs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    spelling TEXT NOT NULL,
+    prefix TEXT NOT NULL,
+    phonetic TEXT NOT NULL,
+    highest_severity_id INTEGER NOT NULL,
+    first_pair INTEGER NOT NULL,
+    pair_count INTEGER NOT NULL,
+    first_severity INTEGER NOT NULL,
+    severity_count INTEGER NOT NULL
+);
+CREATE TABLE reactions (id INTEGER PRIMARY KEY, name TEXT NOT NULL, term_id INTEGER NOT NULL);
+CREATE TABLE reaction_terms (id INTEGER PRIMARY KEY, normalized TEXT NOT NULL, length INTEGER NOT NULL);
+CREATE TABLE drug_reactions (
+    pair_id INTEGER PRIMARY KEY,
+    drug_id INTEGER NOT NULL,
+    reaction_id INTEGER NOT NULL,
+    term_id INTEGER NOT NULL,
+    reports INTEGER NOT NULL,
+    prr REAL, prr_lower REAL, prr_upper REAL,
+    ror REAL, ror_lower REAL, ror_upper REAL,
+    severity_id INTEGER
+);
+CREATE TABLE drug_severities (id INTEGER PRIMARY KEY, severity_id INTEGER NOT NULL);
+CREATE TABLE drug_name_deletes (variant TEXT NOT NULL, prefix TEXT NOT NULL,
+                                PRIMARY KEY (variant, prefix)) WITHOUT ROWID;
+CREATE VIRTUAL TABLE drug_names_fts USING fts5(normalized, tokenize='trigram', content='');
+CREATE VIRTUAL TABLE reaction_terms_fts USING fts5(normalized, tokenize='trigram', content='');
+"""
+
+# Created after the bulk inserts, which is faster than maintaining them row by row
+INDEXES = """
+CREATE INDEX drugs_normalized ON drugs (normalized, id);
+CREATE INDEX drugs_length ON drugs (length, id);
+CREATE INDEX drugs_prefix ON drugs (prefix, id);
+CREATE INDEX drugs_phonetic ON drugs (phonetic, id);
+CREATE INDEX reaction_terms_normalized ON reaction_terms (normalized, id);
+CREATE INDEX reaction_terms_length ON reaction_terms (length, id);
+"""
+
+def sqlite_path(mapping_file):
+    """Get the SQLite database that belongs to a mapping CSV or columnar directory."""
+    mapping_file = Path(mapping_file)
+    return mapping_file if mapping_file.suffix == ".db" else columnar_path(mapping_file).with_suffix(".db")
+
+def _fts_phrase(text):
+    """Quote text as an FTS5 phrase."""
+    return '"' + text.replace('"', '""') + '"'
+
+def _chunks(values, size=MAX_QUERY_PARAMETERS):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def write_sqlite_mapping(mapping, path, max_distance=DEFAULT_MAX_DISTANCE, prefix_length=DEFAULT_PREFIX_LENGTH):
+    """Write a mapping to a SQLite database, replacing it atomically.
+
+    Args:
+        mapping: ColumnarDrugMapping (with or without signal statistics)
+        path: Output database file
+        max_distance: Maximum edit distance of fuzzy drug name lookups
+        prefix_length: Length of the drug name prefix the deletes are generated from
+
+    Returns:
+        Path of the written database
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    connection = sqlite3.connect(str(tmp_path))
+    try:
+        connection.executescript(SCHEMA)
+        connection.executemany("INSERT INTO severity_labels VALUES (?, ?)", enumerate(mapping.severity_labels))
+
+        reaction_indptr = mapping.reaction_indptr.tolist()
+        severity_indptr = mapping.severity_indptr.tolist()
+        highest_severity_ids = mapping.highest_severity_ids.tolist()
+        drug_rows = []
+        prefixes = set()
+        for drug_id, name in enumerate(mapping.iter_drug_names()):
+            normalized = normalize_name(name)
+            key = spelling_key(normalized)
+            prefixes.add(key[:prefix_length])
+            drug_rows.append((
+                drug_id, name, normalized, len(normalized), key, key[:prefix_length], phonetic_key(key),
+                highest_severity_ids[drug_id],
+                reaction_indptr[drug_id], reaction_indptr[drug_id + 1] - reaction_indptr[drug_id],
+                severity_indptr[drug_id], severity_indptr[drug_id + 1] - severity_indptr[drug_id]
+            ))
+        connection.executemany("INSERT INTO drugs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", drug_rows)
+        del drug_rows
+
+        # Deletes only depend on the prefix, so they are stored once per distinct prefix
+        prefixes.discard("")
+        connection.executemany(
+            "INSERT INTO drug_name_deletes VALUES (?, ?)",
+            ((variant, prefix) for prefix in prefixes for variant in _deletes(prefix, max_distance))
+        )
+
+        # Reactions that normalize to the same text share a term, as in FAERSMatcher
+        term_ids = {}
+        reaction_rows = [
+            (reaction_id, reaction, term_ids.setdefault(normalize_name(reaction), len(term_ids)))
+            for reaction_id, reaction in enumerate(mapping.iter_reaction_names())
+        ]
+        connection.executemany("INSERT INTO reactions VALUES (?, ?, ?)", reaction_rows)
+        connection.executemany(
+            "INSERT INTO reaction_terms VALUES (?, ?, ?)",
+            ((term_id, term, len(term)) for term, term_id in term_ids.items())
+        )
+        reaction_terms = np.asarray([term_id for _, _, term_id in reaction_rows], dtype=np.int64)
+
+        pair_count = len(mapping.reaction_ids)
+        columns = [
+            np.arange(pair_count).tolist(),
+            np.repeat(np.arange(len(mapping)), np.diff(mapping.reaction_indptr)).tolist(),
+            mapping.reaction_ids.tolist(),
+            reaction_terms[mapping.reaction_ids].tolist() if pair_count else []
+        ]
+        if mapping.has_signals():
+            columns.append(mapping.pair_reports.tolist())
+            # NaN is stored as NULL
+            columns.extend(getattr(mapping, f"pair_{name}").astype(np.float64).tolist() for name in SIGNAL_STATISTICS)
+            columns.append(mapping.pair_severity_ids.tolist())
+        else:
+            columns.append([0] * pair_count)
+            columns.extend([None] * pair_count for _ in SIGNAL_STATISTICS)
+            columns.append([None] * pair_count)
+        connection.executemany(
+            "INSERT INTO drug_reactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", zip(*columns)
+        )
+        connection.executemany("INSERT INTO drug_severities VALUES (?, ?)", enumerate(mapping.severity_ids.tolist()))
+
+        connection.execute("INSERT INTO drug_names_fts (rowid, normalized) SELECT id, normalized FROM drugs")
+        connection.execute("INSERT INTO reaction_terms_fts (rowid, normalized) SELECT id, normalized FROM reaction_terms")
+        connection.executescript(INDEXES)
+
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'drugs': len(mapping),
+            'reactions': mapping.reaction_count(),
+            'signals': int(mapping.has_signals()),
+            'data_version': mapping.data_version(),
+            'fuzzy_max_distance': max_distance,
+            'fuzzy_prefix_length': prefix_length
+        }
+        connection.executemany("INSERT INTO meta VALUES (?, ?)", ((key, str(value)) for key, value in meta.items()))
+        connection.commit()
+        connection.execute("ANALYZE")
+        connection.commit()
+    finally:
+        connection.close()
+
+    # Open connections keep reading the old file; new ones see the new database
+    os.replace(tmp_path, path)
+    return path
+
+class SQLiteDrugMapping:
+    """Read-only drug-reaction mapping queried from a SQLite database.
+
+    Provides the accessors of ColumnarDrugMapping, plus name indexes that
+    run their lookups as queries.
+    """
+
+    def __init__(self, path):
+        """Open the database.
+
+        Args:
+            path: Database written by write_sqlite_mapping
+        """
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"SQLite mapping not found at {self.path}")
+        # One connection per thread, reopened in forked processes
+        self._local = threading.local()
+
+        meta = dict(self._db().execute("SELECT key, value FROM meta"))
+        if int(meta.get('format_version', 0)) != FORMAT_VERSION:
+            raise ValueError(f"Unsupported SQLite mapping format version {meta.get('format_version')} in {self.path}")
+        self.severity_labels = [label for _, label in self._db().execute("SELECT id, label FROM severity_labels ORDER BY id")]
+        self._drugs = int(meta['drugs'])
+        self._reactions = int(meta['reactions'])
+        self._signals = meta['signals'] == '1'
+        self._data_version = meta['data_version']
+        self.fuzzy_max_distance = int(meta['fuzzy_max_distance'])
+        self.fuzzy_prefix_length = int(meta['fuzzy_prefix_length'])
+
+    def _db(self):
+        """Get this thread's read-only connection."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            connection.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            connection.execute(f"PRAGMA cache_size=-{CACHE_KIB}")
+            connection.execute("PRAGMA query_only=1")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _query(self, sql, parameters=()):
+        return self._db().execute(sql, parameters).fetchall()
+
+    def __len__(self):
+        return self._drugs
+
+    def reaction_count(self):
+        """Number of distinct reactions in the vocabulary."""
+        return self._reactions
+
+    def data_version(self):
+        """Get the version stamp of the mapping the database was written from."""
+        return self._data_version
+
+    def has_signals(self):
+        """Check whether the database holds disproportionality statistics."""
+        return self._signals
+
+    def drug_name(self, index):
+        """Get the name of the drug at an index."""
+        return self._query("SELECT name FROM drugs WHERE id = ?", (int(index),))[0][0]
+
+    def iter_drug_names(self):
+        """Iterate over the drug names in order."""
+        for (name,) in self._db().execute("SELECT name FROM drugs ORDER BY id"):
+            yield name
+
+    def iter_reaction_names(self):
+        """Iterate over the reaction vocabulary in reaction id order."""
+        for (name,) in self._db().execute("SELECT name FROM reactions ORDER BY id"):
+            yield name
+
+    def reaction_name(self, reaction_id):
+        """Get the reaction string of a reaction id."""
+        return self._query("SELECT name FROM reactions WHERE id = ?", (int(reaction_id),))[0][0]
+
+    def _pairs_of(self, columns, index):
+        """Select columns of a drug's rows in drug_reactions, in list order (one rowid range scan)."""
+        return self._query(
+            f"SELECT {columns} FROM drug_reactions "
+            "WHERE pair_id >= (SELECT first_pair FROM drugs WHERE id = ?1) "
+            "AND pair_id < (SELECT first_pair + pair_count FROM drugs WHERE id = ?1) "
+            "ORDER BY pair_id",
+            (int(index),)
+        )
+
+    def reaction_ids_of(self, index):
+        """Get the reaction ids of the drug at an index."""
+        return np.asarray([reaction_id for (reaction_id,) in self._pairs_of("reaction_id", index)], dtype=np.int32)
+
+    def reaction_terms_of(self, index):
+        """Get the reaction ids and reaction term ids of the drug at an index.
+
+        Returns:
+            Tuple of (reaction ids, term ids) arrays, in the drug's reaction order
+        """
+        rows = self._pairs_of("reaction_id, term_id", index)
+        return (np.asarray([row[0] for row in rows], dtype=np.int32),
+                np.asarray([row[1] for row in rows], dtype=np.int32))
+
+    def reactions(self, index):
+        """Get the reaction strings of the drug at an index."""
+        return [name for (name,) in self._query(
+            "SELECT r.name FROM drug_reactions p JOIN reactions r ON r.id = p.reaction_id "
+            "WHERE p.pair_id >= (SELECT first_pair FROM drugs WHERE id = ?1) "
+            "AND p.pair_id < (SELECT first_pair + pair_count FROM drugs WHERE id = ?1) "
+            "ORDER BY p.pair_id",
+            (int(index),)
+        )]
+
+    def severities(self, index):
+        """Get the severity labels of the drug at an index."""
+        return [self.severity_labels[severity_id] for (severity_id,) in self._query(
+            "SELECT severity_id FROM drug_severities "
+            "WHERE id >= (SELECT first_severity FROM drugs WHERE id = ?1) "
+            "AND id < (SELECT first_severity + severity_count FROM drugs WHERE id = ?1) "
+            "ORDER BY id",
+            (int(index),)
+        )]
+
+    def highest_severity(self, index):
+        """Get the highest severity label of the drug at an index."""
+        severity_id = self._query("SELECT highest_severity_id FROM drugs WHERE id = ?", (int(index),))[0][0]
+        return self.severity_labels[severity_id]
+
+    def pair_index(self, index, position):
+        """Get the pair index of the reaction at a position in a drug's reaction list."""
+        return self._query("SELECT first_pair FROM drugs WHERE id = ?", (int(index),))[0][0] + position
+
+    def pair_signal(self, pair_index):
+        """Get the report count and disproportionality statistics of a drug-reaction pair.
+
+        Returns:
+            Dictionary as ColumnarDrugMapping.pair_signal, or None if the
+            database has no statistics for the pair
+        """
+        if not self._signals:
+            return None
+        rows = self._query(
+            f"SELECT reports, {', '.join(SIGNAL_STATISTICS)}, severity_id FROM drug_reactions WHERE pair_id = ?",
+            (int(pair_index),)
+        )
+        if not rows or not rows[0][0]:
+            return None
+        row = rows[0]
+        statistics = {
+            name: float('nan') if value is None else value
+            for name, value in zip(SIGNAL_STATISTICS, row[1:-1])
+        }
+        return make_pair_signal(row[0], statistics, self.severity_labels[row[-1]])
+
+    def pair_signal_columns(self, pair_indices):
+        """Get the statistics of many drug-reaction pairs as columns.
+
+        Returns:
+            Dictionary of columns as ColumnarDrugMapping.pair_signal_columns
+        """
+        pair_indices = np.asarray(pair_indices, dtype=np.int64)
+        unique_pairs, positions = np.unique(pair_indices, return_inverse=True)
+
+        reports = np.zeros(len(unique_pairs), dtype=np.int32)
+        statistics = np.full((len(unique_pairs), len(SIGNAL_STATISTICS)), np.nan, dtype=np.float32)
+        severity_ids = np.full(len(unique_pairs), -1, dtype=np.int64)
+        if self._signals:
+            row_of = {pair_id: row for row, pair_id in enumerate(unique_pairs.tolist())}
+            for chunk in _chunks(unique_pairs.tolist()):
+                for pair_id, pair_reports, *values, severity_id in self._query(
+                    f"SELECT pair_id, reports, {', '.join(SIGNAL_STATISTICS)}, severity_id "
+                    f"FROM drug_reactions WHERE pair_id IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                ):
+                    row = row_of[pair_id]
+                    reports[row] = pair_reports
+                    statistics[row] = [np.nan if value is None else value for value in values]
+                    if pair_reports and severity_id is not None:
+                        severity_ids[row] = severity_id
+
+        columns = {'reports': reports[positions]}
+        for column, name in enumerate(SIGNAL_STATISTICS):
+            columns[name] = statistics[positions, column]
+        columns['is_signal'] = (columns['reports'] >= SIGNAL_MIN_REPORTS) & (columns['prr_lower'] > 1)
+        labels = np.asarray(self.severity_labels + [None], dtype=object)
+        columns['reaction_severity'] = labels[severity_ids[positions]]
+        return columns
+
+    def drug_name_index(self):
+        """Name index over the normalized drug names, answered from the database."""
+        return SQLiteNameIndex(self, "drugs", "drug_names_fts", self._drugs)
+
+    def reaction_term_index(self):
+        """Name index over the reaction terms, answered from the database."""
+        return SQLiteNameIndex(self, "reaction_terms", "reaction_terms_fts")
+
+class SQLiteNameIndex(NameIndex):
+    """NameIndex whose lookups are queries instead of in-memory structures.
+
+    Names containing the query come from the FTS5 trigram index, names
+    contained in the query from the index on the normalized names. Scores and
+    tie-breaks are the same as NameIndex's.
+    """
+
+    def __init__(self, mapping, table, fts_table, size=None):
+        """Initialize the index.
+
+        Args:
+            mapping: SQLiteDrugMapping
+            table: Table with id, normalized and length columns
+            fts_table: FTS5 trigram table over the table's normalized names
+            size: Number of names. Default is None, which counts the rows
+        """
+        self.mapping = mapping
+        self.table = table
+        self.fts_table = fts_table
+        if size is None:
+            size = mapping._query(f"SELECT count(*) FROM {table}")[0][0]
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def id_of(self, name):
+        """Get the first id of an exact normalized name, or None."""
+        rows = self.mapping._query(f"SELECT min(id) FROM {self.table} WHERE normalized = ?", (name,))
+        return rows[0][0] if rows else None
+
+    def _containing(self, query, max_length):
+        """Ids and names of the names that contain the query and are at most max_length long."""
+        if len(query) < 3:
+            # Too short for trigrams: scan the names of a suitable length
+            return self.mapping._query(
+                f"SELECT id, normalized FROM {self.table} "
+                "WHERE length BETWEEN ? AND ? AND instr(normalized, ?) > 0",
+                (len(query), max_length, query)
+            )
+        return self.mapping._query(
+            f"SELECT t.id, t.normalized FROM {self.fts_table} f JOIN {self.table} t ON t.id = f.rowid "
+            f"WHERE {self.fts_table} MATCH ? AND t.length <= ?",
+            (_fts_phrase(query), max_length)
+        )
+
+    def _contained(self, query, min_length):
+        """Ids and names of the names equal to a substring of the query at least min_length long."""
+        rows = []
+        for chunk in _chunks(query_substrings(query, min_length)):
+            rows.extend(self.mapping._query(
+                f"SELECT id, normalized FROM {self.table} WHERE normalized IN ({', '.join('?' * len(chunk))})",
+                chunk
+            ))
+        return rows
+
+    def matches(self, query, threshold):
+        """Find every name whose containment score with the query reaches the threshold.
+
+        Args:
+            query: Normalized query text
+            threshold: Minimum score (0-1)
+
+        Returns:
+            Dictionary of name id -> score
+        """
+        if not query:
+            return {}
+
+        min_length, max_length = length_bounds(len(query), threshold, 1 << 30)
+
+        results = {}
+        for name_id, name in self._containing(query, max_length) + self._contained(query, min_length):
+            score = containment_score(query, name)
+            if score >= threshold and score > 0:
+                results[name_id] = score
+        return results
+
+class SQLiteFuzzyIndex:
+    """Fuzzy drug name lookup answered from the database.
+
+    Gives the same results as a FuzzyNameIndex over the drug names: candidates
+    are the drugs whose prefix shares a delete with the query's prefix
+    (drug_name_deletes) or that have the query's phonetic key, scored the same
+    way. Extra names (aliases) are kept in a small in-memory FuzzyNameIndex and
+    get the ids after the drugs.
+    """
+
+    def __init__(self, mapping, extra_names=()):
+        """Initialize the index.
+
+        Args:
+            mapping: SQLiteDrugMapping
+            extra_names: Normalized names with ids len(mapping), len(mapping) + 1, ...
+        """
+        self.mapping = mapping
+        self.max_distance = mapping.fuzzy_max_distance
+        self.prefix_length = mapping.fuzzy_prefix_length
+
+        # As in one index over drugs and extra names, an extra name spelled
+        # like a drug is represented by the drug
+        extra_names = list(extra_names)
+        self.extra_ids = [
+            position for position, name in enumerate(extra_names)
+            if not mapping._query("SELECT 1 FROM drugs WHERE spelling = ? LIMIT 1", (spelling_key(name),))
+        ]
+        self.extra_index = FuzzyNameIndex(
+            [extra_names[position] for position in self.extra_ids], max_distance=self.max_distance,
+            prefix_length=self.prefix_length
+        ) if self.extra_ids else None
+
+    def _candidates(self, query_key):
+        """Ids and spelling keys of the drugs sharing a prefix delete with the query, within the length bounds."""
+        variants = list(_deletes(query_key[:self.prefix_length], self.max_distance))
+        rows = []
+        for chunk in _chunks(variants):
+            rows.extend(self.mapping._query(
+                "SELECT id, spelling FROM drugs WHERE prefix IN ("
+                f"SELECT prefix FROM drug_name_deletes WHERE variant IN ({', '.join('?' * len(chunk))})"
+                ") AND length(spelling) BETWEEN ? AND ?",
+                chunk + [len(query_key) - self.max_distance, len(query_key) + self.max_distance]
+            ))
+        return rows
+
+    def lookup(self, query, top_k=5, min_score=0.0):
+        """Find the names closest to a normalized query.
+
+        Returns:
+            List of (name id, score) tuples, best first (lowest id on ties)
+        """
+        query_key = spelling_key(query)
+        if not query_key:
+            return []
+
+        # Drugs with the same spelling key are one term, represented by the first
+        scores = {}
+        term_ids = {}
+        for name_id, key in self._candidates(query_key):
+            if key not in term_ids or name_id < term_ids[key]:
+                term_ids[key] = name_id
+            if key not in scores:
+                distance = edit_distance(query_key, key, self.max_distance)
+                if distance <= self.max_distance:
+                    scores[key] = 1 - distance / max(len(query_key), len(key))
+
+        query_phonetic = phonetic_key(query_key)
+        if len(query_phonetic) >= MIN_PHONETIC_LENGTH:
+            for name_id, key in self.mapping._query(
+                "SELECT id, spelling FROM drugs WHERE phonetic = ?", (query_phonetic,)
+            ):
+                if key not in term_ids or name_id < term_ids[key]:
+                    term_ids[key] = name_id
+                edit_score = max(0.0, 1 - edit_distance(query_key, key) / max(len(query_key), len(key)))
+                scores[key] = max(scores.get(key, 0.0), (1 + edit_score) / 2)
+
+        results = [(term_ids[key], score) for key, score in scores.items() if score >= min_score]
+        if self.extra_index is not None:
+            results.extend(
+                (len(self.mapping) + self.extra_ids[name_id], score)
+                for name_id, score in self.extra_index.lookup(query, top_k=top_k, min_score=min_score)
+            )
+        results.sort(key=lambda result: (-result[1], result[0]))
+        return results[:top_k]
+
+def main():
+    """Convert an existing drug-reaction mapping to a SQLite database."""
+    parser = argparse.ArgumentParser(description="Convert a drug-reaction mapping to a SQLite database")
+    parser.add_argument("mapping_file", help="Path to drug_reaction_mapping.csv or the columnar directory")
+    parser.add_argument("--output", default=None,
+                        help="Output database (default: the mapping path with a .db suffix)")
+    args = parser.parse_args()
+
+    mapping = load_drug_mapping(args.mapping_file)
+    path = write_sqlite_mapping(mapping, args.output or sqlite_path(args.mapping_file))
+    print(f"Wrote {len(mapping)} drugs and {mapping.reaction_count()} reactions to {path}")
+
+if __name__ == "__main__":
+    main()
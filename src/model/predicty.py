@@ -38,11 +38,47 @@ logger = logging.getLogger(__name__)
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = PROJECT_ROOT / "data" / "processed"
 
+# Files whose changes make a running predictor stale
+DATA_FILES = [
+    "merged_data.csv",
+    "drug_reaction_mapping.csv",
+    "drug_reaction_signals.csv",
+    "drug_reaction_mapping/meta.json",
+    "drug_reaction_mapping.db"
+]
+
+def data_fingerprint(data_dir=None):
+    """Identify the current version of the processed data files.
+    
+    Args:
+        data_dir: Directory with the processed data. Default is None, which uses data/processed
+        
+    Returns:
+        Tuple of (file name, size, modification time) for the files that exist
+    """
+    data_dir = Path(data_dir) if data_dir else DATA_DIR
+    fingerprint = []
+    for name in DATA_FILES:
+        path = data_dir / name
+        if path.exists():
+            stat = path.stat()
+            fingerprint.append((name, stat.st_size, stat.st_mtime_ns))
+    return tuple(fingerprint)
+
 class AdverseEventPredictor:
     """Class for predicting adverse events from conversations."""
     
-    def __init__(self):
-        """Initialize the predictor with necessary data."""
+    def __init__(self, medicine_extractor=None, symptom_extractor=None, faers_matcher=None):
+        """Initialize the predictor with necessary data.
+        
+        Args:
+            medicine_extractor: MedicineExtractor to use
+                               Default is None, which creates one with the default model
+            symptom_extractor: SymptomExtractor to use
+                              Default is None, which creates one with the default model
+            faers_matcher: FAERSMatcher to use
+                          Default is None, which loads the default mapping file
+        """
         self.data_loaded = False
         self.load_data()
         
@@ -50,11 +86,60 @@ class AdverseEventPredictor:
         from extraction.medicine_extractor import MedicineExtractor
         from extraction.symptom_extractor import SymptomExtractor
         
-        self.medicine_extractor = MedicineExtractor()
-        self.symptom_extractor = SymptomExtractor()
+        self.medicine_extractor = medicine_extractor or MedicineExtractor()
+        self.symptom_extractor = symptom_extractor or SymptomExtractor()
+        self.faers_matcher = faers_matcher or FAERSMatcher()
+        self.model = self.load_severity_model()
+    
+    @property
+    def data_version(self):
+        """Version stamp of the FAERS data this predictor matches against."""
+        return self.faers_matcher.data_version
+    
+    def reloaded(self):
+        """Create a new predictor over the current data files.
+        
+        The new predictor reloads the FAERS data, gazetteers, matcher indexes
+        and severity model, but shares this predictor's NER models. This
+        predictor is left unchanged, so requests in flight finish on the old
+        data while the new one is built.
+        
+        Returns:
+            AdverseEventPredictor instance
+        """
+        logger.info("Building predictor over the current FAERS data...")
+        return AdverseEventPredictor(
+            medicine_extractor=self.medicine_extractor.with_reloaded_gazetteers(),
+            symptom_extractor=self.symptom_extractor.with_reloaded_gazetteers()
+        )
+    
+    def load_severity_model(self):
+        """Load the trained severity model if it is available.
+        
+        Returns:
+            The trained model, or None if it has not been trained
+        """
+        model_path = Path(__file__).resolve().parent / "severity_model.pkl"
+        if not model_path.exists():
+            logger.warning(f"Severity model not found at {model_path}, severities will be reported as Unknown")
+            return None
+        try:
+            with open(model_path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.error(f"Error loading severity model: {e}")
+            return None
     
     def load_data(self):
         """Load the necessary data for prediction."""
+        if os.environ.get("FAERS_STORE") == "sqlite":
+            # Matching queries the SQLite store on disk; the merged reports are not held in memory
+            self.merged_data = None
+            self.drug_reaction_map = {}
+            self.data_loaded = True
+            logger.info("Using the SQLite FAERS store, merged data not loaded")
+            return
+        
         try:
             # Load the merged data
             merged_data_path = DATA_DIR / "merged_data.csv"
@@ -217,6 +302,12 @@ class AdverseEventPredictor:
         Returns:
             Predicted severity category
         """
+        if self.model is None:
+            return {
+                'severity': 'Unknown',
+                'confidence': 0.0
+            }
+        
         # Combine medicine and symptom as features
         feature = f"{medicine} {symptom}"
         
@@ -273,7 +364,8 @@ class AdverseEventPredictor:
                 'medicine_count': len(medicines),
                 'symptom_count': len(symptoms),
                 'adverse_event_count': len(adverse_events)
-            }
+            },
+            'data_version': self.data_version
         }
         
         return results